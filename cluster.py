@@ -0,0 +1,344 @@
+"""
+Запуск бота в нескольких процессах (BOT_WORKERS > 1)
+
+Основной процесс только получает обновления (polling или webhook) и раскладывает
+их по очередям процессов-обработчиков по id пользователя. Все обновления одного
+пользователя обрабатывает один процесс и строго по порядку, поэтому состояние FSM,
+учет активности и лимиты отправки в его чат остаются согласованными; обновления
+разных пользователей обрабатываются параллельно.
+
+Фоновые задачи (рассылки, обслуживание базы) выполняет только процесс 0:
+остальные передают ему команды запуска и управления рассылками. Изменения данных,
+которые кэшируются в памяти (настройки, тексты, чаты этажей, видео,
+администраторы), передаются остальным процессам через их очереди.
+"""
+import asyncio
+import multiprocessing
+import os
+import queue
+import secrets
+import signal
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from loguru import logger
+
+from config.settings import Settings, get_settings
+from database.database import close_db, db, init_db
+from handlers import register_handlers
+from keep_alive import create_web_server, setup_update_forwarding, start_web_server
+from utils.broadcast import delegate_broadcasts, handle_broadcast_command
+from utils.health import CheckResult, add_check, mark_update, watch_polling
+from utils.metrics import registry, start_loop_monitor, stop_loop_monitor
+
+# Таймаут long polling в основном процессе, секунды
+POLLING_TIMEOUT = 30
+# Максимальная пауза между попытками после ошибки getUpdates, секунды
+POLLING_MAX_BACKOFF = 60
+# Период проверки процессов-обработчиков, секунды
+SUPERVISE_INTERVAL = 5
+# Сколько ждать завершения обработчиков при остановке, секунды
+WORKER_STOP_TIMEOUT = 30
+# Период отправки метрик обработчика основному процессу, секунды
+METRICS_PUSH_INTERVAL = 5
+
+
+def shard_key(update: Dict[str, Any]) -> int:
+    """Ключ распределения обновления: id пользователя, иначе id чата, иначе update_id"""
+    for event in update.values():
+        if not isinstance(event, dict):
+            continue
+        user = event.get("from") or event.get("user")
+        if user:
+            return user["id"]
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+    return update.get("update_id", 0)
+
+
+class UpdateFeeder:
+    """Обработка обновлений: одного пользователя — по очереди, разных — параллельно"""
+
+    def __init__(self, dp: Dispatcher, bot: Bot):
+        self.dp = dp
+        self.bot = bot
+        # Последняя задача обработки для каждого ключа
+        self._tails: Dict[int, asyncio.Task] = {}
+
+    def feed(self, key: int, update: Dict[str, Any]):
+        previous = self._tails.get(key)
+        task = asyncio.create_task(self._process(previous, update))
+        self._tails[key] = task
+        task.add_done_callback(partial(self._forget, key))
+
+    def _forget(self, key: int, task: asyncio.Task):
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def _process(self, previous: Optional[asyncio.Task], update: Dict[str, Any]):
+        if previous:
+            await asyncio.wait([previous])
+        try:
+            response = await self.dp.feed_raw_update(self.bot, update)
+            if isinstance(response, TelegramMethod):
+                await self.dp.silent_call_request(bot=self.bot, result=response)
+        except Exception as e:
+            logger.error(f"Ошибка при обработке обновления {update.get('update_id')}: {e}")
+
+    async def wait(self):
+        """Ожидание обработки всех полученных обновлений"""
+        while self._tails:
+            await asyncio.wait(list(self._tails.values()))
+
+
+async def _push_metrics(index: int, metrics_queue: multiprocessing.Queue):
+    """Снимок метрик обработчика для /metrics основного процесса"""
+    while True:
+        await asyncio.sleep(METRICS_PUSH_INTERVAL)
+        metrics_queue.put((index, registry.collect()))
+
+
+def _forward_event(queues: List[multiprocessing.Queue], event: str, args: tuple):
+    for worker_queue in queues:
+        worker_queue.put(("event", event, args))
+
+
+async def run_worker(index: int, queues: List[multiprocessing.Queue],
+                     metrics_queue: multiprocessing.Queue):
+    """Процесс-обработчик: обновления и события из своей очереди"""
+    # Импорт здесь: main импортирует этот модуль только в режиме нескольких процессов
+    from main import setup_bot, shutdown_bot, start_background_jobs
+
+    settings = get_settings()
+    bot = None
+    fsm_storage = None
+    metrics_task = None
+    try:
+        bot, dp, fsm_storage = await setup_bot(settings)
+        metrics_task = asyncio.create_task(_push_metrics(index, metrics_queue))
+        db.set_event_forwarder(partial(
+            _forward_event, [q for number, q in enumerate(queues) if number != index]
+        ))
+        if index == 0:
+            # Рассылки всех администраторов выполняются здесь
+            db.subscribe("broadcast", partial(handle_broadcast_command, bot))
+            await start_background_jobs(bot)
+        else:
+            delegate_broadcasts()
+
+        feeder = UpdateFeeder(dp, bot)
+        own_queue = queues[index]
+        parent = multiprocessing.parent_process()
+        loop = asyncio.get_running_loop()
+        logger.info(f"Обработчик {index} запущен (PID {os.getpid()})")
+
+        while True:
+            try:
+                item = await loop.run_in_executor(None, partial(own_queue.get, timeout=1))
+            except queue.Empty:
+                # Основной процесс завершился без команды остановки
+                if parent is not None and not parent.is_alive():
+                    break
+                continue
+            if item is None:
+                break
+            if item[0] == "update":
+                feeder.feed(item[1], item[2])
+            elif item[0] == "event":
+                db.apply_event(item[1], *item[2])
+
+        await feeder.wait()
+    finally:
+        if metrics_task:
+            metrics_task.cancel()
+        db.set_event_forwarder(None)
+        await shutdown_bot(bot, fsm_storage)
+        logger.info(f"Обработчик {index} остановлен")
+
+
+def worker_process(index: int, queues: List[multiprocessing.Queue],
+                   metrics_queue: multiprocessing.Queue):
+    """Точка входа процесса-обработчика"""
+    # Сигналы остановки получает вся группа процессов; обработчики останавливает
+    # основной процесс, чтобы они доработали уже полученные обновления
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    # SIGHUP тоже обрабатывает основной процесс: он передает перезагрузку настроек всем
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    logger.add(f"logs/bot_worker{index}.log", rotation="1 day", retention="7 days")
+    asyncio.run(run_worker(index, queues, metrics_queue))
+
+
+class Cluster:
+    """Процессы-обработчики и их очереди"""
+
+    def __init__(self, workers: int):
+        self._context = multiprocessing.get_context("spawn")
+        self.queues: List[multiprocessing.Queue] = [self._context.Queue() for _ in range(workers)]
+        self.metrics_queue: multiprocessing.Queue = self._context.Queue()
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.stopping = False
+
+    def _start_worker(self, index: int):
+        process = self._context.Process(
+            target=worker_process,
+            args=(index, self.queues, self.metrics_queue),
+            name=f"bot-worker-{index}"
+        )
+        process.start()
+        self.processes[index] = process
+
+    def start(self):
+        for index in range(len(self.queues)):
+            self._start_worker(index)
+
+    def reload_settings(self):
+        """Перезагрузка настроек во всех обработчиках (SIGHUP основному процессу)"""
+        logger.info("Перезагрузка настроек в обработчиках")
+        _forward_event(self.queues, "reload", ())
+
+    def forward(self, update: Dict[str, Any]):
+        """Передача обновления процессу, который отвечает за пользователя"""
+        key = shard_key(update)
+        self.queues[key % len(self.queues)].put(("update", key, update))
+        mark_update()
+
+    async def check_workers(self) -> CheckResult:
+        """Проверка для /ready: все обработчики работают (упавшие перезапускаются)"""
+        alive = sum(1 for process in self.processes if process is not None and process.is_alive())
+        return alive == len(self.processes), True, {"alive": alive, "total": len(self.processes)}
+
+    async def supervise(self):
+        """Перезапуск процессов-обработчиков, завершившихся с ошибкой"""
+        while not self.stopping:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            for index, process in enumerate(self.processes):
+                if not self.stopping and process is not None and not process.is_alive():
+                    logger.error(f"Обработчик {index} завершился (код {process.exitcode}), перезапуск")
+                    self._start_worker(index)
+
+    async def receive_metrics(self):
+        """Последние метрики обработчиков попадают в /metrics с меткой worker"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                index, families = await loop.run_in_executor(
+                    None, partial(self.metrics_queue.get, timeout=1)
+                )
+            except queue.Empty:
+                continue
+            registry.set_external(str(index), families)
+
+    async def stop(self):
+        """Обработчики дорабатывают полученные обновления и завершаются"""
+        self.stopping = True
+        for worker_queue in self.queues:
+            worker_queue.put(None)
+        for index, process in enumerate(self.processes):
+            if process is None:
+                continue
+            await asyncio.to_thread(process.join, WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning(f"Обработчик {index} не завершился за {WORKER_STOP_TIMEOUT} с, остановка")
+                process.terminate()
+
+
+async def poll_updates(bot: Bot, allowed_updates: List[str], cluster: Cluster):
+    """Long polling без обработки: обновления сразу уходят процессам-обработчикам"""
+    offset = None
+    backoff = 1
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset,
+                timeout=POLLING_TIMEOUT,
+                allowed_updates=allowed_updates,
+                request_timeout=POLLING_TIMEOUT + 10
+            )
+            backoff = 1
+        except Exception as e:
+            logger.error(f"Ошибка получения обновлений: {e}; повтор через {backoff} с")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, POLLING_MAX_BACKOFF)
+            continue
+
+        for update in updates:
+            cluster.forward(update.model_dump(mode="json", by_alias=True, exclude_unset=True))
+            offset = update.update_id + 1
+
+
+async def run_cluster(settings: Settings):
+    """Основной процесс: получение обновлений и управление обработчиками"""
+    from main import wait_for_shutdown
+
+    # Миграции выполняются один раз до запуска обработчиков
+    await init_db()
+    await close_db()
+
+    # Диспетчер нужен только для списка используемых типов обновлений
+    dp = Dispatcher()
+    register_handlers(dp)
+    allowed_updates = dp.resolve_used_update_types()
+
+    bot = Bot(token=settings.bot_token)
+    cluster = Cluster(settings.bot_workers)
+    web_runner = None
+    webhook_mode = settings.bot_mode == "webhook"
+    tasks: List[asyncio.Task] = []
+    try:
+        if webhook_mode and not settings.webhook_url:
+            raise ValueError("Для BOT_MODE=webhook нужен WEBHOOK_URL")
+        webhook_secret = settings.webhook_secret or secrets.token_urlsafe(32)
+
+        cluster.start()
+        # Перезагрузка настроек без перезапуска: kill -HUP <pid основного процесса>
+        if hasattr(signal, "SIGHUP"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, cluster.reload_settings)
+        start_loop_monitor()
+        add_check("workers", cluster.check_workers)
+        tasks.append(asyncio.create_task(cluster.supervise()))
+        tasks.append(asyncio.create_task(cluster.receive_metrics()))
+        logger.info(f"Запущено обработчиков: {settings.bot_workers}")
+
+        if webhook_mode or os.getenv("RENDER") or settings.metrics_enabled:
+            web_app = await create_web_server()
+            if webhook_mode:
+                setup_update_forwarding(web_app, settings.webhook_path, webhook_secret, cluster.forward)
+            web_runner = await start_web_server(web_app, settings.web_port)
+            logger.info(f"HTTP сервер запущен на порту {settings.web_port}")
+
+        if webhook_mode:
+            await bot.set_webhook(
+                url=settings.webhook_url + settings.webhook_path,
+                secret_token=webhook_secret,
+                allowed_updates=allowed_updates
+            )
+            logger.info(f"Бот запущен в режиме webhook: {settings.webhook_url}{settings.webhook_path}")
+        else:
+            await bot.delete_webhook()
+            watch_polling(bot)
+            tasks.append(asyncio.create_task(poll_updates(bot, allowed_updates, cluster)))
+            logger.info("Бот запущен в режиме polling")
+
+        await wait_for_shutdown()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await stop_loop_monitor()
+        if webhook_mode:
+            try:
+                await bot.delete_webhook()
+            except Exception as e:
+                logger.warning(f"Не удалось удалить webhook: {e}")
+        if web_runner:
+            await web_runner.cleanup()
+        await cluster.stop()
+        await bot.session.close()
+        # Соединения, открытые проверкой базы для /health
+        await close_db()
+        logger.info("Бот остановлен")
@@ -255,6 +255,14 @@ COUNCIL_CONTACTS = """
 Выходные: по договоренности
 """
 
+# Типы обратной связи (feedback.feedback_type)
+FEEDBACK_TYPES = {
+    "suggestion": "💡 Предложения",
+    "bug": "🐛 Ошибки",
+    "question": "❓ Вопросы",
+    "general": "💬 Общие отзывы"
+}
+
 # Сообщения для видео-гайдов
 VIDEO_CATEGORIES = {
     "tour": {
@@ -279,6 +287,12 @@ VIDEO_CATEGORIES = {
     }
 }
 
+# Ограничения на видео-гайды
+MAX_VIDEOS_PER_CATEGORY = 10
+MAX_VIDEO_SIZE_MB = 50
+VIDEO_MIME_TYPES = ("video/mp4", "video/x-msvideo", "video/avi", "video/quicktime")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov")
+
 # Этажи для чатов
 FLOOR_NUMBERS = list(range(2, 15))  # Этажи с 2 по 14
 
@@ -295,6 +309,16 @@ FEEDBACK_RECEIVED = """
 ✅ Спасибо! Ваше сообщение получено и передано команде Студенческого совета для рассмотрения в ближайшее время.
 """
 
+FEEDBACK_RESPONSE = """
+📬 <b>Ответ на ваше обращение</b>
+
+💭 <b>Вы писали:</b>
+{message}
+
+💬 <b>Ответ:</b>
+{response}
+"""
+
 # Административные сообщения
 ADMIN_PANEL_TEXT = """
 ⚙️ <b>Панель администратора</b>
@@ -320,6 +344,7 @@ STATS_TEXT = """
 • Активных за сегодня: {active_today}
 • Активных за неделю: {active_week}
 • Активных за месяц: {active_month}
+• В среднем за день (7 дней): {avg_daily_active}
 
 <b>Популярные разделы:</b>
 {popular_sections}
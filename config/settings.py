@@ -1,44 +1,85 @@
 import os
-from typing import List
+from typing import Callable, List, Optional, Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
+from loguru import logger
 
 # Загружаем переменные окружения из .env файла
 load_dotenv()
 
-@dataclass
+@dataclass(frozen=True)
 class Settings:
     """Настройки приложения"""
     # Основные настройки бота
     bot_token: str
-    admin_ids: List[int]
+    admin_ids: Tuple[int, ...]
     
     # Настройки базы данных
     database_path: str = "/tmp/bot.db"  # Для Railway.app используем /tmp
+    db_readers: int = 3  # Количество соединений для чтения в пуле
+    write_buffer_size: int = 100  # Событий в буфере до принудительной записи
+    write_buffer_interval: float = 2.0  # Интервал записи буфера, секунды
+    settings_cache_ttl: float = 300.0  # Время жизни кэша bot_settings, секунды
+    activity_debounce: float = 60.0  # Не чаще раза в столько секунд отмечать активность пользователя
+    
+    # Хранилище состояний FSM: "sqlite" (в базе бота), "redis" или "memory"
+    fsm_storage: str = "sqlite"
+    redis_url: str = ""  # Для FSM_STORAGE=redis, например redis://localhost:6379/0
+    fsm_state_ttl: int = 7 * 24 * 60 * 60  # Через сколько секунд без изменений состояние сбрасывается (0 — никогда)
+    fsm_cache_size: int = 1000  # Состояний в памяти перед SQLite
+    fsm_flush_interval: float = 1.0  # Интервал записи изменений состояний в SQLite, секунды
     
     # Контент настройки
     official_channel_link: str = ""
     general_chat_link: str = ""
     guide_website_link: str = ""
+    media_dir: str = "media"  # Локальные видео-гайды: media/<категория>/<файл>
+    
+    # Способ получения обновлений: "polling" или "webhook"
+    bot_mode: str = "polling"
+    webhook_url: str = ""  # Публичный адрес сервера, например https://bot.example.com
+    webhook_path: str = "/webhook"
+    webhook_secret: str = ""  # Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+    web_port: int = 8000
+    metrics_enabled: bool = True  # Запускать HTTP-сервер с /metrics и в режиме polling
+    
+    # Процессов-обработчиков обновлений; при 1 бот работает одним процессом
+    bot_workers: int = 1
+    
+    # Ограничение скорости всех исходящих сообщений
+    outbound_rate: float = 25.0  # Сообщений в секунду на весь бот (лимит Telegram ~30)
+    outbound_chat_rate: float = 1.0  # Сообщений в секунду в один личный чат
+    outbound_chat_burst: int = 5  # Сколько сообщений подряд можно отправить в один чат
+    
+    # Настройки массовых рассылок
+    broadcast_concurrency: int = 10  # Одновременных отправителей
+    broadcast_progress_interval: float = 5.0  # Период обновления прогресса, секунды
     
     # Настройки статистики
     stats_enabled: bool = True
+    stats_cache_ttl: float = 15.0  # Время жизни кэша статистики пользователей, секунды
+    stats_retention_days: int = 30  # Сколько дней хранить сырые события section_stats
+    export_gzip: bool = True  # Сжимать файлы выгрузки данных
     
     # Настройки логирования
     log_level: str = "INFO"
 
-def get_settings() -> Settings:
-    """Получение настроек из переменных окружения"""
+# Текущие настройки и подписчики на их изменение
+_settings: Optional[Settings] = None
+_listeners: List[Callable[[Settings], None]] = []
+
+def _load_settings() -> Settings:
+    """Чтение настроек из переменных окружения"""
     bot_token = os.getenv("BOT_TOKEN")
     if not bot_token:
         raise ValueError("BOT_TOKEN не найден в переменных окружения")
     
     # Получаем ID администраторов
     admin_ids_str = os.getenv("ADMIN_IDS", "")
-    admin_ids = []
+    admin_ids = ()
     if admin_ids_str:
         try:
-            admin_ids = [int(id_str.strip()) for id_str in admin_ids_str.split(",")]
+            admin_ids = tuple(int(id_str.strip()) for id_str in admin_ids_str.split(","))
         except ValueError:
             raise ValueError("Некорректный формат ADMIN_IDS")
     
@@ -46,9 +87,66 @@ def get_settings() -> Settings:
         bot_token=bot_token,
         admin_ids=admin_ids,
         database_path=os.getenv("DATABASE_PATH", "/tmp/bot.db"),
+        db_readers=int(os.getenv("DB_READERS", "3")),
+        write_buffer_size=int(os.getenv("WRITE_BUFFER_SIZE", "100")),
+        write_buffer_interval=float(os.getenv("WRITE_BUFFER_INTERVAL", "2.0")),
+        settings_cache_ttl=float(os.getenv("SETTINGS_CACHE_TTL", "300")),
+        activity_debounce=float(os.getenv("ACTIVITY_DEBOUNCE", "60")),
+        fsm_storage=os.getenv("FSM_STORAGE", "sqlite").lower(),
+        redis_url=os.getenv("REDIS_URL", ""),
+        fsm_state_ttl=int(os.getenv("FSM_STATE_TTL", str(7 * 24 * 60 * 60))),
+        fsm_cache_size=int(os.getenv("FSM_CACHE_SIZE", "1000")),
+        fsm_flush_interval=float(os.getenv("FSM_FLUSH_INTERVAL", "1.0")),
         official_channel_link=os.getenv("OFFICIAL_CHANNEL_LINK", ""),
         general_chat_link=os.getenv("GENERAL_CHAT_LINK", ""),
         guide_website_link=os.getenv("GUIDE_WEBSITE_LINK", ""),
+        media_dir=os.getenv("MEDIA_DIR", "media"),
+        bot_mode=os.getenv("BOT_MODE", "polling").lower(),
+        webhook_url=os.getenv("WEBHOOK_URL", "").rstrip("/"),
+        webhook_path=os.getenv("WEBHOOK_PATH", "/webhook"),
+        webhook_secret=os.getenv("WEBHOOK_SECRET", ""),
+        web_port=int(os.getenv("PORT", "8000")),
+        metrics_enabled=os.getenv("METRICS_ENABLED", "true").lower() == "true",
+        bot_workers=max(1, int(os.getenv("BOT_WORKERS", "1"))),
+        outbound_rate=float(os.getenv("OUTBOUND_RATE", "25")),
+        outbound_chat_rate=float(os.getenv("OUTBOUND_CHAT_RATE", "1")),
+        outbound_chat_burst=int(os.getenv("OUTBOUND_CHAT_BURST", "5")),
+        broadcast_concurrency=int(os.getenv("BROADCAST_CONCURRENCY", "10")),
+        broadcast_progress_interval=float(os.getenv("BROADCAST_PROGRESS_INTERVAL", "5")),
         stats_enabled=os.getenv("STATS_ENABLED", "true").lower() == "true",
+        stats_cache_ttl=float(os.getenv("STATS_CACHE_TTL", "15")),
+        stats_retention_days=int(os.getenv("STATS_RETENTION_DAYS", "30")),
+        export_gzip=os.getenv("EXPORT_GZIP", "true").lower() == "true",
         log_level=os.getenv("LOG_LEVEL", "INFO")
     )
+
+def get_settings() -> Settings:
+    """Получение настроек (читаются из окружения один раз)"""
+    global _settings
+    if _settings is None:
+        _settings = _load_settings()
+    return _settings
+
+def reload_settings() -> Settings:
+    """Повторное чтение настроек из окружения и .env с уведомлением подписчиков.
+    
+    Параметры, которые используются только при запуске (токен, путь к базе,
+    размер пула), вступают в силу после перезапуска бота.
+    """
+    global _settings
+    load_dotenv(override=True)
+    _settings = _load_settings()
+    
+    for listener in _listeners:
+        try:
+            listener(_settings)
+        except Exception as e:
+            logger.error(f"Ошибка в обработчике изменения настроек: {e}")
+    
+    logger.info("Настройки перезагружены")
+    return _settings
+
+def on_settings_change(listener: Callable[[Settings], None]) -> Callable[[Settings], None]:
+    """Подписка на перезагрузку настроек (можно использовать как декоратор)"""
+    _listeners.append(listener)
+    return listener
@@ -0,0 +1,125 @@
+"""
+Реестр шаблонов сообщений на основе config/content.py
+
+Шаблоны разбираются один раз при загрузке, тексты без подстановок отдаются
+без форматирования. Администратор может заменить любой текст через bot_settings
+(ключ "text:<ИМЯ>"), замена применяется без перезапуска и без запросов к базе.
+"""
+import html
+import string
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from config import content
+
+# Префикс ключей bot_settings с измененными текстами
+SETTING_PREFIX = "text:"
+
+
+@lru_cache(maxsize=4096)
+def escape_value(value: str) -> str:
+    """HTML-экранирование подставляемого значения (имена пользователей повторяются часто)"""
+    return html.escape(value)
+
+
+class Template:
+    """Разобранный шаблон str.format"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        needs_format = False
+
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(source):
+            if field_name is not None and (format_spec or conversion or not field_name.isidentifier()):
+                needs_format = True
+            self._parts.append((literal, field_name))
+
+        self.fields: FrozenSet[str] = frozenset(
+            field_name for _, field_name in self._parts if field_name is not None
+        )
+        # Сложные подстановки ({x:>3}, {x.y}) отдаем str.format
+        self._needs_format = needs_format
+        # Текст без подстановок готов сразу
+        self.static_text: Optional[str] = None
+        if not self.fields:
+            self.static_text = "".join(literal for literal, _ in self._parts)
+
+    def render(self, **values) -> str:
+        escaped = {
+            name: escape_value(str(value))
+            for name, value in values.items()
+            if name in self.fields
+        }
+        if self._needs_format:
+            return self.source.format(**escaped)
+        return "".join(
+            literal + (escaped[field_name] if field_name is not None else "")
+            for literal, field_name in self._parts
+        )
+
+
+class TemplateRegistry:
+    """Тексты по умолчанию из config.content и их замены от администратора"""
+
+    def __init__(self):
+        self._defaults: Dict[str, Template] = {
+            name: Template(value)
+            for name, value in vars(content).items()
+            if name.isupper() and isinstance(value, str)
+        }
+        self._overrides: Dict[str, Template] = {}
+
+    def names(self) -> List[str]:
+        return sorted(self._defaults)
+
+    def get(self, name: str) -> Template:
+        return self._overrides.get(name) or self._defaults[name]
+
+    def render(self, name: str, **values) -> str:
+        """Готовый текст; все подставляемые значения экранируются"""
+        template = self.get(name)
+        if template.static_text is not None:
+            return template.static_text
+        return template.render(**values)
+
+    def validate(self, name: str, text: str) -> Template:
+        """Проверка текста-замены: он не должен требовать неизвестных подстановок"""
+        if name not in self._defaults:
+            raise KeyError(f"Неизвестный текст: {name}")
+        try:
+            template = Template(text)
+        except ValueError as e:
+            raise ValueError(f"Некорректные фигурные скобки в тексте: {e}")
+        unknown = template.fields - self._defaults[name].fields
+        if unknown:
+            raise ValueError(f"Неизвестные подстановки: {', '.join(sorted(unknown))}")
+        return template
+
+    def set_override(self, name: str, text: Optional[str]):
+        """Замена текста (None или пустая строка возвращают текст по умолчанию)"""
+        if not text:
+            self._overrides.pop(name, None)
+            return
+        self._overrides[name] = self.validate(name, text)
+
+    def on_setting_changed(self, key: str, value: Optional[str]):
+        """Обработчик изменения bot_settings"""
+        if key.startswith(SETTING_PREFIX):
+            self.set_override(key[len(SETTING_PREFIX):], value)
+
+    def load_overrides(self, settings: Dict[str, str]):
+        """Загрузка замен из bot_settings; некорректные пропускаются"""
+        for key, value in settings.items():
+            try:
+                self.on_setting_changed(key, value)
+            except (KeyError, ValueError):
+                continue
+
+
+# Глобальный реестр шаблонов
+templates = TemplateRegistry()
+
+
+def render(name: str, **values) -> str:
+    return templates.render(name, **values)
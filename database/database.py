@@ -1,20 +1,113 @@
 import aiosqlite
 import asyncio
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+import json
+import time
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterable, List, Dict, Optional, Set, Tuple
 from loguru import logger
-from config.settings import get_settings
+from config.settings import Settings, get_settings, on_settings_change, reload_settings
+from database.migrations import apply_migrations
+from database.pool import ConnectionPool
+from database.rollups import day_start, days_ago, record_activity
+from database.write_buffer import WriteBehindBuffer
+from utils.metrics import DB_BUCKETS, instrument_methods, registry
 import os
 
+# Таблицы, которые администратор может выгрузить
+EXPORT_TABLES = ("users", "section_stats", "feedback", "broadcasts")
+
+DB_METHOD_DURATION = registry.histogram(
+    "bot_db_method_duration_seconds", "Время выполнения методов Database", ("method",), DB_BUCKETS
+)
+
 class Database:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, readers: int = 3,
+                 write_buffer_size: int = 100, write_buffer_interval: float = 2.0,
+                 settings_cache_ttl: float = 300.0, stats_cache_ttl: float = 15.0):
         self.db_path = db_path
         # Создаем директорию если не существует
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.pool = ConnectionPool(db_path, readers=readers)
+        self.write_buffer = WriteBehindBuffer(
+            self.pool,
+            max_events=write_buffer_size,
+            flush_interval=write_buffer_interval
+        )
+        # Кэш bot_settings: ключ -> (значение, момент устаревания по time.monotonic())
+        self.settings_cache_ttl = settings_cache_ttl
+        self._settings_cache: Dict[str, Tuple[Optional[str], float]] = {}
+        # Кэш статистики пользователей: (результат, момент устаревания)
+        self.stats_cache_ttl = stats_cache_ttl
+        self._stats_cache: Optional[Tuple[Dict, float]] = None
+        # Кэш администраторов: из ADMIN_IDS и из колонки users.is_admin
+        self._static_admin_ids: Set[int] = set()
+        self._admin_ids: Optional[Set[int]] = None
+        # Подписчики на изменение данных, которые кэшируются вне базы
+        self._listeners: Dict[str, List[Callable]] = {}
+        # Передача изменений другим процессам бота (режим BOT_WORKERS > 1)
+        self._forwarder: Optional[Callable[[str, tuple], None]] = None
+    
+    async def connect(self):
+        """Открытие пула соединений"""
+        await self.pool.open()
+        self.write_buffer.start()
+    
+    async def close(self):
+        """Запись буфера и закрытие пула соединений"""
+        await self.write_buffer.stop()
+        await self.pool.close()
+    
+    def subscribe(self, event: str, callback: Callable):
+        """Подписка на события ("floor_chat", "setting", "videos", "admin", "broadcast", "reload")"""
+        self._listeners.setdefault(event, []).append(callback)
+    
+    def set_event_forwarder(self, forwarder: Optional[Callable[[str, tuple], None]]):
+        """Функция, которая получает каждое событие для передачи другим процессам"""
+        self._forwarder = forwarder
+    
+    def _notify_listeners(self, event: str, *args):
+        for callback in self._listeners.get(event, []):
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Ошибка в обработчике события {event}: {e}")
+    
+    def _notify(self, event: str, *args):
+        self._notify_listeners(event, *args)
+        if self._forwarder:
+            try:
+                self._forwarder(event, args)
+            except Exception as e:
+                logger.error(f"Ошибка при передаче события {event}: {e}")
+    
+    def publish(self, event: str, *args):
+        """Событие без изменения кэшируемых данных (получают и другие процессы бота)"""
+        self._notify(event, *args)
+    
+    def apply_event(self, event: str, *args):
+        """Изменение данных, сделанное другим процессом бота: обновляем кэши и подписчиков"""
+        if event == "setting":
+            self._cache_setting(*args)
+        elif event == "admin":
+            self._cache_admin(*args)
+        elif event == "reload":
+            # Настройки перезагружены в другом процессе (/reload или SIGHUP)
+            try:
+                reload_settings()
+            except Exception as e:
+                logger.error(f"Не удалось перезагрузить настройки: {e}")
+        self._notify_listeners(event, *args)
+    
+    async def ping(self):
+        """Проверка базы: чтение и получение блокировки на запись (исключение при ошибке)"""
+        async with self.pool.reader() as db:
+            await db.execute("SELECT 1")
+        async with self.pool.writer() as db:
+            await db.execute("BEGIN IMMEDIATE")
     
     async def init_database(self):
         """Инициализация базы данных и создание таблиц"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             # Таблица пользователей
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -24,7 +117,7 @@ class Database:
                     last_name TEXT,
                     is_admin BOOLEAN DEFAULT FALSE,
                     registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    last_activity DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_activity INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
                     is_active BOOLEAN DEFAULT TRUE
                 )
             """)
@@ -101,15 +194,17 @@ class Database:
                 )
             """)
             
-            await db.commit()
-            logger.info("База данных SQLite инициализирована")
+            # Индексы и изменения схемы после версии 0
+            version = await apply_migrations(db)
+            
+            logger.info(f"База данных SQLite инициализирована (версия схемы {version})")
 
     # Методы для работы с пользователями
     
     async def user_exists(self, user_id: int) -> bool:
         """Проверка существования пользователя"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 cursor = await db.execute("""
                     SELECT 1 FROM users WHERE user_id = ?
                 """, (user_id,))
@@ -123,13 +218,25 @@ class Database:
                        first_name: str = None, last_name: str = None) -> bool:
         """Добавление нового пользователя"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            timestamp = int(time.time())
+            async with self.pool.writer() as db:
+                # Права администратора сохраняются, повторный /start снова делает пользователя активным.
+                # Новый пользователь создается без last_activity, чтобы сводка засчитала его за сегодня
                 await db.execute("""
-                    INSERT OR REPLACE INTO users 
+                    INSERT INTO users 
                     (user_id, username, first_name, last_name, last_activity)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (user_id, username, first_name, last_name, datetime.now()))
-                await db.commit()
+                    VALUES (?, ?, ?, ?, NULL)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        username = excluded.username,
+                        first_name = excluded.first_name,
+                        last_name = excluded.last_name,
+                        is_active = TRUE
+                """, (user_id, username, first_name, last_name))
+                # Сводка сравнивает с предыдущим last_activity, поэтому идет до его обновления
+                await record_activity(db, [(user_id, timestamp)])
+                await db.execute("""
+                    UPDATE users SET last_activity = ? WHERE user_id = ?
+                """, (timestamp, user_id))
                 logger.info(f"Пользователь {user_id} добавлен/обновлен")
                 return True
         except Exception as e:
@@ -137,125 +244,193 @@ class Database:
             return False
     
     async def update_user_activity(self, user_id: int):
-        """Обновление времени последней активности пользователя"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    UPDATE users SET last_activity = ? WHERE user_id = ?
-                """, (datetime.now(), user_id))
-                await db.commit()
-        except Exception as e:
-            logger.error(f"Ошибка при обновлении активности пользователя {user_id}: {e}")
+        """Обновление времени последней активности пользователя (отложенная запись)"""
+        self.write_buffer.add_activity(user_id)
     
-    async def is_admin(self, user_id: int) -> bool:
-        """Проверка, является ли пользователь администратором"""
+    async def load_admin_cache(self, static_admin_ids: Iterable[int] = ()):
+        """Загрузка списка администраторов в кэш"""
+        self._static_admin_ids = set(static_admin_ids)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 cursor = await db.execute("""
-                    SELECT is_admin FROM users WHERE user_id = ?
-                """, (user_id,))
-                result = await cursor.fetchone()
-                return result[0] if result else False
+                    SELECT user_id FROM users WHERE is_admin = TRUE
+                """)
+                self._admin_ids = {row[0] for row in await cursor.fetchall()}
         except Exception as e:
-            logger.error(f"Ошибка при проверке прав администратора {user_id}: {e}")
-            return False
+            logger.error(f"Ошибка при загрузке списка администраторов: {e}")
+    
+    def set_static_admin_ids(self, admin_ids: Iterable[int]):
+        """Обновление списка администраторов из ADMIN_IDS"""
+        self._static_admin_ids = set(admin_ids)
+    
+    async def is_admin(self, user_id: int) -> bool:
+        """Проверка, является ли пользователь администратором (через кэш)"""
+        if user_id in self._static_admin_ids:
+            return True
+        if self._admin_ids is None:
+            await self.load_admin_cache(self._static_admin_ids)
+        return user_id in (self._admin_ids or ())
+    
+    def _cache_admin(self, user_id: int, is_admin: bool):
+        if self._admin_ids is not None:
+            if is_admin:
+                self._admin_ids.add(user_id)
+            else:
+                self._admin_ids.discard(user_id)
     
     async def set_admin(self, user_id: int, is_admin: bool = True):
         """Установка прав администратора"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute("""
                     UPDATE users SET is_admin = ? WHERE user_id = ?
                 """, (is_admin, user_id))
-                await db.commit()
-                logger.info(f"Права администратора для {user_id} изменены на {is_admin}")
+            self._cache_admin(user_id, is_admin)
+            self._notify("admin", user_id, is_admin)
+            logger.info(f"Права администратора для {user_id} изменены на {is_admin}")
         except Exception as e:
             logger.error(f"Ошибка при изменении прав администратора {user_id}: {e}")
     
+    async def get_active_user_ids(self) -> List[int]:
+        """Получение ID всех активных пользователей"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT user_id FROM users WHERE is_active = TRUE
+                """)
+                return [row[0] for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Ошибка при получении списка активных пользователей: {e}")
+            return []
+    
     # Методы для работы со статистикой
     
     async def log_section_access(self, user_id: int, section_name: str):
-        """Логирование обращения к разделу"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT INTO section_stats (user_id, section_name)
-                    VALUES (?, ?)
-                """, (user_id, section_name))
-                await db.commit()
-        except Exception as e:
-            logger.error(f"Ошибка при логировании доступа к разделу: {e}")
+        """Логирование обращения к разделу (отложенная запись)"""
+        self.write_buffer.add_section_access(user_id, section_name)
     
     async def get_user_stats(self) -> Dict:
-        """Получение статистики пользователей"""
+        """Получение статистики пользователей (результат кэшируется на stats_cache_ttl секунд)"""
+        if self._stats_cache and self._stats_cache[1] > time.monotonic():
+            return dict(self._stats_cache[0])
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Общее количество пользователей
-                cursor = await db.execute("SELECT COUNT(*) FROM users")
-                total_users = (await cursor.fetchone())[0]
-                
-                # Активные пользователи за сегодня
-                today = datetime.now().date()
-                cursor = await db.execute("""
-                    SELECT COUNT(*) FROM users 
-                    WHERE DATE(last_activity) = ?
-                """, (today,))
-                active_today = (await cursor.fetchone())[0]
-                
-                # Активные пользователи за неделю
-                week_ago = datetime.now() - timedelta(days=7)
+            await self.write_buffer.flush()
+            now = int(time.time())
+            # "Сегодня" — день по UTC, как в дневной сводке daily_active_users
+            today_start = day_start(days_ago(0))
+            week_ago = now - 7 * 24 * 60 * 60
+            month_ago = now - 30 * 24 * 60 * 60
+            
+            async with self.pool.reader() as db:
+                # Один проход по индексу last_activity за последний месяц
                 cursor = await db.execute("""
-                    SELECT COUNT(*) FROM users 
+                    SELECT
+                        (SELECT COUNT(*) FROM users),
+                        COALESCE(SUM(last_activity >= ?), 0),
+                        COALESCE(SUM(last_activity >= ?), 0),
+                        COUNT(*)
+                    FROM users
                     WHERE last_activity >= ?
-                """, (week_ago,))
-                active_week = (await cursor.fetchone())[0]
+                """, (today_start, week_ago, month_ago))
+                total_users, active_today, active_week, active_month = await cursor.fetchone()
                 
-                # Активные пользователи за месяц
-                month_ago = datetime.now() - timedelta(days=30)
+                # Среднее число активных за день за неделю (из дневной сводки)
                 cursor = await db.execute("""
-                    SELECT COUNT(*) FROM users 
-                    WHERE last_activity >= ?
-                """, (month_ago,))
-                active_month = (await cursor.fetchone())[0]
-                
-                return {
-                    "total_users": total_users,
-                    "active_today": active_today,
-                    "active_week": active_week,
-                    "active_month": active_month
-                }
+                    SELECT COALESCE(SUM(active_users), 0) FROM daily_active_users
+                    WHERE day > ?
+                """, (days_ago(7),))
+                avg_daily_active = round((await cursor.fetchone())[0] / 7)
+            
+            stats = {
+                "total_users": total_users,
+                "active_today": active_today,
+                "active_week": active_week,
+                "active_month": active_month,
+                "avg_daily_active": avg_daily_active
+            }
+            self._stats_cache = (stats, time.monotonic() + self.stats_cache_ttl)
+            return dict(stats)
         except Exception as e:
             logger.error(f"Ошибка при получении статистики пользователей: {e}")
             return {}
     
-    async def get_popular_sections(self, limit: int = 5) -> List[Tuple[str, int]]:
-        """Получение популярных разделов"""
+    async def get_popular_sections(self, limit: int = 5, days: int = 30) -> List[Tuple[str, int]]:
+        """Получение популярных разделов за последние days дней (из дневной сводки)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            await self.write_buffer.flush()
+            async with self.pool.reader() as db:
                 cursor = await db.execute("""
-                    SELECT section_name, COUNT(*) as access_count
-                    FROM section_stats
-                    WHERE access_time >= ?
+                    SELECT section_name, SUM(access_count) as access_count
+                    FROM section_stats_daily
+                    WHERE day > ?
                     GROUP BY section_name
                     ORDER BY access_count DESC
                     LIMIT ?
-                """, (datetime.now() - timedelta(days=30), limit))
+                """, (days_ago(days), limit))
                 return await cursor.fetchall()
         except Exception as e:
             logger.error(f"Ошибка при получении популярных разделов: {e}")
             return []
     
+    async def prune_section_stats(self, retention_days: int) -> int:
+        """Удаление сырых событий section_stats старше retention_days дней.
+        
+        Их количество уже учтено в дневных сводках. Если после удаления
+        больше четверти файла базы пустует, файл сжимается VACUUM.
+        """
+        try:
+            await self.write_buffer.flush()
+            async with self.pool.writer() as db:
+                cursor = await db.execute(
+                    "DELETE FROM section_stats WHERE access_time < ?",
+                    (days_ago(retention_days),)
+                )
+                deleted = cursor.rowcount
+            
+            if deleted:
+                async with self.pool.writer() as db:
+                    page_count = (await (await db.execute("PRAGMA page_count")).fetchone())[0]
+                    free_pages = (await (await db.execute("PRAGMA freelist_count")).fetchone())[0]
+                    if page_count and free_pages * 4 > page_count:
+                        await db.execute("VACUUM")
+                        logger.info(f"База данных сжата: освобождено {free_pages} страниц")
+            
+            logger.info(f"Удалено {deleted} событий section_stats старше {retention_days} дней")
+            return deleted
+        except Exception as e:
+            logger.error(f"Ошибка при очистке section_stats: {e}")
+            return 0
+    
+    async def iter_table_rows(self, table: str, chunk_size: int = 1000
+                              ) -> AsyncIterator[Tuple[List[str], List[tuple]]]:
+        """Чтение таблицы порциями по chunk_size строк: (названия колонок, строки).
+        
+        В памяти одновременно находится не больше одной порции.
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Таблица {table} недоступна для выгрузки")
+        await self.write_buffer.flush()
+        async with self.pool.reader() as db:
+            async with db.execute(f"SELECT * FROM {table}") as cursor:
+                columns = [column[0] for column in cursor.description]
+                # Первая порция отдается даже пустой, чтобы записать заголовки
+                rows = await cursor.fetchmany(chunk_size)
+                yield columns, rows
+                while rows:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if rows:
+                        yield columns, rows
+    
     # Методы для работы с обратной связью
     
     async def add_feedback(self, user_id: int, feedback_type: str, message: str) -> int:
         """Добавление обратной связи"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 cursor = await db.execute("""
                     INSERT INTO feedback (user_id, feedback_type, message)
                     VALUES (?, ?, ?)
                 """, (user_id, feedback_type, message))
-                await db.commit()
                 return cursor.lastrowid
         except Exception as e:
             logger.error(f"Ошибка при добавлении обратной связи: {e}")
@@ -264,7 +439,7 @@ class Database:
     async def get_feedback_stats(self) -> Dict:
         """Получение статистики обратной связи"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 # Новые сообщения (непрочитанные)
                 cursor = await db.execute("""
                     SELECT COUNT(*) FROM feedback WHERE is_read = FALSE
@@ -283,48 +458,345 @@ class Database:
             logger.error(f"Ошибка при получении статистики обратной связи: {e}")
             return {}
     
-    async def get_unread_feedback(self) -> List[Dict]:
-        """Получение непрочитанной обратной связи"""
+    async def get_feedback_page(self, feedback_type: Optional[str] = None,
+                                cursor_id: Optional[int] = None, older: bool = True,
+                                limit: int = 5) -> Tuple[List[Dict], bool, bool]:
+        """Страница непрочитанной обратной связи, от новых к старым.
+        
+        Пагинация по ключу (created_at, id): cursor_id — крайнее сообщение
+        предыдущей страницы, older — направление (к более старым или новым).
+        Возвращает (сообщения, есть более новые, есть более старые).
+        """
+        conditions = ["f.is_read = FALSE"]
+        params: list = []
+        if feedback_type:
+            conditions.append("f.feedback_type = ?")
+            params.append(feedback_type)
+        if cursor_id:
+            conditions.append(
+                f"(f.created_at, f.id) {'<' if older else '>'} "
+                "(SELECT created_at, id FROM feedback WHERE id = ?)"
+            )
+            params.append(cursor_id)
+        order = "DESC" if older else "ASC"
+        
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
+            async with self.pool.reader() as db:
+                # Лишняя строка показывает, есть ли следующая страница
+                cursor = await db.execute(f"""
                     SELECT f.id, f.user_id, f.feedback_type, f.message, 
                            f.created_at, u.username, u.first_name, u.last_name
                     FROM feedback f
                     LEFT JOIN users u ON f.user_id = u.user_id
-                    WHERE f.is_read = FALSE
-                    ORDER BY f.created_at DESC
-                """)
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY f.created_at {order}, f.id {order}
+                    LIMIT ?
+                """, (*params, limit + 1))
                 rows = await cursor.fetchall()
-                
-                return [
-                    {
-                        "id": row[0],
-                        "user_id": row[1],
-                        "feedback_type": row[2],
-                        "message": row[3],
-                        "created_at": row[4],
-                        "username": row[5],
-                        "first_name": row[6],
-                        "last_name": row[7]
-                    }
-                    for row in rows
-                ]
         except Exception as e:
-            logger.error(f"Ошибка при получении непрочитанной обратной связи: {e}")
+            logger.error(f"Ошибка при получении обратной связи: {e}")
+            return [], False, False
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not older:
+            rows.reverse()
+        items = [
+            {
+                "id": row[0],
+                "user_id": row[1],
+                "feedback_type": row[2],
+                "message": row[3],
+                "created_at": row[4],
+                "username": row[5],
+                "first_name": row[6],
+                "last_name": row[7]
+            }
+            for row in rows
+        ]
+        if older:
+            return items, bool(cursor_id), has_more
+        return items, has_more, True
+    
+    async def count_unread_feedback(self, feedback_type: Optional[str] = None) -> int:
+        """Количество непрочитанных сообщений обратной связи"""
+        try:
+            async with self.pool.reader() as db:
+                if feedback_type:
+                    cursor = await db.execute("""
+                        SELECT COUNT(*) FROM feedback
+                        WHERE is_read = FALSE AND feedback_type = ?
+                    """, (feedback_type,))
+                else:
+                    cursor = await db.execute("SELECT COUNT(*) FROM feedback WHERE is_read = FALSE")
+                return (await cursor.fetchone())[0]
+        except Exception as e:
+            logger.error(f"Ошибка при подсчете обратной связи: {e}")
+            return 0
+    
+    async def mark_feedback_read(self, newest_id: int, oldest_id: int,
+                                 feedback_type: Optional[str] = None) -> int:
+        """Отметка прочитанными непрочитанных сообщений между двумя сообщениями страницы
+        (включительно); возвращает количество отмеченных"""
+        conditions = [
+            "is_read = FALSE",
+            "(created_at, id) <= (SELECT created_at, id FROM feedback WHERE id = ?)",
+            "(created_at, id) >= (SELECT created_at, id FROM feedback WHERE id = ?)"
+        ]
+        params: list = [newest_id, oldest_id]
+        if feedback_type:
+            conditions.append("feedback_type = ?")
+            params.append(feedback_type)
+        
+        try:
+            async with self.pool.writer() as db:
+                cursor = await db.execute(
+                    f"UPDATE feedback SET is_read = TRUE WHERE {' AND '.join(conditions)}",
+                    params
+                )
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Ошибка при отметке обратной связи прочитанной: {e}")
+            return 0
+    
+    async def save_feedback_notifications(self, feedback_id: int,
+                                          messages: Iterable[Tuple[int, int]]) -> bool:
+        """Запоминание уведомлений администраторам: (chat_id, message_id) -> feedback_id"""
+        try:
+            async with self.pool.writer() as db:
+                await db.executemany("""
+                    INSERT OR REPLACE INTO feedback_notifications (chat_id, message_id, feedback_id)
+                    VALUES (?, ?, ?)
+                """, [(chat_id, message_id, feedback_id) for chat_id, message_id in messages])
+                return True
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении уведомлений об обратной связи {feedback_id}: {e}")
+            return False
+    
+    async def get_feedback_by_notification(self, chat_id: int, message_id: int) -> Optional[Dict]:
+        """Обратная связь, о которой было уведомление chat_id/message_id"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT f.id, f.user_id, f.feedback_type, f.message, f.admin_response
+                    FROM feedback_notifications n
+                    JOIN feedback f ON f.id = n.feedback_id
+                    WHERE n.chat_id = ? AND n.message_id = ?
+                """, (chat_id, message_id))
+                row = await cursor.fetchone()
+                if not row:
+                    return None
+                return {
+                    "id": row[0],
+                    "user_id": row[1],
+                    "feedback_type": row[2],
+                    "message": row[3],
+                    "admin_response": row[4]
+                }
+        except Exception as e:
+            logger.error(f"Ошибка при поиске обратной связи по уведомлению: {e}")
+            return None
+    
+    async def save_feedback_response(self, feedback_id: int, admin_id: int, response: str) -> bool:
+        """Сохранение ответа администратора; сообщение одновременно становится прочитанным"""
+        try:
+            async with self.pool.writer() as db:
+                await db.execute("""
+                    UPDATE feedback
+                    SET admin_response = ?, is_read = TRUE,
+                        responded_by = ?, responded_at = ?
+                    WHERE id = ?
+                """, (response, admin_id, datetime.now(), feedback_id))
+                return True
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении ответа на обратную связь {feedback_id}: {e}")
+            return False
+    
+    # Методы для работы с рассылками
+    
+    async def create_broadcast_job(self, admin_id: int, payload: Dict,
+                                   chat_id: int, message_id: int) -> int:
+        """Создание задания рассылки со списком получателей"""
+        try:
+            async with self.pool.writer() as db:
+                cursor = await db.execute("""
+                    INSERT INTO broadcasts 
+                    (admin_id, message, status, payload, progress_chat_id, progress_message_id)
+                    VALUES (?, ?, 'running', ?, ?, ?)
+                """, (
+                    admin_id,
+                    payload.get("text") or "Медиа-сообщение",
+                    json.dumps(payload, ensure_ascii=False),
+                    chat_id,
+                    message_id
+                ))
+                broadcast_id = cursor.lastrowid
+                await db.execute("""
+                    INSERT INTO broadcast_recipients (broadcast_id, user_id)
+                    SELECT ?, user_id FROM users WHERE is_active = TRUE
+                """, (broadcast_id,))
+                return broadcast_id
+        except Exception as e:
+            logger.error(f"Ошибка при создании рассылки: {e}")
+            return 0
+    
+    def _broadcast_from_row(self, row) -> Dict:
+        return {
+            "id": row[0],
+            "admin_id": row[1],
+            "status": row[2],
+            "payload": json.loads(row[3]) if row[3] else {},
+            "chat_id": row[4],
+            "message_id": row[5]
+        }
+    
+    async def get_broadcast_job(self, broadcast_id: int) -> Optional[Dict]:
+        """Получение задания рассылки"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT id, admin_id, status, payload, progress_chat_id, progress_message_id
+                    FROM broadcasts WHERE id = ?
+                """, (broadcast_id,))
+                row = await cursor.fetchone()
+                return self._broadcast_from_row(row) if row else None
+        except Exception as e:
+            logger.error(f"Ошибка при получении рассылки {broadcast_id}: {e}")
+            return None
+    
+    async def get_unfinished_broadcasts(self) -> List[Dict]:
+        """Получение незавершенных рассылок (для возобновления после перезапуска)"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT id, admin_id, status, payload, progress_chat_id, progress_message_id
+                    FROM broadcasts WHERE status = 'running'
+                    ORDER BY id
+                """)
+                return [self._broadcast_from_row(row) for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Ошибка при получении незавершенных рассылок: {e}")
+            return []
+    
+    async def get_pending_recipients(self, broadcast_id: int, limit: int = 500) -> List[int]:
+        """Получение следующей порции получателей, которым рассылка еще не доставлена"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT user_id FROM broadcast_recipients
+                    WHERE broadcast_id = ? AND status = 'pending'
+                    ORDER BY user_id
+                    LIMIT ?
+                """, (broadcast_id, limit))
+                return [row[0] for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Ошибка при получении получателей рассылки {broadcast_id}: {e}")
             return []
     
+    async def get_broadcast_counts(self, broadcast_id: int) -> Dict[str, int]:
+        """Количество получателей рассылки по статусам доставки"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT status, COUNT(*) FROM broadcast_recipients
+                    WHERE broadcast_id = ?
+                    GROUP BY status
+                """, (broadcast_id,))
+                return {status: count for status, count in await cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Ошибка при получении прогресса рассылки {broadcast_id}: {e}")
+            return {}
+    
+    async def save_broadcast_results(self, broadcast_id: int,
+                                     results: List[Tuple[int, str]]) -> bool:
+        """Сохранение результатов доставки; заблокировавшие бота отмечаются неактивными"""
+        if not results:
+            return True
+        now = datetime.now()
+        blocked = [(user_id,) for user_id, status in results if status == "blocked"]
+        try:
+            async with self.pool.writer() as db:
+                await db.executemany("""
+                    UPDATE broadcast_recipients SET status = ?, updated_at = ?
+                    WHERE broadcast_id = ? AND user_id = ?
+                """, [(status, now, broadcast_id, user_id) for user_id, status in results])
+                if blocked:
+                    await db.executemany("""
+                        UPDATE users SET is_active = FALSE WHERE user_id = ?
+                    """, blocked)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении результатов рассылки {broadcast_id}: {e}")
+            return False
+    
+    async def set_broadcast_status(self, broadcast_id: int, status: str):
+        """Изменение статуса рассылки; для завершенных сохраняются итоги"""
+        try:
+            async with self.pool.writer() as db:
+                if status in ("completed", "cancelled"):
+                    await db.execute("""
+                        UPDATE broadcasts SET
+                            status = ?,
+                            sent_count = (SELECT COUNT(*) FROM broadcast_recipients
+                                          WHERE broadcast_id = ? AND status = 'sent'),
+                            failed_count = (SELECT COUNT(*) FROM broadcast_recipients
+                                            WHERE broadcast_id = ? AND status IN ('failed', 'blocked')),
+                            completed_at = ?
+                        WHERE id = ?
+                    """, (status, broadcast_id, broadcast_id, datetime.now(), broadcast_id))
+                else:
+                    await db.execute("""
+                        UPDATE broadcasts SET status = ? WHERE id = ?
+                    """, (status, broadcast_id))
+        except Exception as e:
+            logger.error(f"Ошибка при изменении статуса рассылки {broadcast_id}: {e}")
+    
     # Методы для работы с настройками
     
+    def _cache_setting(self, key: str, value: Optional[str]):
+        self._settings_cache[key] = (value, time.monotonic() + self.settings_cache_ttl)
+    
+    async def load_settings_cache(self):
+        """Предзагрузка всех настроек в кэш"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("SELECT key, value FROM bot_settings")
+                rows = await cursor.fetchall()
+            self._settings_cache.clear()
+            for key, value in rows:
+                self._cache_setting(key, value)
+            logger.info(f"Загружено настроек в кэш: {len(rows)}")
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке настроек в кэш: {e}")
+    
+    async def get_settings_by_prefix(self, prefix: str) -> Dict[str, str]:
+        """Получение всех настроек, ключ которых начинается с prefix"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT key, value FROM bot_settings WHERE substr(key, 1, ?) = ?
+                """, (len(prefix), prefix))
+                return {key: value for key, value in await cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Ошибка при получении настроек {prefix}*: {e}")
+            return {}
+    
     async def get_setting(self, key: str) -> Optional[str]:
-        """Получение настройки по ключу"""
+        """Получение настройки по ключу (через кэш)"""
+        cached = self._settings_cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 cursor = await db.execute("""
                     SELECT value FROM bot_settings WHERE key = ?
                 """, (key,))
                 result = await cursor.fetchone()
-                return result[0] if result else None
+                value = result[0] if result else None
+            # Отсутствующие ключи тоже кэшируются, чтобы не ходить за ними в базу
+            self._cache_setting(key, value)
+            return value
         except Exception as e:
             logger.error(f"Ошибка при получении настройки {key}: {e}")
             return None
@@ -332,36 +804,89 @@ class Database:
     async def set_setting(self, key: str, value: str):
         """Установка настройки"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute("""
                     INSERT OR REPLACE INTO bot_settings (key, value, updated_at)
                     VALUES (?, ?, ?)
                 """, (key, value, datetime.now()))
-                await db.commit()
+            self._cache_setting(key, value)
+            self._notify("setting", key, value)
         except Exception as e:
+            # Значение в базе неизвестно, поэтому сбрасываем его из кэша
+            self._settings_cache.pop(key, None)
             logger.error(f"Ошибка при установке настройки {key}: {e}")
     
     # Методы для работы с видео
     
     async def add_video(self, category: str, title: str, description: str, 
-                       file_id: str, file_path: str = None) -> int:
-        """Добавление видео"""
+                       file_id: Optional[str], file_path: str = None,
+                       content_hash: str = None) -> int:
+        """Добавление видео (file_id может появиться позже, после загрузки файла в Telegram)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 cursor = await db.execute("""
-                    INSERT INTO videos (category, title, description, file_id, file_path)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (category, title, description, file_id, file_path))
-                await db.commit()
-                return cursor.lastrowid
+                    INSERT INTO videos (category, title, description, file_id, file_path, content_hash)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (category, title, description, file_id, file_path, content_hash))
+                video_id = cursor.lastrowid
+            self._notify("videos", category)
+            return video_id
         except Exception as e:
             logger.error(f"Ошибка при добавлении видео: {e}")
             return 0
     
+    async def get_video_by_hash(self, content_hash: str) -> Optional[Dict]:
+        """Видео, загруженное из локального файла с таким содержимым"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT id, category, title, file_id, file_path
+                    FROM videos WHERE content_hash = ?
+                """, (content_hash,))
+                row = await cursor.fetchone()
+                if not row:
+                    return None
+                return {
+                    "id": row[0],
+                    "category": row[1],
+                    "title": row[2],
+                    "file_id": row[3],
+                    "file_path": row[4]
+                }
+        except Exception as e:
+            logger.error(f"Ошибка при поиске видео по хэшу: {e}")
+            return None
+    
+    async def set_video_file_id(self, video_id: int, category: str, file_id: str) -> bool:
+        """Сохранение file_id после загрузки файла в Telegram"""
+        try:
+            async with self.pool.writer() as db:
+                await db.execute(
+                    "UPDATE videos SET file_id = ? WHERE id = ?",
+                    (file_id, video_id)
+                )
+            self._notify("videos", category)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении file_id видео {video_id}: {e}")
+            return False
+    
+    async def count_videos(self, category: str) -> int:
+        """Количество активных видео категории"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT COUNT(*) FROM videos WHERE category = ? AND is_active = TRUE
+                """, (category,))
+                return (await cursor.fetchone())[0]
+        except Exception as e:
+            logger.error(f"Ошибка при подсчете видео категории {category}: {e}")
+            return 0
+    
     async def get_videos_by_category(self, category: str) -> List[Dict]:
         """Получение видео по категории"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 cursor = await db.execute("""
                     SELECT id, title, description, file_id, file_path
                     FROM videos
@@ -389,20 +914,32 @@ class Database:
     async def set_floor_chat(self, floor_number: int, chat_link: str, chat_title: str = None):
         """Установка ссылки на чат этажа"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute("""
                     INSERT OR REPLACE INTO floor_chats 
                     (floor_number, chat_link, chat_title, updated_at)
                     VALUES (?, ?, ?, ?)
                 """, (floor_number, chat_link, chat_title, datetime.now()))
-                await db.commit()
+            self._notify("floor_chat", floor_number, chat_link)
         except Exception as e:
             logger.error(f"Ошибка при установке чата этажа {floor_number}: {e}")
     
+    async def get_floor_chats(self) -> Dict[int, str]:
+        """Получение всех ссылок на чаты этажей"""
+        try:
+            async with self.pool.reader() as db:
+                cursor = await db.execute("""
+                    SELECT floor_number, chat_link FROM floor_chats
+                """)
+                return {floor_number: chat_link for floor_number, chat_link in await cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Ошибка при получении чатов этажей: {e}")
+            return {}
+    
     async def get_floor_chat(self, floor_number: int) -> Optional[Dict]:
         """Получение ссылки на чат этажа"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 cursor = await db.execute("""
                     SELECT chat_link, chat_title FROM floor_chats 
                     WHERE floor_number = ?
@@ -419,12 +956,34 @@ class Database:
             logger.error(f"Ошибка при получении чата этажа {floor_number}: {e}")
             return None
 
+# Время каждого публичного метода попадает в /metrics
+instrument_methods(Database, DB_METHOD_DURATION)
+
 # Глобальный экземпляр базы данных
-db = Database(get_settings().database_path)
+_settings = get_settings()
+db = Database(
+    _settings.database_path,
+    readers=_settings.db_readers,
+    write_buffer_size=_settings.write_buffer_size,
+    write_buffer_interval=_settings.write_buffer_interval,
+    settings_cache_ttl=_settings.settings_cache_ttl,
+    stats_cache_ttl=_settings.stats_cache_ttl
+)
+
+@on_settings_change
+def _update_admin_ids(settings: Settings):
+    db.set_static_admin_ids(settings.admin_ids)
 
 async def init_db():
     """Инициализация базы данных"""
+    await db.connect()
     await db.init_database()
+    await db.load_settings_cache()
+    await db.load_admin_cache(get_settings().admin_ids)
+
+async def close_db():
+    """Закрытие соединений с базой данных"""
+    await db.close()
 
 # Функции-обертки для удобства
 async def add_user(user_id: int, username: str = None, 
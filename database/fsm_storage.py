@@ -0,0 +1,220 @@
+"""
+Хранилище состояний FSM в базе бота
+
+Состояния и данные диалогов (обратная связь, черновик рассылки, загрузка видео)
+хранятся в таблице fsm_states и переживают перезапуск. Перед базой стоит
+LRU-кэш: чтение состояния обычно не обращается к базе, в том числе для
+пользователей без состояния. Изменения попадают в кэш сразу, а в базу
+записываются пачкой раз в flush_interval секунд одной транзакцией.
+Состояния, не менявшиеся дольше ttl, считаются пустыми и периодически удаляются.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from loguru import logger
+
+from database.pool import ConnectionPool
+
+# Период удаления устаревших состояний из базы, секунды
+PRUNE_INTERVAL = 60 * 60
+
+# Запись кэша: (состояние, данные, время изменения в секундах epoch)
+Entry = Tuple[Optional[str], Dict[str, Any], int]
+
+_EMPTY: Entry = (None, {}, 0)
+
+
+def storage_key(key: StorageKey) -> str:
+    return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+
+class SQLiteStorage(BaseStorage):
+    """Хранилище FSM в SQLite с LRU-кэшем и отложенной пакетной записью"""
+
+    def __init__(self, pool: ConnectionPool, ttl: int = 7 * 24 * 60 * 60,
+                 cache_size: int = 1000, flush_interval: float = 1.0):
+        self.pool = pool
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self._cache: "OrderedDict[str, Entry]" = OrderedDict()
+        # Ключи, измененные после последней записи в базу
+        self._dirty: Set[str] = set()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._last_prune = 0.0
+
+    def _expired(self, updated_at: int) -> bool:
+        return bool(self.ttl) and updated_at < time.time() - self.ttl
+
+    def _remember(self, key: str, entry: Entry):
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._evict()
+
+    def _evict(self):
+        """Вытеснение давно не использованных записей; несохраненные остаются до записи"""
+        for key in list(self._cache):
+            if len(self._cache) <= self.cache_size:
+                break
+            if key not in self._dirty:
+                del self._cache[key]
+
+    async def _load(self, key: StorageKey) -> Entry:
+        cache_key = storage_key(key)
+        entry = self._cache.get(cache_key)
+        if entry is not None:
+            self._cache.move_to_end(cache_key)
+        else:
+            entry = _EMPTY
+            try:
+                async with self.pool.reader() as db:
+                    cursor = await db.execute("""
+                        SELECT state, data, updated_at FROM fsm_states WHERE key = ?
+                    """, (cache_key,))
+                    row = await cursor.fetchone()
+                if row:
+                    entry = (row[0], json.loads(row[1]) if row[1] else {}, row[2])
+            except Exception as e:
+                logger.error(f"Ошибка при чтении состояния FSM {cache_key}: {e}")
+            # Отсутствие состояния тоже кэшируется
+            self._remember(cache_key, entry)
+
+        if entry[2] and self._expired(entry[2]):
+            return _EMPTY
+        return entry
+
+    def _store(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]):
+        cache_key = storage_key(key)
+        # Ключ помечается до вытеснения, иначе новая запись может вытеснить саму себя
+        self._dirty.add(cache_key)
+        self._remember(cache_key, (state, data, int(time.time())))
+        self._start()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        _, data, _ = await self._load(key)
+        self._store(key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._load(key))[0]
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        state, _, _ = await self._load(key)
+        self._store(key, state, data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._load(key))[1].copy()
+
+    async def flush(self):
+        """Запись измененных состояний одной транзакцией"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+
+            dirty, self._dirty = self._dirty, set()
+            upserts, deletes = [], []
+            for cache_key in list(dirty):
+                state, data, updated_at = self._cache.get(cache_key, _EMPTY)
+                if state is None and not data:
+                    deletes.append((cache_key,))
+                    continue
+                try:
+                    upserts.append((cache_key, state, json.dumps(data, ensure_ascii=False), updated_at))
+                except (TypeError, ValueError) as e:
+                    # Такие данные не сохранить; состояние остается только в кэше
+                    logger.error(f"Не удалось сохранить данные FSM {cache_key}: {e}")
+                    dirty.discard(cache_key)
+
+            try:
+                async with self.pool.writer() as db:
+                    if upserts:
+                        await db.executemany("""
+                            INSERT INTO fsm_states (key, state, data, updated_at)
+                            VALUES (?, ?, ?, ?)
+                            ON CONFLICT(key) DO UPDATE SET
+                                state = excluded.state,
+                                data = excluded.data,
+                                updated_at = excluded.updated_at
+                        """, upserts)
+                    if deletes:
+                        await db.executemany("DELETE FROM fsm_states WHERE key = ?", deletes)
+            except Exception as e:
+                logger.error(f"Ошибка при записи состояний FSM: {e}")
+                # Ключи снова будут записаны при следующей попытке
+                self._dirty |= dirty
+                return
+
+            # Записанные состояния теперь можно вытеснять
+            if len(self._cache) > self.cache_size:
+                self._evict()
+
+    async def prune(self) -> int:
+        """Удаление состояний, не менявшихся дольше ttl"""
+        if not self.ttl:
+            return 0
+        try:
+            async with self.pool.writer() as db:
+                cursor = await db.execute("""
+                    DELETE FROM fsm_states WHERE updated_at < ?
+                """, (int(time.time()) - self.ttl,))
+                deleted = cursor.rowcount
+        except Exception as e:
+            logger.error(f"Ошибка при удалении устаревших состояний FSM: {e}")
+            return 0
+        if deleted:
+            logger.info(f"Удалено устаревших состояний FSM: {deleted}")
+        return deleted
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            if time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+                self._last_prune = time.monotonic()
+                await self.prune()
+
+    def _start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Остановка таймера и запись оставшихся изменений (повторный вызов безопасен)"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+def create_fsm_storage(backend: str, pool: ConnectionPool, ttl: int = 0,
+                       cache_size: int = 1000, flush_interval: float = 1.0,
+                       redis_url: str = "") -> BaseStorage:
+    """Хранилище FSM по имени: "sqlite", "redis" или "memory"."""
+    if backend == "memory":
+        return MemoryStorage()
+
+    if backend == "redis":
+        try:
+            # Пакет redis нужен только для этого варианта
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError:
+            logger.error("Для FSM_STORAGE=redis нужен пакет redis, используется SQLite")
+        else:
+            if not redis_url:
+                raise ValueError("Для FSM_STORAGE=redis нужен REDIS_URL")
+            return RedisStorage.from_url(
+                redis_url,
+                state_ttl=ttl or None,
+                data_ttl=ttl or None
+            )
+    elif backend != "sqlite":
+        logger.warning(f"Неизвестное хранилище FSM {backend!r}, используется SQLite")
+
+    return SQLiteStorage(pool, ttl=ttl, cache_size=cache_size, flush_interval=flush_interval)
@@ -0,0 +1,203 @@
+"""
+Миграции схемы базы данных
+
+Версия схемы хранится в PRAGMA user_version. Каждая миграция выполняется
+один раз в отдельной транзакции; новые миграции добавляются в конец MIGRATIONS
+со следующим номером. Базовые таблицы (версия 0) создает Database.init_database.
+"""
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import aiosqlite
+from loguru import logger
+
+
+async def _ensure_columns(db: aiosqlite.Connection, table: str, columns: Dict[str, str]):
+    """Добавление недостающих колонок в существующую таблицу"""
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in await cursor.fetchall()}
+    for name, definition in columns.items():
+        if name not in existing:
+            await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+async def _broadcast_jobs(db: aiosqlite.Connection):
+    # Колонки могли появиться раньше, до введения миграций
+    await _ensure_columns(db, "broadcasts", {
+        "status": "TEXT DEFAULT 'completed'",
+        "payload": "TEXT",
+        "progress_chat_id": "INTEGER",
+        "progress_message_id": "INTEGER"
+    })
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            broadcast_id INTEGER,
+            user_id INTEGER,
+            status TEXT DEFAULT 'pending',
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (broadcast_id, user_id),
+            FOREIGN KEY (broadcast_id) REFERENCES broadcasts (id)
+        ) WITHOUT ROWID
+    """)
+
+
+async def _indexes(db: aiosqlite.Connection):
+    # Популярные разделы за период (get_popular_sections)
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_section_stats_time_section
+        ON section_stats (access_time, section_name)
+    """)
+    # Активные пользователи за период (get_user_stats)
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_users_last_activity
+        ON users (last_activity)
+    """)
+    # Непрочитанная обратная связь: частичный индекс только по непрочитанным
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_feedback_unread
+        ON feedback (created_at) WHERE is_read = FALSE
+    """)
+    # Видео категории (get_videos_by_category)
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_videos_category
+        ON videos (category, is_active, added_at)
+    """)
+    # Следующая порция получателей рассылки
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_broadcast_recipients_status
+        ON broadcast_recipients (broadcast_id, status, user_id)
+    """)
+
+
+async def _epoch_last_activity(db: aiosqlite.Connection):
+    # Раньше время записывалось строкой локального времени (datetime.now()),
+    # теперь — целым числом секунд Unix epoch
+    await db.execute("""
+        UPDATE users
+        SET last_activity = CAST(strftime('%s', last_activity, 'utc') AS INTEGER)
+        WHERE typeof(last_activity) = 'text'
+    """)
+
+
+async def _daily_rollups(db: aiosqlite.Connection):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS section_stats_daily (
+            day TEXT,
+            section_name TEXT,
+            access_count INTEGER DEFAULT 0,
+            PRIMARY KEY (day, section_name)
+        ) WITHOUT ROWID
+    """)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS daily_active_users (
+            day TEXT PRIMARY KEY,
+            active_users INTEGER DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    # Сводки по уже накопленным событиям; активность за прошлые дни
+    # восстанавливается только по обращениям к разделам
+    await db.execute("""
+        INSERT OR IGNORE INTO section_stats_daily (day, section_name, access_count)
+        SELECT DATE(access_time), section_name, COUNT(*)
+        FROM section_stats
+        GROUP BY DATE(access_time), section_name
+    """)
+    await db.execute("""
+        INSERT OR IGNORE INTO daily_active_users (day, active_users)
+        SELECT DATE(access_time), COUNT(DISTINCT user_id)
+        FROM section_stats
+        GROUP BY DATE(access_time)
+    """)
+
+
+async def _feedback_inbox_index(db: aiosqlite.Connection):
+    # Страницы непрочитанной обратной связи с фильтром по типу
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_feedback_type_unread
+        ON feedback (feedback_type, created_at) WHERE is_read = FALSE
+    """)
+
+
+async def _feedback_notifications(db: aiosqlite.Connection):
+    # Уведомления администраторам о обратной связи: ответ на уведомление
+    # находит исходное сообщение пользователя
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_notifications (
+            chat_id INTEGER,
+            message_id INTEGER,
+            feedback_id INTEGER,
+            PRIMARY KEY (chat_id, message_id),
+            FOREIGN KEY (feedback_id) REFERENCES feedback (id)
+        ) WITHOUT ROWID
+    """)
+    await _ensure_columns(db, "feedback", {
+        "responded_by": "INTEGER",
+        "responded_at": "DATETIME"
+    })
+
+
+async def _video_content_hash(db: aiosqlite.Connection):
+    # Хэш содержимого локального файла: один и тот же файл загружается в Telegram один раз
+    await _ensure_columns(db, "videos", {"content_hash": "TEXT"})
+    await db.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_videos_content_hash
+        ON videos (content_hash) WHERE content_hash IS NOT NULL
+    """)
+
+
+async def _fsm_states(db: aiosqlite.Connection):
+    # Состояния FSM переживают перезапуск бота; ключ собирается из StorageKey
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS fsm_states (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT,
+            updated_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_fsm_states_updated ON fsm_states (updated_at)
+    """)
+
+
+# (версия, описание, функция миграции)
+MIGRATIONS: List[Tuple[int, str, Callable[[aiosqlite.Connection], Awaitable[None]]]] = [
+    (1, "задания рассылок", _broadcast_jobs),
+    (2, "индексы для статистики, обратной связи и видео", _indexes),
+    (3, "время активности пользователей в секундах epoch", _epoch_last_activity),
+    (4, "дневные сводки статистики разделов и активности", _daily_rollups),
+    (5, "индекс обратной связи по типу", _feedback_inbox_index),
+    (6, "ответы администраторов на обратную связь", _feedback_notifications),
+    (7, "хэш содержимого видео из локальных файлов", _video_content_hash),
+    (8, "хранилище состояний FSM", _fsm_states),
+]
+
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    cursor = await db.execute("PRAGMA user_version")
+    return (await cursor.fetchone())[0]
+
+
+async def apply_migrations(db: aiosqlite.Connection) -> int:
+    """Применение недостающих миграций; возвращает итоговую версию схемы"""
+    version = await get_schema_version(db)
+
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+
+        if db.in_transaction:
+            await db.commit()
+        await db.execute("BEGIN")
+        try:
+            await migrate(db)
+            await db.execute(f"PRAGMA user_version = {number}")
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.error(f"Ошибка миграции базы данных {number} ({description})")
+            raise
+
+        version = number
+        logger.info(f"Применена миграция базы данных {number}: {description}")
+
+    return version
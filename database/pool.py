@@ -0,0 +1,106 @@
+"""
+Пул соединений SQLite: одно соединение на запись и несколько на чтение
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+import aiosqlite
+from loguru import logger
+
+# Настройки соединения: WAL позволяет читать параллельно с записью,
+# synchronous=NORMAL в режиме WAL безопасен и убирает fsync на каждый commit
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",
+)
+
+
+class ConnectionPool:
+    """Долгоживущие соединения с базой данных"""
+
+    def __init__(self, db_path: str, readers: int = 3):
+        self.db_path = db_path
+        self.readers = max(1, readers)
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._reader_connections: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def _connect(self, writer: bool = False) -> aiosqlite.Connection:
+        # Запись сразу берет блокировку (BEGIN IMMEDIATE): при нескольких процессах
+        # бота ожидание идет через busy_timeout, а не ошибкой посреди транзакции
+        conn = await aiosqlite.connect(
+            self.db_path,
+            isolation_level="IMMEDIATE" if writer else ""
+        )
+        for pragma in PRAGMAS:
+            await conn.execute(pragma)
+        return conn
+
+    async def open(self):
+        """Открытие соединений (повторный вызов ничего не делает)"""
+        async with self._open_lock:
+            if self._writer is not None:
+                return
+
+            self._writer = await self._connect(writer=True)
+            self._idle_readers = asyncio.Queue()
+            for _ in range(self.readers):
+                conn = await self._connect()
+                self._reader_connections.append(conn)
+                self._idle_readers.put_nowait(conn)
+
+            logger.info(f"Пул соединений SQLite открыт: 1 запись, {self.readers} чтение")
+
+    async def close(self):
+        """Закрытие всех соединений"""
+        async with self._open_lock:
+            if self._writer is None:
+                return
+
+            async with self._write_lock:
+                for conn in self._reader_connections:
+                    await conn.close()
+                await self._writer.close()
+
+            self._writer = None
+            self._reader_connections = []
+            self._idle_readers = None
+            logger.info("Пул соединений SQLite закрыт")
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Соединение для чтения из пула"""
+        if self._writer is None:
+            await self.open()
+
+        idle_readers = self._idle_readers
+        conn = await idle_readers.get()
+        try:
+            yield conn
+        finally:
+            idle_readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Единственное соединение для записи; commit выполняется при выходе из блока"""
+        if self._writer is None:
+            await self.open()
+
+        async with self._write_lock:
+            conn = self._writer
+            try:
+                yield conn
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
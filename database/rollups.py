@@ -0,0 +1,70 @@
+"""
+Дневные сводки статистики
+
+section_stats_daily — обращения к разделам по дням, daily_active_users —
+число активных пользователей по дням. Сводки обновляются в той же транзакции,
+что и запись событий, поэтому аналитика не пересчитывает сырые события,
+а старые строки section_stats можно удалять без потери статистики.
+День — дата по UTC в формате YYYY-MM-DD, как DATE() от access_time
+(access_time хранится в UTC, как и CURRENT_TIMESTAMP в SQLite).
+"""
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Tuple
+
+import aiosqlite
+
+
+def utc_now() -> datetime:
+    """Текущее время UTC без часового пояса (как CURRENT_TIMESTAMP в SQLite)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def day_key(timestamp: float) -> str:
+    """Дата по UTC момента времени epoch"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+
+
+def day_start(day: str) -> int:
+    """Начало дня по UTC в секундах epoch"""
+    return int(datetime.combine(date.fromisoformat(day), time.min, tzinfo=timezone.utc).timestamp())
+
+
+def days_ago(days: int) -> str:
+    """Дата по UTC, отстоящая от сегодняшней на days дней"""
+    return (utc_now().date() - timedelta(days=days)).isoformat()
+
+
+async def record_activity(db: aiosqlite.Connection, activity: Iterable[Tuple[int, int]]):
+    """Учет активных за день пользователей; вызывается до обновления users.last_activity.
+
+    Пользователь засчитывается, если он есть в таблице users и его last_activity
+    пустой или раньше начала дня события. Активность без строки в users не
+    учитывается: иначе каждая запись буфера засчитывала бы его заново.
+    """
+    rows = []
+    for user_id, timestamp in activity:
+        day = day_key(timestamp)
+        rows.append((day, user_id, day_start(day)))
+
+    await db.executemany("""
+        INSERT INTO daily_active_users (day, active_users)
+        SELECT ?, 1 FROM users
+        WHERE user_id = ? AND (last_activity IS NULL OR last_activity < ?)
+        ON CONFLICT(day) DO UPDATE SET active_users = active_users + 1
+    """, rows)
+
+
+async def record_section_access(db: aiosqlite.Connection,
+                                sections: Iterable[Tuple[int, str, datetime]]):
+    """Добавление обращений к разделам в дневную сводку"""
+    counts = Counter(
+        (access_time.date().isoformat(), section_name)
+        for _, section_name, access_time in sections
+    )
+    await db.executemany("""
+        INSERT INTO section_stats_daily (day, section_name, access_count)
+        VALUES (?, ?, ?)
+        ON CONFLICT(day, section_name) DO UPDATE SET
+            access_count = access_count + excluded.access_count
+    """, [(day, section_name, count) for (day, section_name), count in counts.items()])
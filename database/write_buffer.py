@@ -0,0 +1,105 @@
+"""
+Отложенная пакетная запись активности пользователей и статистики разделов
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from database.pool import ConnectionPool
+from database.rollups import record_activity, record_section_access, utc_now
+
+
+class WriteBehindBuffer:
+    """Копит события в памяти и записывает их одной транзакцией"""
+
+    def __init__(self, pool: ConnectionPool, max_events: int = 100,
+                 flush_interval: float = 2.0):
+        self.pool = pool
+        self.max_events = max_events
+        self.flush_interval = flush_interval
+        # Последняя активность пользователя в секундах epoch (побеждает последняя запись)
+        self._activity: Dict[int, int] = {}
+        # Обращения к разделам: (user_id, section_name, access_time по UTC)
+        self._sections: List[Tuple[int, str, datetime]] = []
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._pending_flush: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._activity) + len(self._sections)
+
+    def add_activity(self, user_id: int):
+        """Запоминает время последней активности пользователя"""
+        self._activity[user_id] = int(time.time())
+        self._maybe_flush()
+
+    def add_section_access(self, user_id: int, section_name: str):
+        """Запоминает обращение к разделу"""
+        # UTC, как DEFAULT CURRENT_TIMESTAMP у уже записанных событий
+        self._sections.append((user_id, section_name, utc_now()))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        """Запускает запись, если накопилось достаточно событий"""
+        if len(self) < self.max_events:
+            return
+        if self._pending_flush and not self._pending_flush.done():
+            return
+        self._pending_flush = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Записывает накопленные события одной транзакцией"""
+        async with self._flush_lock:
+            if not self._activity and not self._sections:
+                return
+
+            activity, self._activity = self._activity, {}
+            sections, self._sections = self._sections, []
+
+            try:
+                async with self.pool.writer() as db:
+                    if activity:
+                        # Сводка сравнивает с предыдущим last_activity, поэтому идет первой
+                        await record_activity(db, activity.items())
+                        await db.executemany("""
+                            UPDATE users SET last_activity = ? WHERE user_id = ?
+                        """, [(timestamp, user_id) for user_id, timestamp in activity.items()])
+                    if sections:
+                        await db.executemany("""
+                            INSERT INTO section_stats (user_id, section_name, access_time)
+                            VALUES (?, ?, ?)
+                        """, sections)
+                        await record_section_access(db, sections)
+            except Exception as e:
+                logger.error(f"Ошибка при записи буфера активности: {e}")
+                # Возвращаем события в буфер, более свежие значения не затираем
+                for user_id, timestamp in activity.items():
+                    self._activity.setdefault(user_id, timestamp)
+                self._sections[:0] = sections
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Запуск периодической записи по таймеру"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановка таймера и запись оставшихся событий"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending_flush:
+            await asyncio.gather(self._pending_flush, return_exceptions=True)
+            self._pending_flush = None
+        await self.flush()
@@ -1,19 +1,32 @@
+import html
+from typing import Optional
+
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, Message
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, FSInputFile, InputMediaDocument, Message
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from loguru import logger
-from datetime import datetime
 
-from config.content import ADMIN_PANEL_TEXT, STATS_TEXT
-from config.settings import get_settings
+from config.content import (
+    FEEDBACK_TYPES, MAX_VIDEO_SIZE_MB, MAX_VIDEOS_PER_CATEGORY, VIDEO_CATEGORIES,
+    VIDEO_EXTENSIONS, VIDEO_MIME_TYPES
+)
+from config.templates import SETTING_PREFIX, render, templates
+from config.settings import get_settings, reload_settings
 from keyboards.inline_keyboards import (
     get_admin_panel_keyboard, get_admin_content_keyboard, 
-    get_admin_stats_keyboard, get_broadcast_confirm_keyboard,
-    get_video_management_keyboard, get_main_menu_keyboard
+    get_admin_stats_keyboard, get_export_format_keyboard, get_feedback_inbox_keyboard,
+    get_broadcast_confirm_keyboard, get_back_keyboard,
+    get_video_management_keyboard, get_video_upload_category_keyboard, get_main_menu_keyboard
 )
 from database.database import is_admin, db
+from utils.broadcast import (
+    start_broadcast, pause_broadcast, resume_broadcast, cancel_broadcast
+)
+from utils.export import export_tables, is_export_running, make_export_dir, remove_export_dir
+from utils.video_ingest import is_ingest_running, start_ingest
 
 router = Router()
 
@@ -24,9 +37,8 @@ class AdminStates(StatesGroup):
     waiting_for_video_upload = State()
 
 async def check_admin_rights(user_id: int) -> bool:
-    """Проверка прав администратора"""
-    settings = get_settings()
-    return user_id in settings.admin_ids or await is_admin(user_id)
+    """Проверка прав администратора (ADMIN_IDS и users.is_admin, из кэша)"""
+    return await is_admin(user_id)
 
 @router.message(Command("admin"))
 async def admin_command(message: Message):
@@ -37,7 +49,7 @@ async def admin_command(message: Message):
             return
         
         await message.answer(
-            ADMIN_PANEL_TEXT,
+            render("ADMIN_PANEL_TEXT"),
             reply_markup=get_admin_panel_keyboard()
         )
         
@@ -47,6 +59,49 @@ async def admin_command(message: Message):
         logger.error(f"Ошибка в admin_command: {e}")
         await message.answer("Произошла ошибка при входе в административную панель.")
 
+@router.message(Command("reload"))
+async def reload_command(message: Message):
+    """Перезагрузка настроек из переменных окружения без перезапуска бота"""
+    try:
+        if not await check_admin_rights(message.from_user.id):
+            await message.answer("❌ У вас нет прав администратора.")
+            return
+        
+        reload_settings()
+        # Остальные процессы бота (BOT_WORKERS > 1) перечитывают настройки по событию
+        db.publish("reload")
+        await message.answer("🔄 Настройки перезагружены.")
+        
+        logger.info(f"Администратор {message.from_user.id} перезагрузил настройки")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в reload_command: {e}")
+        await message.answer(f"❌ Не удалось перезагрузить настройки: {e}")
+
+@router.message(Command("ingest_videos"))
+async def ingest_videos_command(message: Message):
+    """Загрузка новых видео из папки MEDIA_DIR на сервере"""
+    try:
+        if not await check_admin_rights(message.from_user.id):
+            await message.answer("❌ У вас нет прав администратора.")
+            return
+        
+        if is_ingest_running():
+            await message.answer("⏳ Загрузка видео уже выполняется.")
+            return
+        
+        media_dir = get_settings().media_dir
+        status_message = await message.answer(
+            f"📥 Загружаю новые видео из папки <code>{html.escape(media_dir)}</code>..."
+        )
+        # Загрузка идет в фоне: файлы отправляются в чат администратора (оттуда берется file_id),
+        # прогресс и итог выводятся в сообщение статуса
+        start_ingest(message.bot, media_dir, message.chat.id, status_message.message_id)
+        
+    except Exception as e:
+        logger.error(f"Ошибка в ingest_videos_command: {e}")
+        await message.answer("Произошла ошибка при загрузке видео.")
+
 @router.callback_query(F.data == "admin_panel")
 async def admin_panel_callback(callback: CallbackQuery):
     """Возврат в административную панель"""
@@ -56,7 +111,7 @@ async def admin_panel_callback(callback: CallbackQuery):
             return
         
         await callback.message.edit_text(
-            ADMIN_PANEL_TEXT,
+            render("ADMIN_PANEL_TEXT"),
             reply_markup=get_admin_panel_keyboard()
         )
         await callback.answer()
@@ -65,6 +120,49 @@ async def admin_panel_callback(callback: CallbackQuery):
         logger.error(f"Ошибка в admin_panel_callback: {e}")
         await callback.answer("Произошла ошибка")
 
+async def show_stats(callback: CallbackQuery):
+    """Статистика бота в сообщении callback (TelegramBadRequest, если текст не изменился)"""
+    # Получаем статистику из базы данных
+    user_stats = await db.get_user_stats()
+    feedback_stats = await db.get_feedback_stats()
+    popular_sections = await db.get_popular_sections()
+    
+    # Форматируем популярные разделы
+    popular_text = ""
+    if popular_sections:
+        for i, (section, count) in enumerate(popular_sections, 1):
+            section_names = {
+                "official_channel": "📢 Официальный канал",
+                "student_council": "💡 Студенческий совет", 
+                "floor_chats": "🗣 Чаты этажей",
+                "general_chat": "👥 Общий чат",
+                "guide_website": "📚 Сайт с гайдом",
+                "video_guide": "🎬 Видео-гайды",
+                "contacts": "📞 Контакты",
+                "feedback": "📝 Обратная связь"
+            }
+            section_name = section_names.get(section, section)
+            popular_text += f"{i}. {section_name}: {count}\n"
+    else:
+        popular_text = "Данных пока нет"
+    
+    stats_text = render(
+        "STATS_TEXT",
+        total_users=user_stats.get("total_users", 0),
+        active_today=user_stats.get("active_today", 0),
+        active_week=user_stats.get("active_week", 0),
+        active_month=user_stats.get("active_month", 0),
+        avg_daily_active=user_stats.get("avg_daily_active", 0),
+        popular_sections=popular_text,
+        new_feedback=feedback_stats.get("new_feedback", 0),
+        total_feedback=feedback_stats.get("total_feedback", 0)
+    )
+    
+    await callback.message.edit_text(
+        stats_text,
+        reply_markup=get_admin_stats_keyboard()
+    )
+
 @router.callback_query(F.data == "admin_stats")
 async def admin_stats_callback(callback: CallbackQuery):
     """Статистика бота"""
@@ -73,46 +171,13 @@ async def admin_stats_callback(callback: CallbackQuery):
             await callback.answer("❌ У вас нет прав администратора.")
             return
         
-        # Получаем статистику из базы данных
-        user_stats = await db.get_user_stats()
-        feedback_stats = await db.get_feedback_stats()
-        popular_sections = await db.get_popular_sections()
-        
-        # Форматируем популярные разделы
-        popular_text = ""
-        if popular_sections:
-            for i, (section, count) in enumerate(popular_sections, 1):
-                section_names = {
-                    "official_channel": "📢 Официальный канал",
-                    "student_council": "💡 Студенческий совет", 
-                    "floor_chats": "🗣 Чаты этажей",
-                    "general_chat": "👥 Общий чат",
-                    "guide_website": "📚 Сайт с гайдом",
-                    "video_guide": "🎬 Видео-гайды",
-                    "contacts": "📞 Контакты",
-                    "feedback": "📝 Обратная связь"
-                }
-                section_name = section_names.get(section, section)
-                popular_text += f"{i}. {section_name}: {count}\n"
-        else:
-            popular_text = "Данных пока нет"
-        
-        stats_text = STATS_TEXT.format(
-            total_users=user_stats.get("total_users", 0),
-            active_today=user_stats.get("active_today", 0),
-            active_week=user_stats.get("active_week", 0),
-            active_month=user_stats.get("active_month", 0),
-            popular_sections=popular_text,
-            new_feedback=feedback_stats.get("new_feedback", 0),
-            total_feedback=feedback_stats.get("total_feedback", 0)
-        )
-        
-        await callback.message.edit_text(
-            stats_text,
-            reply_markup=get_admin_stats_keyboard()
-        )
+        await show_stats(callback)
         await callback.answer()
         
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            logger.error(f"Ошибка в admin_stats_callback: {e}")
+        await callback.answer()
     except Exception as e:
         logger.error(f"Ошибка в admin_stats_callback: {e}")
         await callback.answer("Произошла ошибка при получении статистики")
@@ -125,14 +190,78 @@ async def refresh_stats_callback(callback: CallbackQuery):
             await callback.answer("❌ У вас нет прав администратора.")
             return
         
+        await show_stats(callback)
         await callback.answer("📊 Статистика обновлена!")
-        # Повторно вызываем отображение статистики
-        await admin_stats_callback(callback)
         
+    except TelegramBadRequest as e:
+        # Пока действует кэш статистики, текст не меняется
+        if "message is not modified" not in str(e):
+            logger.error(f"Ошибка в refresh_stats_callback: {e}")
+        await callback.answer("📊 Статистика обновлена!")
     except Exception as e:
         logger.error(f"Ошибка в refresh_stats_callback: {e}")
         await callback.answer("Произошла ошибка при обновлении статистики")
 
+@router.callback_query(F.data == "export_stats")
+async def export_stats_callback(callback: CallbackQuery):
+    """Выбор формата выгрузки данных"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        text = """
+📈 <b>Экспорт данных</b>
+
+Будут выгружены пользователи, статистика разделов, обратная связь и рассылки — каждая таблица отдельным файлом.
+
+Выберите формат:
+"""
+        await callback.message.edit_text(text, reply_markup=get_export_format_keyboard())
+        await callback.answer()
+        
+    except Exception as e:
+        logger.error(f"Ошибка в export_stats_callback: {e}")
+        await callback.answer("Произошла ошибка")
+
+@router.callback_query(F.data.startswith("export_stats:"))
+async def export_stats_format_callback(callback: CallbackQuery):
+    """Выгрузка данных и отправка файлов администратору"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        if is_export_running():
+            await callback.answer("⏳ Выгрузка уже выполняется, попробуйте позже.")
+            return
+        
+        export_format = callback.data.split(":", 1)[1]
+        await callback.answer("⏳ Готовлю выгрузку...")
+        await callback.message.edit_text("⏳ <b>Готовлю выгрузку данных...</b>")
+        
+        directory = make_export_dir()
+        try:
+            paths = await export_tables(directory, export_format, compress=get_settings().export_gzip)
+            await callback.bot.send_media_group(
+                chat_id=callback.from_user.id,
+                media=[InputMediaDocument(media=FSInputFile(path)) for path in paths]
+            )
+        finally:
+            remove_export_dir(directory)
+        
+        await callback.message.edit_text(
+            "✅ <b>Выгрузка готова</b>",
+            reply_markup=get_admin_stats_keyboard()
+        )
+        
+    except Exception as e:
+        logger.error(f"Ошибка в export_stats_format_callback: {e}")
+        await callback.message.answer(
+            "Произошла ошибка при выгрузке данных.",
+            reply_markup=get_admin_stats_keyboard()
+        )
+
 @router.callback_query(F.data == "admin_edit_content")
 async def admin_edit_content_callback(callback: CallbackQuery):
     """Редактирование контента"""
@@ -198,7 +327,7 @@ async def admin_broadcast_callback(callback: CallbackQuery, state: FSMContext):
         logger.error(f"Ошибка в admin_broadcast_callback: {e}")
         await callback.answer("Произошла ошибка")
 
-@router.message(AdminStates.waiting_for_broadcast_message)
+@router.message(AdminStates.waiting_for_broadcast_message, ~F.text.startswith("/"))
 async def process_broadcast_message(message: Message, state: FSMContext):
     """Обработка сообщения для рассылки"""
     try:
@@ -263,80 +392,87 @@ async def broadcast_confirm_callback(callback: CallbackQuery, state: FSMContext)
             await callback.answer("Данные рассылки не найдены")
             return
         
+        await state.clear()
         await callback.message.edit_text("📨 Рассылка начата...")
+        await callback.answer()
         
-        # Получаем всех пользователей
-        async with db.db_path and db.db_path as conn:
-            cursor = await conn.execute("SELECT user_id FROM users WHERE is_active = TRUE")
-            users = await cursor.fetchall()
-        
-        sent_count = 0
-        failed_count = 0
-        
-        for (user_id,) in users:
-            try:
-                if "photo" in broadcast_data:
-                    await callback.bot.send_photo(
-                        chat_id=user_id,
-                        photo=broadcast_data["photo"],
-                        caption=broadcast_data.get("caption", "")
-                    )
-                elif "video" in broadcast_data:
-                    await callback.bot.send_video(
-                        chat_id=user_id,
-                        video=broadcast_data["video"],
-                        caption=broadcast_data.get("caption", "")
-                    )
-                else:
-                    await callback.bot.send_message(
-                        chat_id=user_id,
-                        text=broadcast_data["text"]
-                    )
-                sent_count += 1
-            except Exception as send_error:
-                failed_count += 1
-                logger.warning(f"Не удалось отправить сообщение пользователю {user_id}: {send_error}")
-        
-        # Сохраняем статистику рассылки
-        async with db.db_path and db.db_path as conn:
-            await conn.execute("""
-                INSERT INTO broadcasts (admin_id, message, sent_count, failed_count, completed_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                callback.from_user.id,
-                broadcast_data.get("text", "Медиа-сообщение"),
-                sent_count,
-                failed_count,
-                datetime.now()
-            ))
-            await conn.commit()
-        
-        result_text = f"""
-✅ <b>Рассылка завершена!</b>
-
-📊 <b>Статистика:</b>
-• Отправлено: {sent_count}
-• Ошибок: {failed_count}
-• Общий охват: {sent_count}/{sent_count + failed_count}
-
-Время завершения: {datetime.now().strftime("%H:%M:%S")}
-"""
-        
-        await callback.message.edit_text(
-            result_text,
-            reply_markup=get_admin_panel_keyboard()
+        # Рассылка идет в фоне, прогресс обновляется в этом же сообщении
+        broadcast_id = await start_broadcast(
+            bot=callback.bot,
+            admin_id=callback.from_user.id,
+            broadcast_data=broadcast_data,
+            chat_id=callback.message.chat.id,
+            message_id=callback.message.message_id
         )
         
-        await state.clear()
-        await callback.answer()
+        if not broadcast_id:
+            await callback.message.edit_text(
+                "❌ Не удалось создать рассылку.",
+                reply_markup=get_admin_panel_keyboard()
+            )
+            return
         
-        logger.info(f"Рассылка завершена: {sent_count} отправлено, {failed_count} ошибок")
+        logger.info(f"Администратор {callback.from_user.id} запустил рассылку {broadcast_id}")
         
     except Exception as e:
         logger.error(f"Ошибка в broadcast_confirm_callback: {e}")
         await callback.answer("Произошла ошибка при рассылке")
         await state.clear()
 
+@router.callback_query(F.data.startswith("broadcast_pause:"))
+async def broadcast_pause_callback(callback: CallbackQuery):
+    """Пауза идущей рассылки"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        broadcast_id = int(callback.data.split(":")[1])
+        if await pause_broadcast(broadcast_id):
+            await callback.answer("⏸ Рассылка приостановлена")
+        else:
+            await callback.answer("Рассылка уже завершена")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в broadcast_pause_callback: {e}")
+        await callback.answer("Произошла ошибка")
+
+@router.callback_query(F.data.startswith("broadcast_resume:"))
+async def broadcast_resume_callback(callback: CallbackQuery):
+    """Продолжение приостановленной рассылки"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        broadcast_id = int(callback.data.split(":")[1])
+        if await resume_broadcast(callback.bot, broadcast_id):
+            await callback.answer("▶️ Рассылка продолжена")
+        else:
+            await callback.answer("Рассылка уже завершена")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в broadcast_resume_callback: {e}")
+        await callback.answer("Произошла ошибка")
+
+@router.callback_query(F.data.startswith("broadcast_stop:"))
+async def broadcast_stop_callback(callback: CallbackQuery):
+    """Остановка рассылки"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        broadcast_id = int(callback.data.split(":")[1])
+        if await cancel_broadcast(callback.bot, broadcast_id):
+            await callback.answer("⏹ Рассылка останавливается")
+        else:
+            await callback.answer("Рассылка уже завершена")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в broadcast_stop_callback: {e}")
+        await callback.answer("Произошла ошибка")
+
 @router.callback_query(F.data == "broadcast_cancel")
 async def broadcast_cancel_callback(callback: CallbackQuery, state: FSMContext):
     """Отмена рассылки"""
@@ -352,58 +488,109 @@ async def broadcast_cancel_callback(callback: CallbackQuery, state: FSMContext):
         logger.error(f"Ошибка в broadcast_cancel_callback: {e}")
         await callback.answer("Произошла ошибка")
 
-@router.callback_query(F.data == "admin_feedback")
-async def admin_feedback_callback(callback: CallbackQuery):
-    """Просмотр обратной связи"""
-    try:
-        if not await check_admin_rights(callback.from_user.id):
-            await callback.answer("❌ У вас нет прав администратора.")
-            return
-        
-        # Получаем непрочитанную обратную связь
-        feedback_list = await db.get_unread_feedback()
-        
-        if not feedback_list:
-            text = """
-💬 <b>Обратная связь</b>
+# Сообщений обратной связи на одной странице
+FEEDBACK_PAGE_SIZE = 5
+
+async def show_feedback_page(callback: CallbackQuery, feedback_type: str = "all",
+                             cursor_id: int = 0, older: bool = True):
+    """Вывод страницы непрочитанной обратной связи"""
+    type_filter = None if feedback_type == "all" else feedback_type
+    feedback_list, has_newer, has_older = await db.get_feedback_page(
+        type_filter, cursor_id, older, limit=FEEDBACK_PAGE_SIZE
+    )
+    unread = await db.count_unread_feedback(type_filter)
+    
+    title = FEEDBACK_TYPES.get(feedback_type, "📬 Все")
+    if not feedback_list:
+        text = f"""
+💬 <b>Обратная связь</b> — {title}
 
 📭 Новых сообщений нет.
 
 Все сообщения обратной связи обработаны.
 """
-        else:
-            text = f"""
-💬 <b>Обратная связь</b>
+    else:
+        text = f"""
+💬 <b>Обратная связь</b> — {title}
 
-📬 Новых сообщений: {len(feedback_list)}
-
-<b>Последние сообщения:</b>
+📬 Непрочитанных сообщений: {unread}
 """
+        
+        for feedback in feedback_list:
+            username = feedback["username"] or "Неизвестно"
+            message_preview = feedback["message"][:100] + "..." if len(feedback["message"]) > 100 else feedback["message"]
             
-            for feedback in feedback_list[:5]:  # Показываем только первые 5
-                username = feedback["username"] or "Неизвестно"
-                feedback_type = feedback["feedback_type"]
-                created_at = feedback["created_at"]
-                message_preview = feedback["message"][:100] + "..." if len(feedback["message"]) > 100 else feedback["message"]
-                
-                text += f"""
-
-📝 <b>От:</b> @{username} (ID: {feedback["user_id"]})
-📅 <b>Дата:</b> {created_at}
-🏷 <b>Тип:</b> {feedback_type}
-💭 <b>Сообщение:</b> {message_preview}
+            text += f"""
+📝 <b>От:</b> @{html.escape(username)} (ID: {feedback["user_id"]})
+📅 <b>Дата:</b> {feedback["created_at"]}
+🏷 <b>Тип:</b> {FEEDBACK_TYPES.get(feedback["feedback_type"], feedback["feedback_type"])}
+💭 <b>Сообщение:</b> {html.escape(message_preview)}
 """
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_admin_panel_keyboard()
+    
+    newest_id = feedback_list[0]["id"] if feedback_list else 0
+    oldest_id = feedback_list[-1]["id"] if feedback_list else 0
+    await callback.message.edit_text(
+        text,
+        reply_markup=get_feedback_inbox_keyboard(
+            feedback_type, newest_id, oldest_id, has_newer, has_older
         )
+    )
+
+@router.callback_query(F.data == "admin_feedback")
+async def admin_feedback_callback(callback: CallbackQuery):
+    """Просмотр обратной связи"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        await show_feedback_page(callback)
         await callback.answer()
         
     except Exception as e:
         logger.error(f"Ошибка в admin_feedback_callback: {e}")
         await callback.answer("Произошла ошибка при получении обратной связи")
 
+@router.callback_query(F.data.startswith("feedback_page:"))
+async def feedback_page_callback(callback: CallbackQuery):
+    """Листание и фильтр обратной связи"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        _, feedback_type, direction, cursor_id = callback.data.split(":")
+        await show_feedback_page(callback, feedback_type, int(cursor_id), direction == "older")
+        await callback.answer()
+        
+    except TelegramBadRequest as e:
+        # Нажатие на уже выбранный фильтр не меняет сообщение
+        if "message is not modified" not in str(e):
+            logger.error(f"Ошибка в feedback_page_callback: {e}")
+        await callback.answer()
+    except Exception as e:
+        logger.error(f"Ошибка в feedback_page_callback: {e}")
+        await callback.answer("Произошла ошибка при получении обратной связи")
+
+@router.callback_query(F.data.startswith("feedback_read:"))
+async def feedback_read_callback(callback: CallbackQuery):
+    """Отметка страницы обратной связи прочитанной"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        _, feedback_type, newest_id, oldest_id = callback.data.split(":")
+        type_filter = None if feedback_type == "all" else feedback_type
+        marked = await db.mark_feedback_read(int(newest_id), int(oldest_id), type_filter)
+        
+        await show_feedback_page(callback, feedback_type)
+        await callback.answer(f"✅ Отмечено прочитанными: {marked}")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в feedback_read_callback: {e}")
+        await callback.answer("Произошла ошибка при отметке сообщений")
+
 @router.callback_query(F.data == "admin_videos")
 async def admin_videos_callback(callback: CallbackQuery):
     """Управление видео"""
@@ -432,6 +619,142 @@ async def admin_videos_callback(callback: CallbackQuery):
         logger.error(f"Ошибка в admin_videos_callback: {e}")
         await callback.answer("Произошла ошибка")
 
+@router.callback_query(F.data == "admin_add_video")
+async def admin_add_video_callback(callback: CallbackQuery):
+    """Выбор категории для нового видео"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        await callback.message.edit_text(
+            "➕ <b>Добавление видео</b>\n\nВыберите категорию:",
+            reply_markup=get_video_upload_category_keyboard()
+        )
+        await callback.answer()
+        
+    except Exception as e:
+        logger.error(f"Ошибка в admin_add_video_callback: {e}")
+        await callback.answer("Произошла ошибка")
+
+@router.callback_query(F.data.startswith("admin_video_"))
+async def admin_video_category_callback(callback: CallbackQuery, state: FSMContext):
+    """Видео категории и ожидание загрузки нового"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        category_id = callback.data.split("admin_video_", 1)[1]
+        category_info = VIDEO_CATEGORIES.get(category_id)
+        if not category_info:
+            await callback.answer("Категория не найдена")
+            return
+        
+        videos = await db.get_videos_by_category(category_id)
+        text = f"""
+🎬 <b>{category_info['name']}</b>
+
+Видео: {len(videos)}/{MAX_VIDEOS_PER_CATEGORY}
+"""
+        for video in videos:
+            text += f"\n• {html.escape(video['title'] or 'Без названия')}"
+        
+        if len(videos) < MAX_VIDEOS_PER_CATEGORY:
+            await state.set_state(AdminStates.waiting_for_video_upload)
+            await state.update_data(video_category=category_id)
+            text += f"""
+
+📤 Отправьте видео (MP4, AVI или MOV, до {MAX_VIDEO_SIZE_MB} МБ).
+Первая строка подписи станет названием, остальные — описанием.
+
+Для отмены отправьте /cancel
+"""
+        else:
+            await state.clear()
+            text += "\n\n⚠️ В категории уже максимальное количество видео."
+        
+        await callback.message.edit_text(text, reply_markup=get_back_keyboard("admin_videos"))
+        await callback.answer()
+        
+    except Exception as e:
+        logger.error(f"Ошибка в admin_video_category_callback: {e}")
+        await callback.answer("Произошла ошибка")
+
+def check_video_metadata(file_size: Optional[int], mime_type: Optional[str],
+                         file_name: Optional[str]) -> Optional[str]:
+    """Проверка видео по метаданным Telegram; возвращает текст ошибки или None"""
+    if file_size and file_size > MAX_VIDEO_SIZE_MB * 1024 * 1024:
+        return f"Файл больше {MAX_VIDEO_SIZE_MB} МБ"
+    if mime_type:
+        if mime_type.lower() not in VIDEO_MIME_TYPES:
+            return "Поддерживаются только форматы MP4, AVI и MOV"
+    elif not (file_name and file_name.lower().endswith(VIDEO_EXTENSIONS)):
+        return "Поддерживаются только форматы MP4, AVI и MOV"
+    return None
+
+@router.message(AdminStates.waiting_for_video_upload, F.video)
+async def process_video_upload(message: Message, state: FSMContext):
+    """Сохранение загруженного видео: в базу попадает только file_id Telegram"""
+    try:
+        if not await check_admin_rights(message.from_user.id):
+            await state.clear()
+            return
+        
+        data = await state.get_data()
+        category_id = data.get("video_category")
+        if category_id not in VIDEO_CATEGORIES:
+            await state.clear()
+            await message.answer("Категория не выбрана.", reply_markup=get_admin_panel_keyboard())
+            return
+        
+        # Только настоящие видео: альбомы отправляются через InputMediaVideo
+        media = message.video
+        error = check_video_metadata(media.file_size, media.mime_type, media.file_name)
+        if error:
+            await message.answer(f"❌ {error}. Отправьте другое видео или /cancel")
+            return
+        
+        if await db.count_videos(category_id) >= MAX_VIDEOS_PER_CATEGORY:
+            await state.clear()
+            await message.answer(
+                "⚠️ В категории уже максимальное количество видео.",
+                reply_markup=get_video_management_keyboard()
+            )
+            return
+        
+        caption_lines = (message.caption or "").strip().split("\n", 1)
+        title = caption_lines[0].strip() or media.file_name or "Видео"
+        description = caption_lines[1].strip() if len(caption_lines) > 1 else ""
+        
+        video_id = await db.add_video(category_id, title, description, media.file_id)
+        if not video_id:
+            await message.answer("❌ Не удалось сохранить видео. Попробуйте еще раз.")
+            return
+        
+        count = await db.count_videos(category_id)
+        logger.info(f"Администратор {message.from_user.id} добавил видео {video_id} в категорию {category_id}")
+        if count >= MAX_VIDEOS_PER_CATEGORY:
+            await state.clear()
+            await message.answer(
+                f"✅ Видео «{html.escape(title)}» добавлено. В категории {count}/{MAX_VIDEOS_PER_CATEGORY} видео — это максимум.",
+                reply_markup=get_video_management_keyboard()
+            )
+        else:
+            await message.answer(
+                f"✅ Видео «{html.escape(title)}» добавлено ({count}/{MAX_VIDEOS_PER_CATEGORY}).\n\n"
+                "Отправьте еще одно видео или /cancel для завершения."
+            )
+        
+    except Exception as e:
+        logger.error(f"Ошибка в process_video_upload: {e}")
+        await message.answer("Произошла ошибка при сохранении видео.")
+
+@router.message(AdminStates.waiting_for_video_upload, ~F.text.startswith("/"))
+async def process_video_upload_invalid(message: Message):
+    """В состоянии загрузки пришло не видео (в том числе видео, отправленное файлом)"""
+    await message.answer("📤 Отправьте видео как видео, а не файлом (MP4, AVI или MOV), или /cancel для отмены.")
+
 # Обработчик для отмены админских действий
 @router.message(Command("cancel"))
 async def cancel_admin_action(message: Message, state: FSMContext):
@@ -452,6 +775,81 @@ async def cancel_admin_action(message: Message, state: FSMContext):
     except Exception as e:
         logger.error(f"Ошибка в cancel_admin_action: {e}")
 
+# Редактируемый администратором контент: кнопка -> (ключ bot_settings, описание)
+EDITABLE_CONTENT = {
+    "edit_guide_link": ("guide_website_link", "ссылку на сайт с гайдом"),
+    "edit_contacts_text": (SETTING_PREFIX + "CONTACTS_TEXT", "текст раздела «Важные контакты»"),
+}
+
+@router.callback_query(F.data.in_(EDITABLE_CONTENT.keys()))
+async def edit_content_item_callback(callback: CallbackQuery, state: FSMContext):
+    """Запрос нового значения для редактируемого контента"""
+    try:
+        if not await check_admin_rights(callback.from_user.id):
+            await callback.answer("❌ У вас нет прав администратора.")
+            return
+        
+        setting_key, description = EDITABLE_CONTENT[callback.data]
+        await state.set_state(AdminStates.waiting_for_setting_value)
+        await state.update_data(setting_key=setting_key)
+        
+        text = f"""
+✏️ <b>Редактирование</b>
+
+Отправьте {description} одним сообщением.
+Изменение применится сразу, без перезапуска бота.
+
+Для отмены используйте /cancel
+"""
+        
+        await callback.message.edit_text(text)
+        await callback.answer()
+        
+    except Exception as e:
+        logger.error(f"Ошибка в edit_content_item_callback: {e}")
+        await callback.answer("Произошла ошибка")
+
+@router.message(AdminStates.waiting_for_setting_value, F.text, ~F.text.startswith("/"))
+async def process_setting_value(message: Message, state: FSMContext):
+    """Сохранение нового значения контента"""
+    try:
+        if not await check_admin_rights(message.from_user.id):
+            await message.answer("❌ У вас нет прав администратора.")
+            await state.clear()
+            return
+        
+        data = await state.get_data()
+        setting_key = data.get("setting_key")
+        if not setting_key:
+            await state.clear()
+            return
+        
+        if setting_key.startswith(SETTING_PREFIX):
+            # Текст сохраняется вместе с форматированием из сообщения
+            value = message.html_text
+            try:
+                templates.validate(setting_key[len(SETTING_PREFIX):], value)
+            except (KeyError, ValueError) as e:
+                await message.answer(f"❌ {e}\n\nИсправьте текст и отправьте еще раз.")
+                return
+        else:
+            value = message.text.strip()
+        
+        await db.set_setting(setting_key, value)
+        await state.clear()
+        
+        await message.answer(
+            "✅ Изменения сохранены.",
+            reply_markup=get_admin_content_keyboard()
+        )
+        
+        logger.info(f"Администратор {message.from_user.id} изменил настройку {setting_key}")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в process_setting_value: {e}")
+        await message.answer("Произошла ошибка при сохранении изменений.")
+        await state.clear()
+
 def register_admin_handlers(dp):
     """Регистрация административных обработчиков"""
     dp.include_router(router) 
\ No newline at end of file
@@ -1,11 +1,11 @@
 from aiogram import Router, F
 from aiogram.types import Message
-from aiogram.filters import CommandStart, Command
+from aiogram.filters import CommandStart, Command, StateFilter
 from loguru import logger
 
-from config.content import WELCOME_MESSAGE, HELP_MESSAGE
+from config.templates import render
 from keyboards.inline_keyboards import get_main_menu_keyboard
-from database.database import add_user, update_user_activity
+from database.database import add_user
 
 router = Router()
 
@@ -25,12 +25,9 @@ async def start_command(message: Message):
             last_name=user.last_name or ""
         )
         
-        # Обновляем активность
-        await update_user_activity(user.id)
-        
         # Всегда показываем приветственное сообщение с меню
         user_first_name = user.first_name or "друг"
-        welcome_text = WELCOME_MESSAGE.format(first_name=user_first_name)
+        welcome_text = render("WELCOME_MESSAGE", first_name=user_first_name)
         
         await message.answer(
             welcome_text,
@@ -54,12 +51,9 @@ async def help_command(message: Message):
         if not user:
             return
         
-        # Обновляем активность
-        await update_user_activity(user.id)
-        
         # Отправляем справочное сообщение
         await message.answer(
-            HELP_MESSAGE,
+            render("HELP_MESSAGE"),
             reply_markup=get_main_menu_keyboard()
         )
         
@@ -73,7 +67,8 @@ async def help_command(message: Message):
         )
 
 
-@router.message(F.text)
+# Команды пропускаются: их обрабатывают роутеры, подключенные позже (/admin, /reload, /cancel и др.)
+@router.message(StateFilter(None), F.text, ~F.text.startswith("/"))
 async def handle_text_messages(message: Message):
     """Обработчик текстовых сообщений"""
     try:
@@ -81,9 +76,6 @@ async def handle_text_messages(message: Message):
         if not user:
             return
         
-        # Обновляем активность
-        await update_user_activity(user.id)
-        
         # Если сообщение не является командой, предлагаем воспользоваться меню
         await message.answer(
             "🤖 Для навигации используйте кнопки меню ниже.\n\n"
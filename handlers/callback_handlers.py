@@ -1,27 +1,20 @@
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, FSInputFile
+from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from loguru import logger
-from datetime import datetime
 
-from config.content import (
-    WELCOME_MESSAGE, OFFICIAL_CHANNEL_TEXT, STUDENT_COUNCIL_TEXT,
-    FLOOR_CHATS_TEXT, GENERAL_CHAT_TEXT, GUIDE_WEBSITE_TEXT,
-    VIDEO_GUIDE_TEXT, CONTACTS_TEXT, ADMIN_CONTACTS, EMERGENCY_CONTACTS,
-    TECHNICAL_CONTACTS, COUNCIL_CONTACTS, VIDEO_CATEGORIES,
-    FEEDBACK_START, FEEDBACK_RECEIVED
-)
+from config.content import VIDEO_CATEGORIES
+from config.templates import render
 from config.settings import get_settings
 from keyboards.inline_keyboards import (
     get_main_menu_keyboard, get_back_to_main_keyboard, get_back_keyboard,
-    get_student_council_keyboard, get_floor_chats_keyboard,
+    get_video_page_keyboard, get_student_council_keyboard, get_floor_chats_keyboard,
     get_video_categories_keyboard, get_contacts_keyboard,
     get_feedback_type_keyboard
 )
-from database.database import (
-    update_user_activity, log_section_access, db
-)
+from database.database import log_section_access, db
+from utils.video_albums import ALBUM_SIZE, get_category_media, page_count, send_album_page
 
 router = Router()
 
@@ -29,11 +22,9 @@ router = Router()
 async def main_menu_callback(callback: CallbackQuery):
     """Возврат в главное меню"""
     try:
-        await update_user_activity(callback.from_user.id)
-        
         # Форматируем приветственное сообщение с именем пользователя
         user_first_name = callback.from_user.first_name or "друг"
-        welcome_text = WELCOME_MESSAGE.format(first_name=user_first_name)
+        welcome_text = render("WELCOME_MESSAGE", first_name=user_first_name)
         
         await callback.message.edit_text(
             welcome_text,
@@ -49,14 +40,14 @@ async def main_menu_callback(callback: CallbackQuery):
 async def official_channel_callback(callback: CallbackQuery):
     """Официальный канал общежития"""
     try:
-        await update_user_activity(callback.from_user.id)
         await log_section_access(callback.from_user.id, "official_channel")
         
         settings = get_settings()
         # Получаем ссылку из базы данных или настроек
         channel_link = await db.get_setting("official_channel_link") or settings.official_channel_link
         
-        text = OFFICIAL_CHANNEL_TEXT.format(
+        text = render(
+            "OFFICIAL_CHANNEL_TEXT",
             channel_link=channel_link or "Ссылка будет добавлена позднее"
         )
         
@@ -74,11 +65,10 @@ async def official_channel_callback(callback: CallbackQuery):
 async def student_council_callback(callback: CallbackQuery):
     """Студенческий совет"""
     try:
-        await update_user_activity(callback.from_user.id)
         await log_section_access(callback.from_user.id, "student_council")
         
         await callback.message.edit_text(
-            STUDENT_COUNCIL_TEXT,
+            render("STUDENT_COUNCIL_TEXT"),
             reply_markup=get_student_council_keyboard()
         )
         await callback.answer()
@@ -91,11 +81,10 @@ async def student_council_callback(callback: CallbackQuery):
 async def floor_chats_callback(callback: CallbackQuery):
     """Чаты этажей"""
     try:
-        await update_user_activity(callback.from_user.id)
         await log_section_access(callback.from_user.id, "floor_chats")
         
         await callback.message.edit_text(
-            FLOOR_CHATS_TEXT,
+            render("FLOOR_CHATS_TEXT"),
             reply_markup=get_floor_chats_keyboard()
         )
         await callback.answer()
@@ -110,10 +99,9 @@ async def floor_chats_callback(callback: CallbackQuery):
 async def general_chat_callback(callback: CallbackQuery):
     """Общий чат общежития"""
     try:
-        await update_user_activity(callback.from_user.id)
         await log_section_access(callback.from_user.id, "general_chat")
         
-        text = GENERAL_CHAT_TEXT
+        text = render("GENERAL_CHAT_TEXT")
         
         await callback.message.edit_text(
             text,
@@ -129,14 +117,14 @@ async def general_chat_callback(callback: CallbackQuery):
 async def guide_website_callback(callback: CallbackQuery):
     """Сайт с гайдом"""
     try:
-        await update_user_activity(callback.from_user.id)
         await log_section_access(callback.from_user.id, "guide_website")
         
         settings = get_settings()
         # Получаем ссылку из базы данных или настроек
         guide_website_link = await db.get_setting("guide_website_link") or settings.guide_website_link
         
-        text = GUIDE_WEBSITE_TEXT.format(
+        text = render(
+            "GUIDE_WEBSITE_TEXT",
             guide_website_link=guide_website_link or "Ссылка будет добавлена позднее"
         )
         
@@ -154,11 +142,10 @@ async def guide_website_callback(callback: CallbackQuery):
 async def video_guide_callback(callback: CallbackQuery):
     """Видео-гайды"""
     try:
-        await update_user_activity(callback.from_user.id)
         await log_section_access(callback.from_user.id, "video_guide")
         
         await callback.message.edit_text(
-            VIDEO_GUIDE_TEXT,
+            render("VIDEO_GUIDE_TEXT"),
             reply_markup=get_video_categories_keyboard()
         )
         await callback.answer()
@@ -171,8 +158,6 @@ async def video_guide_callback(callback: CallbackQuery):
 async def video_category_callback(callback: CallbackQuery):
     """Конкретная категория видео"""
     try:
-        await update_user_activity(callback.from_user.id)
-        
         category_id = callback.data.split("video_category_")[1]
         category_info = VIDEO_CATEGORIES.get(category_id)
         
@@ -180,29 +165,20 @@ async def video_category_callback(callback: CallbackQuery):
             await callback.answer("Категория не найдена")
             return
         
-        # Получаем видео из базы данных
-        videos = await db.get_videos_by_category(category_id)
+        # Видео категории из кэша подготовленных альбомов
+        media = await get_category_media(category_id)
         
-        if videos:
+        if media:
             text = f"""
 🎬 <b>{category_info['name']}</b>
 
 {category_info['description']}
 
-Найдено видео: {len(videos)}
+Найдено видео: {len(media)}
 """
             
-            await callback.message.edit_text(text, reply_markup=get_back_keyboard("video_guide"))
-            
-            # Отправляем видео
-            for video in videos[:5]:  # Ограничиваем до 5 видео за раз
-                try:
-                    await callback.message.answer_video(
-                        video=video["file_id"],
-                        caption=f"📹 <b>{video['title']}</b>\n\n{video['description']}"
-                    )
-                except Exception as video_error:
-                    logger.error(f"Ошибка при отправке видео {video['id']}: {video_error}")
+            await callback.message.edit_text(text)
+            await send_video_page(callback, category_id, media, 0)
         else:
             text = f"""
 🎬 <b>{category_info['name']}</b>
@@ -223,15 +199,43 @@ async def video_category_callback(callback: CallbackQuery):
         logger.error(f"Ошибка в video_category_callback: {e}")
         await callback.answer("Произошла ошибка")
 
+async def send_video_page(callback: CallbackQuery, category_id: str, media, page: int):
+    """Альбом видео и сообщение с кнопками листания под ним"""
+    pages = page_count(media)
+    await send_album_page(callback.message, media, page)
+    await callback.message.answer(
+        f"📹 Видео {page * ALBUM_SIZE + 1}–{min((page + 1) * ALBUM_SIZE, len(media))} из {len(media)}",
+        reply_markup=get_video_page_keyboard(category_id, page, pages)
+    )
+
+@router.callback_query(F.data.startswith("video_page:"))
+async def video_page_callback(callback: CallbackQuery):
+    """Следующая или предыдущая страница видео категории"""
+    try:
+        _, category_id, page = callback.data.split(":")
+        media = await get_category_media(category_id)
+        page = int(page)
+        if page >= page_count(media):
+            await callback.answer("Видео больше нет")
+            return
+        
+        # Кнопки листания переезжают под новый альбом
+        await callback.message.edit_reply_markup(reply_markup=None)
+        await send_video_page(callback, category_id, media, page)
+        await callback.answer()
+        
+    except Exception as e:
+        logger.error(f"Ошибка в video_page_callback: {e}")
+        await callback.answer("Произошла ошибка")
+
 @router.callback_query(F.data == "contacts")
 async def contacts_callback(callback: CallbackQuery):
     """Важные контакты"""
     try:
-        await update_user_activity(callback.from_user.id)
         await log_section_access(callback.from_user.id, "contacts")
         
         await callback.message.edit_text(
-            CONTACTS_TEXT,
+            render("CONTACTS_TEXT"),
             reply_markup=get_back_to_main_keyboard()
         )
         await callback.answer()
@@ -244,10 +248,8 @@ async def contacts_callback(callback: CallbackQuery):
 async def contacts_admin_callback(callback: CallbackQuery):
     """Контакты администрации"""
     try:
-        await update_user_activity(callback.from_user.id)
-        
         await callback.message.edit_text(
-            ADMIN_CONTACTS,
+            render("ADMIN_CONTACTS"),
             reply_markup=get_back_keyboard("contacts")
         )
         await callback.answer()
@@ -260,10 +262,8 @@ async def contacts_admin_callback(callback: CallbackQuery):
 async def contacts_emergency_callback(callback: CallbackQuery):
     """Экстренные контакты"""
     try:
-        await update_user_activity(callback.from_user.id)
-        
         await callback.message.edit_text(
-            EMERGENCY_CONTACTS,
+            render("EMERGENCY_CONTACTS"),
             reply_markup=get_back_keyboard("contacts")
         )
         await callback.answer()
@@ -276,10 +276,8 @@ async def contacts_emergency_callback(callback: CallbackQuery):
 async def contacts_technical_callback(callback: CallbackQuery):
     """Технические контакты"""
     try:
-        await update_user_activity(callback.from_user.id)
-        
         await callback.message.edit_text(
-            TECHNICAL_CONTACTS,
+            render("TECHNICAL_CONTACTS"),
             reply_markup=get_back_keyboard("contacts")
         )
         await callback.answer()
@@ -292,10 +290,8 @@ async def contacts_technical_callback(callback: CallbackQuery):
 async def contacts_council_callback(callback: CallbackQuery):
     """Контакты студенческого совета"""
     try:
-        await update_user_activity(callback.from_user.id)
-        
         await callback.message.edit_text(
-            COUNCIL_CONTACTS,
+            render("COUNCIL_CONTACTS"),
             reply_markup=get_back_keyboard("contacts")
         )
         await callback.answer()
@@ -311,7 +307,6 @@ async def feedback_callback(callback: CallbackQuery, state: FSMContext):
         # Ленивый импорт для избежания циклических зависимостей
         from handlers.feedback_handlers import FeedbackStates
         
-        await update_user_activity(callback.from_user.id)
         await log_section_access(callback.from_user.id, "feedback")
         
         # Очищаем предыдущее состояние и устанавливаем новое
@@ -1,22 +1,28 @@
+import asyncio
+import html
+
 from aiogram import Router, F
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.filters import MagicData, StateFilter
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from loguru import logger
 from datetime import datetime
 
-from config.content import FEEDBACK_RECEIVED
+from config.templates import render
 from config.settings import get_settings
 from keyboards.inline_keyboards import get_main_menu_keyboard
-from database.database import update_user_activity, db
+from database.database import db
 
 router = Router()
 
 class FeedbackStates(StatesGroup):
     waiting_for_message = State()
 
-async def notify_admin_about_feedback(message: Message, user, feedback_type: str):
-    """Уведомляем администратора о новом сообщении обратной связи"""
+async def notify_admin_about_feedback(message: Message, user, feedback_type: str, feedback_id: int):
+    """Уведомляем администраторов о новом сообщении обратной связи (одновременно всех)"""
     try:
         settings = get_settings()
         bot = message.bot
@@ -25,21 +31,31 @@ async def notify_admin_about_feedback(message: Message, user, feedback_type: str
         admin_notification = f"""
 🔔 <b>Новое сообщение обратной связи</b>
 
-👤 <b>От пользователя:</b> {user.first_name or ''} {user.last_name or ''} (@{user.username or 'без username'})
+👤 <b>От пользователя:</b> {html.escape(user.first_name or '')} {html.escape(user.last_name or '')} (@{html.escape(user.username or 'без username')})
 🆔 <b>ID:</b> {user.id}
 📝 <b>Тип:</b> {feedback_type}
 📅 <b>Время:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}
 
 💬 <b>Сообщение:</b>
-{message.text}
+{html.escape(message.text or "")}
+
+↩️ <i>Ответьте на это сообщение, чтобы ответить пользователю.</i>
 """
         
-        # Отправляем уведомление всем администраторам
-        for admin_id in settings.admin_ids:
+        async def notify(admin_id: int):
             try:
-                await bot.send_message(admin_id, admin_notification)
+                return await bot.send_message(admin_id, admin_notification)
             except Exception as e:
                 logger.error(f"Не удалось отправить уведомление администратору {admin_id}: {e}")
+                return None
+        
+        sent = await asyncio.gather(*(notify(admin_id) for admin_id in settings.admin_ids))
+        
+        # По ответу на уведомление находим обращение
+        await db.save_feedback_notifications(
+            feedback_id,
+            [(sent_message.chat.id, sent_message.message_id) for sent_message in sent if sent_message]
+        )
                 
     except Exception as e:
         logger.error(f"Ошибка при отправке уведомления администратору: {e}")
@@ -49,7 +65,6 @@ async def process_feedback_message(message: Message, state: FSMContext):
     """Обработка сообщения обратной связи"""
     try:
         user = message.from_user
-        await update_user_activity(user.id)
         
         # Получаем данные из состояния
         data = await state.get_data()
@@ -64,7 +79,7 @@ async def process_feedback_message(message: Message, state: FSMContext):
         
         if feedback_id:
             # Отправляем подтверждение пользователю
-            confirmation_text = FEEDBACK_RECEIVED
+            confirmation_text = render("FEEDBACK_RECEIVED")
             
             await message.answer(
                 confirmation_text,
@@ -72,7 +87,7 @@ async def process_feedback_message(message: Message, state: FSMContext):
             )
             
             # Уведомляем администратора о новом сообщении
-            await notify_admin_about_feedback(message, user, feedback_type)
+            await notify_admin_about_feedback(message, user, feedback_type, feedback_id)
             
             logger.info(f"Получена обратная связь от пользователя {user.id}: {feedback_type}")
         else:
@@ -92,6 +107,34 @@ async def process_feedback_message(message: Message, state: FSMContext):
         )
         await state.clear()
 
+@router.message(StateFilter(None), F.reply_to_message, F.text, MagicData(F.is_admin))
+async def admin_feedback_reply(message: Message):
+    """Ответ администратора на уведомление об обратной связи"""
+    reply_to = message.reply_to_message
+    feedback = await db.get_feedback_by_notification(reply_to.chat.id, reply_to.message_id)
+    if not feedback:
+        # Обычный ответ на сообщение, не на уведомление
+        raise SkipHandler()
+    
+    try:
+        response = render("FEEDBACK_RESPONSE", message=feedback["message"], response=message.text)
+        # Лимиты и повтор после flood-wait обеспечивает планировщик исходящих сообщений
+        await message.bot.send_message(feedback["user_id"], response)
+    except (TelegramForbiddenError, TelegramBadRequest) as e:
+        logger.warning(f"Не удалось доставить ответ на обратную связь {feedback['id']}: {e}")
+        await message.reply("❌ Не удалось доставить ответ: пользователь заблокировал бота или удалил чат.")
+        return
+    except Exception as e:
+        logger.error(f"Ошибка при отправке ответа на обратную связь {feedback['id']}: {e}")
+        await message.reply("❌ Произошла ошибка при отправке ответа. Попробуйте еще раз.")
+        return
+    
+    if await db.save_feedback_response(feedback["id"], message.from_user.id, message.text):
+        await message.reply("✅ Ответ отправлен пользователю.")
+    else:
+        await message.reply("⚠️ Ответ отправлен пользователю, но не сохранен в базе.")
+    logger.info(f"Администратор {message.from_user.id} ответил на обратную связь {feedback['id']}")
+
 def register_feedback_handlers(dp):
     """Регистрация обработчиков обратной связи"""
     dp.include_router(router) 
\ No newline at end of file
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Загрузка видео-гайдов из локальной папки в Telegram
+
+Использование:
+    python ingest_videos.py [папка] [--chat-id ID]
+
+Файлы раскладываются по категориям: <папка>/<категория>/<файл>.mp4.
+Каждый файл загружается один раз; повторный запуск загружает только новые
+файлы и продолжает прерванную загрузку.
+"""
+import argparse
+import asyncio
+import sys
+
+from aiogram import Bot
+from aiogram.enums import ParseMode
+from loguru import logger
+
+from config.settings import get_settings
+from database.database import init_db, close_db
+from utils.outbound import get_scheduler, setup_outbound
+from utils.video_ingest import ingest_videos
+
+
+async def main() -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Загрузка видео-гайдов из локальной папки")
+    parser.add_argument("media_dir", nargs="?", default=settings.media_dir,
+                        help=f"папка с видео (по умолчанию {settings.media_dir})")
+    parser.add_argument("--chat-id", type=int, default=None,
+                        help="чат, через который загружаются файлы (по умолчанию первый из ADMIN_IDS)")
+    args = parser.parse_args()
+
+    chat_id = args.chat_id or (settings.admin_ids[0] if settings.admin_ids else None)
+    if not chat_id:
+        logger.error("Укажите --chat-id или ADMIN_IDS")
+        return 1
+
+    await init_db()
+    bot = Bot(token=settings.bot_token, parse_mode=ParseMode.HTML)
+    setup_outbound(bot)
+    try:
+        result = await ingest_videos(bot, args.media_dir, chat_id)
+    finally:
+        await get_scheduler().close()
+        await bot.session.close()
+        await close_db()
+
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -2,24 +2,68 @@
 HTTP endpoint для предотвращения автосна на Render.com
 """
 from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from utils.health import get_health
+from utils.metrics import registry
 import asyncio
 import logging
+from typing import Any, Callable, Dict
 
-async def health_check(request):
-    """Простой endpoint для проверки здоровья"""
+def _health_response(health: Dict[str, Any], passed: bool) -> web.Response:
     return web.json_response({
-        "status": "ok", 
-        "message": "Bot is alive"
-    })
+        "status": "ok" if passed else "fail",
+        "checks": health["checks"]
+    }, status=200 if passed else 503)
+
+async def health_check(request):
+    """Liveness: 503, только если бот завис (база, polling, цикл событий)"""
+    health = await get_health()
+    return _health_response(health, health["live"])
+
+async def readiness_check(request):
+    """Readiness: 503 при любой неуспешной проверке, в том числе при перегрузке"""
+    health = await get_health()
+    return _health_response(health, health["ready"])
+
+async def metrics(request):
+    """Метрики бота в текстовом формате Prometheus"""
+    return web.Response(
+        body=registry.render().encode("utf-8"),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
 
 async def create_web_server():
     """Создаем веб-сервер для keep-alive"""
     app = web.Application()
     app.router.add_get('/health', health_check)
+    app.router.add_get('/ready', readiness_check)
     app.router.add_get('/', health_check)
+    app.router.add_get('/metrics', metrics)
     
     return app
 
+def setup_webhook(app: web.Application, dispatcher: Dispatcher, bot: Bot,
+                  path: str, secret_token: str):
+    """Прием обновлений Telegram на том же веб-сервере"""
+    SimpleRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        secret_token=secret_token
+    ).register(app, path=path)
+    setup_application(app, dispatcher, bot=bot)
+
+def setup_update_forwarding(app: web.Application, path: str, secret_token: str,
+                            forward: Callable[[Dict[str, Any]], None]):
+    """Прием обновлений Telegram без обработки: forward передает их процессам-обработчикам"""
+    async def handle_update(request: web.Request):
+        if request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret_token:
+            return web.Response(status=401)
+        forward(await request.json())
+        return web.Response()
+    
+    app.router.add_post(path, handle_update)
+
 async def start_web_server(app, port=8000):
     """Запускаем веб-сервер"""
     runner = web.AppRunner(app)
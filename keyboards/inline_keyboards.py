@@ -1,6 +1,41 @@
+from functools import lru_cache
+from typing import Dict
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
-from config.content import FLOOR_NUMBERS, VIDEO_CATEGORIES
+from config.content import FEEDBACK_TYPES, FLOOR_NUMBERS, VIDEO_CATEGORIES
 
+# Клавиатуры не меняются между запросами, поэтому строятся один раз и кэшируются.
+# Клавиатуры с данными, которые меняет администратор, сбрасываются через invalidate_keyboards().
+
+# Группы этажей: (текст кнопки, этажи группы, ссылка по умолчанию)
+FLOOR_CHAT_GROUPS = [
+    ("❤️ 2-3 этажи", (2, 3), "https://t.me/+PpzqjAhVIaZhODVi"),
+    ("🧡 4-5 этажи", (4, 5), "https://t.me/+71VFxPGs19tmZWI6"),
+    ("💛 6-7 этажи", (6, 7), "https://t.me/+ZrlWgxCdMYg5MDJi"),
+    ("💚 8-9 этажи", (8, 9), "https://t.me/+nctBTwVabnIxZjFi"),
+    ("🩵 10-11 этажи", (10, 11), "https://t.me/+f32Cs8l5nJQ0NjVi"),
+    ("💙 12-13 этажи", (12, 13), "https://t.me/+sLFbAwIKAWQ1ZTBi"),
+]
+
+# Ссылки на чаты этажей, измененные администратором (таблица floor_chats)
+_floor_chat_links: Dict[int, str] = {}
+
+def set_floor_chat_link(floor_number: int, chat_link: str):
+    """Обновление ссылки на чат этажа и сброс клавиатуры чатов"""
+    _floor_chat_links[floor_number] = chat_link
+    get_floor_chats_keyboard.cache_clear()
+
+def _floor_group_link(floors, default_link: str) -> str:
+    for floor_number in floors:
+        if floor_number in _floor_chat_links:
+            return _floor_chat_links[floor_number]
+    return default_link
+
+def invalidate_keyboards():
+    """Сброс всех закэшированных клавиатур"""
+    for keyboard_factory in _CACHED_KEYBOARDS:
+        keyboard_factory.cache_clear()
+
+@lru_cache(maxsize=1)
 def get_main_menu_keyboard() -> InlineKeyboardMarkup:
     """Главное меню бота"""
     keyboard = [
@@ -15,6 +50,7 @@ def get_main_menu_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1)
 def get_back_to_main_keyboard() -> InlineKeyboardMarkup:
     """Кнопка возврата в главное меню"""
     keyboard = [
@@ -22,6 +58,7 @@ def get_back_to_main_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=32)
 def get_back_keyboard(callback_data: str) -> InlineKeyboardMarkup:
     """Кнопки назад и в главное меню"""
     keyboard = [
@@ -30,6 +67,24 @@ def get_back_keyboard(callback_data: str) -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=32)
+def get_video_page_keyboard(category: str, page: int, pages: int) -> InlineKeyboardMarkup:
+    """Листание альбомов видео категории"""
+    keyboard = []
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"video_page:{category}:{page - 1}"))
+    if page < pages - 1:
+        navigation.append(InlineKeyboardButton(text="Еще видео ➡️", callback_data=f"video_page:{category}:{page + 1}"))
+    if navigation:
+        keyboard.append(navigation)
+    keyboard.extend([
+        [InlineKeyboardButton(text="◀️ К категориям", callback_data="video_guide")],
+        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")]
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+@lru_cache(maxsize=1)
 def get_student_council_keyboard() -> InlineKeyboardMarkup:
     """Меню студенческого совета"""
     keyboard = [
@@ -37,20 +92,18 @@ def get_student_council_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1)
 def get_floor_chats_keyboard() -> InlineKeyboardMarkup:
     """Выбор группы этажей для чата"""
     keyboard = [
-        [InlineKeyboardButton(text="❤️ 2-3 этажи", url="https://t.me/+PpzqjAhVIaZhODVi")],
-        [InlineKeyboardButton(text="🧡 4-5 этажи", url="https://t.me/+71VFxPGs19tmZWI6")],
-        [InlineKeyboardButton(text="💛 6-7 этажи", url="https://t.me/+ZrlWgxCdMYg5MDJi")],
-        [InlineKeyboardButton(text="💚 8-9 этажи", url="https://t.me/+nctBTwVabnIxZjFi")],
-        [InlineKeyboardButton(text="🩵 10-11 этажи", url="https://t.me/+f32Cs8l5nJQ0NjVi")],
-        [InlineKeyboardButton(text="💙 12-13 этажи", url="https://t.me/+sLFbAwIKAWQ1ZTBi")],
-        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")]
+        [InlineKeyboardButton(text=text, url=_floor_group_link(floors, default_link))]
+        for text, floors, default_link in FLOOR_CHAT_GROUPS
     ]
+    keyboard.append([InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")])
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1)
 def get_video_categories_keyboard() -> InlineKeyboardMarkup:
     """Категории видео-гайдов"""
     keyboard = []
@@ -71,6 +124,7 @@ def get_video_categories_keyboard() -> InlineKeyboardMarkup:
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1)
 def get_contacts_keyboard() -> InlineKeyboardMarkup:
     """Категории контактов"""
     keyboard = [
@@ -83,6 +137,7 @@ def get_contacts_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1)
 def get_feedback_type_keyboard() -> InlineKeyboardMarkup:
     """Типы обратной связи"""
     keyboard = [
@@ -96,6 +151,7 @@ def get_feedback_type_keyboard() -> InlineKeyboardMarkup:
 
 # Административные клавиатуры
 
+@lru_cache(maxsize=1)
 def get_admin_panel_keyboard() -> InlineKeyboardMarkup:
     """Панель администратора"""
     keyboard = [
@@ -109,6 +165,7 @@ def get_admin_panel_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1)
 def get_admin_content_keyboard() -> InlineKeyboardMarkup:
     """Редактирование контента"""
     keyboard = [
@@ -122,6 +179,7 @@ def get_admin_content_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1)
 def get_admin_stats_keyboard() -> InlineKeyboardMarkup:
     """Статистика - дополнительные опции"""
     keyboard = [
@@ -132,6 +190,56 @@ def get_admin_stats_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1)
+def get_export_format_keyboard() -> InlineKeyboardMarkup:
+    """Выбор формата выгрузки данных"""
+    keyboard = [
+        [
+            InlineKeyboardButton(text="📄 CSV", callback_data="export_stats:csv"),
+            InlineKeyboardButton(text="🧾 JSON", callback_data="export_stats:json")
+        ],
+        [InlineKeyboardButton(text="◀️ Назад", callback_data="admin_stats")]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+# Не кэшируется: курсоры страниц почти не повторяются
+def get_feedback_inbox_keyboard(feedback_type: str = "all", newest_id: int = 0, oldest_id: int = 0,
+                                has_newer: bool = False, has_older: bool = False) -> InlineKeyboardMarkup:
+    """Страница обратной связи: листание, отметка прочитанным и фильтр по типу"""
+    keyboard = []
+    
+    navigation = []
+    if has_newer:
+        navigation.append(InlineKeyboardButton(
+            text="⬅️ Новее", callback_data=f"feedback_page:{feedback_type}:newer:{newest_id}"
+        ))
+    if has_older:
+        navigation.append(InlineKeyboardButton(
+            text="Старее ➡️", callback_data=f"feedback_page:{feedback_type}:older:{oldest_id}"
+        ))
+    if navigation:
+        keyboard.append(navigation)
+    
+    if newest_id:
+        keyboard.append([InlineKeyboardButton(
+            text="✅ Отметить страницу прочитанной",
+            callback_data=f"feedback_read:{feedback_type}:{newest_id}:{oldest_id}"
+        )])
+    
+    filters = [("all", "📬 Все")] + list(FEEDBACK_TYPES.items())
+    buttons = [
+        InlineKeyboardButton(
+            text=f"• {title}" if type_id == feedback_type else title,
+            callback_data=f"feedback_page:{type_id}:older:0"
+        )
+        for type_id, title in filters
+    ]
+    keyboard.extend(buttons[i:i + 2] for i in range(0, len(buttons), 2))
+    
+    keyboard.append([InlineKeyboardButton(text="◀️ Назад", callback_data="admin_panel")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+@lru_cache(maxsize=1)
 def get_broadcast_confirm_keyboard() -> InlineKeyboardMarkup:
     """Подтверждение массовой рассылки"""
     keyboard = [
@@ -141,6 +249,20 @@ def get_broadcast_confirm_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=32)
+def get_broadcast_control_keyboard(broadcast_id: int, paused: bool = False) -> InlineKeyboardMarkup:
+    """Управление идущей рассылкой"""
+    if paused:
+        toggle = InlineKeyboardButton(text="▶️ Продолжить", callback_data=f"broadcast_resume:{broadcast_id}")
+    else:
+        toggle = InlineKeyboardButton(text="⏸ Пауза", callback_data=f"broadcast_pause:{broadcast_id}")
+    keyboard = [
+        [toggle],
+        [InlineKeyboardButton(text="⏹ Остановить", callback_data=f"broadcast_stop:{broadcast_id}")]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+@lru_cache(maxsize=1)
 def get_video_management_keyboard() -> InlineKeyboardMarkup:
     """Управление видео"""
     keyboard = []
@@ -161,8 +283,19 @@ def get_video_management_keyboard() -> InlineKeyboardMarkup:
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1)
+def get_video_upload_category_keyboard() -> InlineKeyboardMarkup:
+    """Выбор категории для загрузки видео"""
+    keyboard = [
+        [InlineKeyboardButton(text=category_info["name"], callback_data=f"admin_video_{category_id}")]
+        for category_id, category_info in VIDEO_CATEGORIES.items()
+    ]
+    keyboard.append([InlineKeyboardButton(text="◀️ Назад", callback_data="admin_videos")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
 # Reply клавиатуры
 
+@lru_cache(maxsize=1)
 def get_start_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура для первого запуска бота"""
     keyboard = [
@@ -175,10 +308,22 @@ def get_start_keyboard() -> ReplyKeyboardMarkup:
         input_field_placeholder="Нажмите 'Начать' чтобы открыть меню бота"
     )
 
+@lru_cache(maxsize=1)
 def remove_keyboard() -> ReplyKeyboardMarkup:
     """Убирает Reply клавиатуру"""
     return ReplyKeyboardMarkup(
         keyboard=[], 
         resize_keyboard=True,
         remove_keyboard=True
-    ) 
\ No newline at end of file
+    ) 
+
+_CACHED_KEYBOARDS = [
+    get_main_menu_keyboard, get_back_to_main_keyboard, get_back_keyboard, get_video_page_keyboard,
+    get_student_council_keyboard, get_floor_chats_keyboard, get_video_categories_keyboard,
+    get_contacts_keyboard, get_feedback_type_keyboard, get_admin_panel_keyboard,
+    get_admin_content_keyboard, get_admin_stats_keyboard, get_export_format_keyboard,
+    get_broadcast_confirm_keyboard,
+    get_broadcast_control_keyboard, get_video_management_keyboard,
+    get_video_upload_category_keyboard, get_start_keyboard,
+    remove_keyboard
+]
@@ -1,56 +1,178 @@
 import asyncio
 import logging
 import os
+import secrets
+import signal
+from typing import Optional, Tuple
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
-from config.settings import get_settings
-from database.database import init_db
+from aiogram.fsm.storage.base import BaseStorage
+from config.settings import get_settings, reload_settings
+from config.templates import SETTING_PREFIX, templates
+from database.database import db, init_db, close_db
+from database.fsm_storage import create_fsm_storage
 from handlers import register_handlers
+from keyboards.inline_keyboards import set_floor_chat_link
+from middlewares import register_middlewares
 from loguru import logger
-from keep_alive import create_web_server, start_web_server
+from keep_alive import create_web_server, setup_webhook, start_web_server
+from utils.broadcast import resume_broadcasts, stop_broadcasts
+from utils.health import watch_polling
+from utils.maintenance import start_maintenance, stop_maintenance
+from utils.metrics import start_loop_monitor, stop_loop_monitor
+from utils.outbound import get_scheduler, setup_outbound
+from utils.video_albums import invalidate_video_albums
+from utils.video_ingest import stop_ingest
+
+def _reload_settings_on_signal():
+    """Перезагрузка настроек по SIGHUP"""
+    try:
+        reload_settings()
+    except Exception as e:
+        logger.error(f"Не удалось перезагрузить настройки: {e}")
+
+async def wait_for_shutdown():
+    """Ожидание SIGINT/SIGTERM (в режиме webhook нет цикла polling, который их обрабатывает)"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    await stop_event.wait()
+
+async def setup_bot(settings) -> Tuple[Bot, Dispatcher, BaseStorage]:
+    """База данных, кэши, бот и диспетчер с обработчиками"""
+    # Задержка цикла событий для /metrics
+    start_loop_monitor()
+    
+    # Инициализация базы данных
+    await init_db()
+    logger.info("База данных инициализирована")
+    
+    # Ссылки на чаты этажей из базы попадают в закэшированную клавиатуру
+    for floor_number, chat_link in (await db.get_floor_chats()).items():
+        set_floor_chat_link(floor_number, chat_link)
+    db.subscribe("floor_chat", set_floor_chat_link)
+    
+    # Тексты, измененные администратором, заменяют тексты из config/content.py
+    templates.load_overrides(await db.get_settings_by_prefix(SETTING_PREFIX))
+    db.subscribe("setting", templates.on_setting_changed)
+    
+    # Подготовленные альбомы видео сбрасываются при добавлении видео
+    db.subscribe("videos", invalidate_video_albums)
+    
+    # Инициализация бота и диспетчера
+    bot = Bot(
+        token=settings.bot_token,
+        parse_mode=ParseMode.HTML
+    )
+    # Все исходящие запросы проходят через общий планировщик с лимитами Telegram
+    setup_outbound(bot)
+    # Состояния диалогов сохраняются между перезапусками
+    fsm_storage = create_fsm_storage(
+        settings.fsm_storage,
+        db.pool,
+        ttl=settings.fsm_state_ttl,
+        cache_size=settings.fsm_cache_size,
+        flush_interval=settings.fsm_flush_interval,
+        redis_url=settings.redis_url
+    )
+    dp = Dispatcher(storage=fsm_storage)
+    
+    # Регистрация middleware и обработчиков
+    register_middlewares(dp)
+    register_handlers(dp)
+    logger.info("Обработчики зарегистрированы")
+    return bot, dp, fsm_storage
+
+async def start_background_jobs(bot: Bot):
+    """Продолжение прерванных рассылок и периодическое обслуживание базы"""
+    await resume_broadcasts(bot)
+    # Очистка старых событий статистики (сводки по дням сохраняются)
+    start_maintenance()
+
+async def shutdown_bot(bot: Optional[Bot], fsm_storage: Optional[BaseStorage]):
+    """Остановка фоновых задач и закрытие соединений"""
+    await stop_broadcasts()
+    await stop_ingest()
+    await stop_maintenance()
+    await stop_loop_monitor()
+    await get_scheduler().close()
+    if bot:
+        await bot.session.close()
+    if fsm_storage:
+        await fsm_storage.close()
+    await close_db()
 
 async def main():
     """Основная функция запуска бота"""
+    # Загружаем настройки
+    settings = get_settings()
+    if settings.bot_workers > 1:
+        # Один процесс получает обновления, обработчики работают в BOT_WORKERS процессах
+        from cluster import run_cluster
+        await run_cluster(settings)
+        return
+    
     bot = None
+    fsm_storage = None
     web_runner = None
+    webhook_mode = False
     try:
-        # Загружаем настройки
-        settings = get_settings()
+        bot, dp, fsm_storage = await setup_bot(settings)
         
-        # Инициализация базы данных
-        await init_db()
-        logger.info("База данных инициализирована")
+        webhook_mode = settings.bot_mode == "webhook"
+        if webhook_mode and not settings.webhook_url:
+            raise ValueError("Для BOT_MODE=webhook нужен WEBHOOK_URL")
+        # Без заданного секрета генерируем новый при каждом запуске: webhook все равно переустанавливается
+        webhook_secret = settings.webhook_secret or secrets.token_urlsafe(32)
         
-        # Инициализация бота и диспетчера
-        bot = Bot(
-            token=settings.bot_token,
-            parse_mode=ParseMode.HTML
-        )
-        dp = Dispatcher()
+        # HTTP-сервер: health-check для Render.com, /metrics и прием обновлений в режиме webhook
+        if webhook_mode or os.getenv("RENDER") or settings.metrics_enabled:
+            web_app = await create_web_server()
+            if webhook_mode:
+                setup_webhook(web_app, dp, bot, settings.webhook_path, webhook_secret)
+            web_runner = await start_web_server(web_app, settings.web_port)
+            logger.info(f"HTTP сервер запущен на порту {settings.web_port}")
         
-        # Регистрация обработчиков
-        register_handlers(dp)
-        logger.info("Обработчики зарегистрированы")
+        # Перезагрузка настроек без перезапуска: kill -HUP <pid>
+        if hasattr(signal, "SIGHUP"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, _reload_settings_on_signal)
         
-        # Запуск HTTP-сервера для предотвращения автосна (если на Render.com)
-        if os.getenv("RENDER"):
-            web_app = await create_web_server()
-            port = int(os.getenv("PORT", 8000))
-            web_runner = await start_web_server(web_app, port)
-            logger.info(f"HTTP сервер запущен на порту {port} для предотвращения автосна")
+        # Продолжаем рассылки, прерванные перезапуском, и запускаем обслуживание базы
+        await start_background_jobs(bot)
         
         # Запуск бота
-        logger.info("Бот запущен")
-        await dp.start_polling(bot)
+        if webhook_mode:
+            await bot.set_webhook(
+                url=settings.webhook_url + settings.webhook_path,
+                secret_token=webhook_secret,
+                allowed_updates=dp.resolve_used_update_types()
+            )
+            logger.info(f"Бот запущен в режиме webhook: {settings.webhook_url}{settings.webhook_path}")
+            await wait_for_shutdown()
+        else:
+            # getUpdates не работает, пока установлен webhook
+            await bot.delete_webhook()
+            # /health перестает проходить, если polling остановился
+            watch_polling(bot)
+            logger.info("Бот запущен в режиме polling")
+            await dp.start_polling(bot)
         
     except Exception as e:
         logger.error(f"Ошибка при запуске бота: {e}")
         raise
     finally:
-        if bot:
-            await bot.session.close()
+        if bot and webhook_mode:
+            try:
+                await bot.delete_webhook()
+            except Exception as e:
+                logger.warning(f"Не удалось удалить webhook: {e}")
         if web_runner:
             await web_runner.cleanup()
+        await shutdown_bot(bot, fsm_storage)
 
 if __name__ == "__main__":
     # Настройка логирования
@@ -0,0 +1,23 @@
+from aiogram import Dispatcher
+from config.settings import get_settings
+from .activity import ActivityMiddleware
+from .admin import AdminMiddleware
+from .metrics import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+
+def register_middlewares(dp: Dispatcher):
+    """Регистрация middleware"""
+    # Количество и время обработки обновлений и каждого обработчика для /metrics
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    handler_metrics = HandlerMetricsMiddleware()
+    dp.message.middleware(handler_metrics)
+    dp.callback_query.middleware(handler_metrics)
+    
+    # Флаг администратора доступен обработчикам как аргумент is_admin
+    admin_middleware = AdminMiddleware()
+    dp.message.outer_middleware(admin_middleware)
+    dp.callback_query.outer_middleware(admin_middleware)
+    
+    # Активность пользователей отмечается здесь, а не в каждом обработчике
+    activity_middleware = ActivityMiddleware(get_settings().activity_debounce)
+    dp.message.outer_middleware(activity_middleware)
+    dp.callback_query.outer_middleware(activity_middleware)
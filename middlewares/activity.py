@@ -0,0 +1,47 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from database.database import db
+
+# Сколько пользователей помнить до очистки устаревших записей
+MAX_TRACKED_USERS = 10000
+
+
+class ActivityMiddleware(BaseMiddleware):
+    """Отмечает активность пользователя до вызова обработчика.
+    
+    Время попадает в буфер отложенной записи (без обращения к базе), а повторные
+    отметки одного пользователя чаще раза в debounce секунд отбрасываются.
+    """
+
+    def __init__(self, debounce: float = 60.0):
+        self.debounce = debounce
+        # Пользователь -> момент последней отметки по time.monotonic()
+        self._last_seen: Dict[int, float] = {}
+
+    def _forget_stale(self, now: float):
+        self._last_seen = {
+            user_id: seen
+            for user_id, seen in self._last_seen.items()
+            if now - seen < self.debounce
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user: User = data.get("event_from_user")
+        if user:
+            now = time.monotonic()
+            last_seen = self._last_seen.get(user.id)
+            if last_seen is None or now - last_seen >= self.debounce:
+                if len(self._last_seen) >= MAX_TRACKED_USERS:
+                    self._forget_stale(now)
+                self._last_seen[user.id] = now
+                await db.update_user_activity(user.id)
+        return await handler(event, data)
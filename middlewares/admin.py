@@ -0,0 +1,20 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from database.database import is_admin
+
+
+class AdminMiddleware(BaseMiddleware):
+    """Добавляет в данные обработчика флаг is_admin (из кэша администраторов)"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user: User = data.get("event_from_user")
+        data["is_admin"] = bool(user) and await is_admin(user.id)
+        return await handler(event, data)
@@ -0,0 +1,71 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.types import TelegramObject, Update
+
+from utils.health import mark_update
+from utils.metrics import registry
+
+UPDATES = registry.counter(
+    "bot_updates_total", "Полученные обновления по типам", ("type",)
+)
+UPDATE_DURATION = registry.histogram(
+    "bot_update_duration_seconds", "Время обработки обновления целиком", ("type",)
+)
+HANDLER_DURATION = registry.histogram(
+    "bot_handler_duration_seconds", "Время работы обработчика", ("handler",)
+)
+HANDLER_ERRORS = registry.counter(
+    "bot_handler_errors_total", "Исключения, вышедшие из обработчика", ("handler",)
+)
+
+
+def handler_name(callback: Callable) -> str:
+    """Имя обработчика для метки: модуль.функция"""
+    module = getattr(callback, "__module__", "") or ""
+    return f"{module.rsplit('.', 1)[-1]}.{getattr(callback, '__name__', type(callback).__name__)}"
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Считает обновления и время их обработки (outer middleware на dp.update)"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        mark_update()
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            update_type = event.event_type
+            UPDATES.inc(update_type)
+            UPDATE_DURATION.observe(time.perf_counter() - started, update_type)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Время работы и ошибки каждого обработчика (inner middleware)"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        name = handler_name(data["handler"].callback)
+        started = time.perf_counter()
+        try:
+            result = await handler(event, data)
+        except SkipHandler:
+            # Обработчик отказался от события, его обработает следующий
+            raise
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            HANDLER_DURATION.observe(time.perf_counter() - started, name)
+            raise
+        HANDLER_DURATION.observe(time.perf_counter() - started, name)
+        return result
@@ -1,8 +1,8 @@
-from config.content import WELCOME_MESSAGE
+from config.templates import render
 
-# Тестируем форматирование
+# Тестируем подстановку через реестр шаблонов (как в обработчике /start)
 try:
-    result = WELCOME_MESSAGE.format(first_name="Тест")
+    result = render("WELCOME_MESSAGE", first_name="Тест")
     print("✅ Форматирование работает:")
     print(result[:200] + "...")
 except Exception as e:
@@ -0,0 +1,55 @@
+"""
+Общая настройка тестов
+
+Модули бота читают настройки из окружения при импорте, поэтому до импорта
+задаются тестовый токен и база во временном каталоге.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="bot-tests-"), "bot.db"))
+
+
+@pytest.fixture
+def far_timezone(monkeypatch):
+    """Локальное время процесса на 10 часов впереди UTC"""
+    monkeypatch.setenv("TZ", "Asia/Vladivostok")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "bot.db")
+
+
+@pytest.fixture
+def with_database(db_path):
+    """Выполнение сценария scenario(database) с базой во временном каталоге"""
+    from database.database import Database
+
+    def run(scenario, **options):
+        async def main():
+            database = Database(db_path, **{"write_buffer_interval": 60, **options})
+            await database.connect()
+            try:
+                await database.init_database()
+                await scenario(database)
+            finally:
+                await database.close()
+
+        asyncio.run(main())
+
+    return run
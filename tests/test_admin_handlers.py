@@ -0,0 +1,204 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, SendMessage, TelegramMethod
+from aiogram.types import CallbackQuery, Chat, Document, Message, Update, User
+
+from handlers import admin_handlers, register_handlers
+from handlers.admin_handlers import AdminStates
+
+ADMIN_ID = 1001
+
+_dispatcher = None
+
+
+def dispatcher() -> Dispatcher:
+    """Диспетчер со всеми роутерами бота (роутер подключается только один раз)"""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = Dispatcher(storage=MemoryStorage())
+        register_handlers(_dispatcher)
+    # Состояния FSM не переходят из одного теста в другой
+    _dispatcher.fsm.storage = MemoryStorage()
+    return _dispatcher
+
+
+class RecordingSession(BaseSession):
+    """Сессия без сети: запоминает запросы к Bot API"""
+
+    def __init__(self, errors: Dict[type, Exception] = None):
+        super().__init__()
+        self.requests: List[TelegramMethod] = []
+        # Тип метода -> ошибка, которую вернет Telegram
+        self.errors = errors or {}
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Any = None):
+        self.requests.append(method)
+        if type(method) in self.errors:
+            raise self.errors[type(method)]
+        if isinstance(method, SendMessage):
+            return Message(
+                message_id=len(self.requests),
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type="private"),
+                text=method.text
+            )
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+def text_update(text: str) -> Update:
+    user = User(id=ADMIN_ID, is_bot=False, first_name="Админ")
+    return Update(update_id=1, message=Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=ADMIN_ID, type="private"),
+        from_user=user,
+        text=text
+    ))
+
+
+def test_cancel_is_not_taken_as_admin_input():
+    async def scenario():
+        session = RecordingSession()
+        bot = Bot("123456:TEST", session=session)
+        dp = dispatcher()
+        storage = dp.storage
+        key = StorageKey(bot_id=bot.id, chat_id=ADMIN_ID, user_id=ADMIN_ID)
+
+        # Черновик рассылки и новое значение текста: /cancel отменяет действие
+        for state in (AdminStates.waiting_for_broadcast_message, AdminStates.waiting_for_setting_value):
+            session.requests.clear()
+            await storage.set_state(key, state)
+            await dp.feed_update(bot, text_update("/cancel"))
+
+            assert await storage.get_state(key) is None
+            texts = [request.text for request in session.requests if isinstance(request, SendMessage)]
+            assert texts == ["❌ Действие отменено."]
+
+    asyncio.run(scenario())
+
+
+class FakeStatsDb:
+    """Статистика без базы: данные не меняются, как при действующем кэше"""
+
+    async def get_user_stats(self):
+        return {"total_users": 10}
+
+    async def get_feedback_stats(self):
+        return {}
+
+    async def get_popular_sections(self):
+        return []
+
+
+def callback_update(data: str) -> Update:
+    user = User(id=ADMIN_ID, is_bot=False, first_name="Админ")
+    message = Message(
+        message_id=5,
+        date=datetime.now(),
+        chat=Chat(id=ADMIN_ID, type="private"),
+        text="Статистика"
+    )
+    return Update(update_id=2, callback_query=CallbackQuery(
+        id="1", from_user=user, chat_instance="1", message=message, data=data
+    ))
+
+
+def test_refresh_with_unchanged_stats_answers_once(monkeypatch):
+    async def is_admin(user_id):
+        return True
+
+    monkeypatch.setattr(admin_handlers, "check_admin_rights", is_admin)
+    monkeypatch.setattr(admin_handlers, "db", FakeStatsDb())
+
+    async def scenario():
+        not_modified = TelegramBadRequest(
+            method=EditMessageText(text="x"),
+            message="Bad Request: message is not modified"
+        )
+        session = RecordingSession(errors={EditMessageText: not_modified})
+        bot = Bot("123456:TEST", session=session)
+        await dispatcher().feed_update(bot, callback_update("refresh_stats"))
+
+        answers = [request for request in session.requests if isinstance(request, AnswerCallbackQuery)]
+        assert [answer.text for answer in answers] == ["📊 Статистика обновлена!"]
+
+    asyncio.run(scenario())
+
+
+def test_video_sent_as_file_is_not_stored(monkeypatch):
+    added = []
+
+    class FakeVideoDb:
+        async def add_video(self, *args):
+            added.append(args)
+            return 1
+
+    async def is_admin(user_id):
+        return True
+
+    monkeypatch.setattr(admin_handlers, "check_admin_rights", is_admin)
+    monkeypatch.setattr(admin_handlers, "db", FakeVideoDb())
+
+    async def scenario():
+        session = RecordingSession()
+        bot = Bot("123456:TEST", session=session)
+        dp = dispatcher()
+        key = StorageKey(bot_id=bot.id, chat_id=ADMIN_ID, user_id=ADMIN_ID)
+        await dp.storage.set_state(key, AdminStates.waiting_for_video_upload)
+
+        # Альбомы отправляются как InputMediaVideo, поэтому документ не сохраняется
+        update = Update(update_id=3, message=Message(
+            message_id=3,
+            date=datetime.now(),
+            chat=Chat(id=ADMIN_ID, type="private"),
+            from_user=User(id=ADMIN_ID, is_bot=False, first_name="Админ"),
+            document=Document(file_id="doc", file_unique_id="doc", file_name="guide.mp4", mime_type="video/mp4")
+        ))
+        await dp.feed_update(bot, update)
+
+        assert added == []
+        assert await dp.storage.get_state(key) == AdminStates.waiting_for_video_upload.state
+        texts = [request.text for request in session.requests if isinstance(request, SendMessage)]
+        assert len(texts) == 1 and "а не файлом" in texts[0]
+
+    asyncio.run(scenario())
+
+
+def test_reload_command_reaches_admin_router(monkeypatch):
+    reloads = []
+
+    class FakeEventsDb:
+        def publish(self, event):
+            reloads.append(event)
+
+    async def is_admin(user_id):
+        return True
+
+    monkeypatch.setattr(admin_handlers, "check_admin_rights", is_admin)
+    monkeypatch.setattr(admin_handlers, "db", FakeEventsDb())
+    monkeypatch.setattr(admin_handlers, "reload_settings", lambda: None)
+
+    async def scenario():
+        session = RecordingSession()
+        bot = Bot("123456:TEST", session=session)
+        # Без состояния текст ловит общий обработчик basic_handlers, подключенный раньше админского
+        await dispatcher().feed_update(bot, text_update("/reload"))
+
+        assert reloads == ["reload"]
+        texts = [request.text for request in session.requests if isinstance(request, SendMessage)]
+        assert texts == ["🔄 Настройки перезагружены."]
+
+    asyncio.run(scenario())
@@ -0,0 +1,35 @@
+import queue
+
+from cluster import Cluster, shard_key
+from config.settings import get_settings
+from database.database import db
+
+
+def test_shard_key_prefers_user_then_chat():
+    assert shard_key({"update_id": 1, "message": {"from": {"id": 7}, "chat": {"id": -100}}}) == 7
+    assert shard_key({"update_id": 2, "channel_post": {"chat": {"id": -100}}}) == -100
+    assert shard_key({"update_id": 3}) == 3
+
+
+def test_sighup_reload_reaches_every_worker():
+    cluster = Cluster(3)
+    cluster.reload_settings()
+    for worker_queue in cluster.queues:
+        assert worker_queue.get(timeout=5) == ("event", "reload", ())
+        try:
+            worker_queue.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            raise AssertionError("лишнее событие в очереди")
+
+
+def test_reload_event_rereads_settings(monkeypatch):
+    monkeypatch.setenv("ADMIN_IDS", "11,22")
+    db.apply_event("reload")
+    assert get_settings().admin_ids == (11, 22)
+
+    # Ошибка в настройках не должна останавливать обработчик
+    monkeypatch.setenv("ADMIN_IDS", "abc")
+    db.apply_event("reload")
+    assert get_settings().admin_ids == (11, 22)
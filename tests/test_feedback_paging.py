@@ -0,0 +1,77 @@
+async def add_feedback(database, count, feedback_type="complaint", created_at="2024-05-01 12:00:00"):
+    """Сообщения с одинаковым created_at: порядок внутри секунды задает id"""
+    ids = []
+    for number in range(count):
+        feedback_id = await database.add_feedback(1, feedback_type, f"Сообщение {number}")
+        ids.append(feedback_id)
+    async with database.pool.writer() as db:
+        await db.executemany(
+            "UPDATE feedback SET created_at = ? WHERE id = ?",
+            [(created_at, feedback_id) for feedback_id in ids]
+        )
+    return ids
+
+
+def page_ids(page):
+    return [item["id"] for item in page[0]]
+
+
+def test_pages_walk_older_and_back(with_database):
+    async def scenario(database):
+        ids = await add_feedback(database, 12)
+        newest_first = ids[::-1]
+
+        first = await database.get_feedback_page(limit=5)
+        assert page_ids(first) == newest_first[:5]
+        assert first[1:] == (False, True)
+
+        second = await database.get_feedback_page(cursor_id=newest_first[4], limit=5)
+        assert page_ids(second) == newest_first[5:10]
+        assert second[1:] == (True, True)
+
+        last = await database.get_feedback_page(cursor_id=newest_first[9], limit=5)
+        assert page_ids(last) == newest_first[10:]
+        assert last[1:] == (True, False)
+
+        # Назад к более новым от первой строки последней страницы
+        back = await database.get_feedback_page(cursor_id=newest_first[10], older=False, limit=5)
+        assert page_ids(back) == newest_first[5:10]
+        assert back[1:] == (True, True)
+
+        front = await database.get_feedback_page(cursor_id=newest_first[5], older=False, limit=5)
+        assert page_ids(front) == newest_first[:5]
+        assert front[1] is False
+
+    with_database(scenario)
+
+
+def test_newer_messages_ordered_by_time_before_id(with_database):
+    async def scenario(database):
+        later = await add_feedback(database, 2, created_at="2024-05-02 08:00:00")
+        earlier = await add_feedback(database, 2, created_at="2024-05-01 08:00:00")
+
+        page = await database.get_feedback_page(limit=10)
+        assert page_ids(page) == later[::-1] + earlier[::-1]
+
+    with_database(scenario)
+
+
+def test_type_filter_and_mark_page_read(with_database):
+    async def scenario(database):
+        complaints = await add_feedback(database, 6, "complaint")
+        await add_feedback(database, 3, "suggestion")
+
+        page = await database.get_feedback_page("complaint", limit=4)
+        assert page_ids(page) == complaints[::-1][:4]
+        assert await database.count_unread_feedback("complaint") == 6
+
+        newest, oldest = page_ids(page)[0], page_ids(page)[-1]
+        assert await database.mark_feedback_read(newest, oldest, "complaint") == 4
+        assert await database.count_unread_feedback("complaint") == 2
+        assert await database.count_unread_feedback() == 5
+
+        rest = await database.get_feedback_page("complaint", limit=4)
+        assert page_ids(rest) == complaints[1::-1]
+        assert rest[1:] == (False, False)
+
+    with_database(scenario)
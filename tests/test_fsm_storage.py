@@ -0,0 +1,189 @@
+import asyncio
+import sys
+import time
+import types
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from database.fsm_storage import SQLiteStorage, create_fsm_storage, storage_key
+from database.migrations import _fsm_states
+from database.pool import ConnectionPool
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+async def open_pool(path) -> ConnectionPool:
+    pool = ConnectionPool(str(path), readers=2)
+    async with pool.writer() as db:
+        await _fsm_states(db)
+    return pool
+
+
+def run(path, scenario):
+    """Сценарий с пулом соединений; пул закрывается и при ошибке проверки"""
+    async def main():
+        pool = await open_pool(path)
+        try:
+            await scenario(pool)
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
+
+
+def test_set_get_round_trip(tmp_path):
+    async def scenario(pool):
+        storage = SQLiteStorage(pool, flush_interval=60)
+        await storage.set_state(KEY, "Feedback:waiting_for_text")
+        await storage.set_data(KEY, {"type": "жалоба", "floor": 3})
+
+        assert await storage.get_state(KEY) == "Feedback:waiting_for_text"
+        assert await storage.get_data(KEY) == {"type": "жалоба", "floor": 3}
+        # Возвращается копия: изменение результата не меняет хранилище
+        (await storage.get_data(KEY))["floor"] = 5
+        assert (await storage.get_data(KEY))["floor"] == 3
+        await storage.close()
+
+    run(tmp_path / "bot.db", scenario)
+
+
+def test_state_survives_close_and_recreation(tmp_path):
+    other = StorageKey(bot_id=1, chat_id=7, user_id=7)
+
+    async def before_restart(pool):
+        storage = SQLiteStorage(pool, flush_interval=60)
+        await storage.set_state(KEY, "Admin:broadcast")
+        await storage.set_data(KEY, {"text": "Привет"})
+        await storage.set_state(other, "Admin:broadcast")
+        await storage.set_state(other, None)
+        await storage.close()
+        # Повторный вызов безопасен
+        await storage.close()
+
+    async def after_restart(pool):
+        storage = SQLiteStorage(pool)
+        assert await storage.get_state(KEY) == "Admin:broadcast"
+        assert await storage.get_data(KEY) == {"text": "Привет"}
+        assert await storage.get_state(other) is None
+        async with pool.reader() as db:
+            cursor = await db.execute("SELECT COUNT(*) FROM fsm_states")
+            assert (await cursor.fetchone())[0] == 1
+        await storage.close()
+
+    run(tmp_path / "bot.db", before_restart)
+    run(tmp_path / "bot.db", after_restart)
+
+
+def test_ttl_expiry_and_prune(tmp_path):
+    async def scenario(pool):
+        async with pool.writer() as db:
+            await db.execute(
+                "INSERT INTO fsm_states (key, state, data, updated_at) VALUES (?, ?, ?, ?)",
+                (storage_key(KEY), "Feedback:waiting_for_text", "{}", int(time.time()) - 7200)
+            )
+        storage = SQLiteStorage(pool, ttl=3600)
+        assert await storage.get_state(KEY) is None
+        assert await storage.prune() == 1
+
+        await storage.set_state(KEY, "Feedback:waiting_for_text")
+        assert await storage.get_state(KEY) == "Feedback:waiting_for_text"
+        await storage.close()
+
+    run(tmp_path / "bot.db", scenario)
+
+
+def test_flush_skips_unserializable_data(tmp_path):
+    async def scenario(pool):
+        storage = SQLiteStorage(pool, flush_interval=60)
+        bad = StorageKey(bot_id=1, chat_id=8, user_id=8)
+        await storage.set_data(bad, {"file": object()})
+        await storage.set_state(KEY, "Admin:broadcast")
+        await storage.flush()
+
+        async with pool.reader() as db:
+            cursor = await db.execute("SELECT key FROM fsm_states")
+            assert [row[0] for row in await cursor.fetchall()] == [storage_key(KEY)]
+        assert not storage._dirty
+        await storage.close()
+
+    run(tmp_path / "bot.db", scenario)
+
+
+def test_cache_eviction_keeps_unsaved_entries(tmp_path):
+    keys = [StorageKey(bot_id=1, chat_id=n, user_id=n) for n in range(5)]
+
+    async def scenario(pool):
+        storage = SQLiteStorage(pool, cache_size=2, flush_interval=60)
+        for key in keys:
+            await storage.set_state(key, "Admin:broadcast")
+        assert len(storage._cache) == 5
+
+        await storage.flush()
+        await storage.get_state(keys[0])
+        assert len(storage._cache) <= 2
+        for key in keys:
+            assert await storage.get_state(key) == "Admin:broadcast"
+        await storage.close()
+
+    run(tmp_path / "bot.db", scenario)
+
+
+class FakeRedisStorage:
+    """Замена aiogram RedisStorage: запоминает параметры подключения"""
+
+    def __init__(self, url, state_ttl, data_ttl):
+        self.url = url
+        self.state_ttl = state_ttl
+        self.data_ttl = data_ttl
+
+    @classmethod
+    def from_url(cls, url, state_ttl=None, data_ttl=None):
+        return cls(url, state_ttl, data_ttl)
+
+
+def test_create_redis_storage(monkeypatch, tmp_path):
+    module = types.ModuleType("aiogram.fsm.storage.redis")
+    module.RedisStorage = FakeRedisStorage
+    monkeypatch.setitem(sys.modules, "aiogram.fsm.storage.redis", module)
+
+    pool = ConnectionPool(str(tmp_path / "bot.db"))
+    storage = create_fsm_storage("redis", pool, ttl=600, redis_url="redis://localhost:6379/1")
+    assert isinstance(storage, FakeRedisStorage)
+    assert storage.url == "redis://localhost:6379/1"
+    assert storage.state_ttl == storage.data_ttl == 600
+
+    with pytest.raises(ValueError):
+        create_fsm_storage("redis", pool)
+
+
+def test_redis_without_package_falls_back_to_sqlite(monkeypatch, tmp_path):
+    # None в sys.modules: импорт завершается ImportError, как без пакета redis
+    monkeypatch.setitem(sys.modules, "aiogram.fsm.storage.redis", None)
+
+    pool = ConnectionPool(str(tmp_path / "bot.db"))
+    storage = create_fsm_storage("redis", pool, redis_url="redis://localhost")
+    assert isinstance(storage, SQLiteStorage)
+
+
+def test_create_other_backends(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "bot.db"))
+    assert isinstance(create_fsm_storage("memory", pool), MemoryStorage)
+    assert isinstance(create_fsm_storage("sqlite", pool), SQLiteStorage)
+    assert isinstance(create_fsm_storage("unknown", pool), SQLiteStorage)
+
+
+def test_redis_round_trip_with_fakeredis():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def scenario():
+        storage = create_fsm_storage("redis", None, ttl=600, redis_url="redis://localhost")
+        storage.redis = fakeredis.aioredis.FakeRedis()
+        await storage.set_state(KEY, "Admin:broadcast")
+        await storage.set_data(KEY, {"text": "Привет"})
+        assert await storage.get_state(KEY) == "Admin:broadcast"
+        assert await storage.get_data(KEY) == {"text": "Привет"}
+        await storage.close()
+
+    asyncio.run(scenario())
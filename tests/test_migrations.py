@@ -0,0 +1,140 @@
+import sqlite3
+
+from database.migrations import MIGRATIONS
+
+# Схема базы до введения миграций (версия 0)
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    is_admin BOOLEAN DEFAULT FALSE,
+    registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+    last_activity DATETIME DEFAULT CURRENT_TIMESTAMP,
+    is_active BOOLEAN DEFAULT TRUE
+);
+CREATE TABLE section_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    section_name TEXT,
+    access_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (user_id)
+);
+CREATE TABLE feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    feedback_type TEXT,
+    message TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    is_read BOOLEAN DEFAULT FALSE,
+    admin_response TEXT,
+    FOREIGN KEY (user_id) REFERENCES users (user_id)
+);
+CREATE TABLE bot_settings (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE videos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category TEXT,
+    title TEXT,
+    description TEXT,
+    file_id TEXT,
+    file_path TEXT,
+    added_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    is_active BOOLEAN DEFAULT TRUE
+);
+CREATE TABLE floor_chats (
+    floor_number INTEGER PRIMARY KEY,
+    chat_link TEXT,
+    chat_title TEXT,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE broadcasts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    admin_id INTEGER,
+    message TEXT,
+    sent_count INTEGER DEFAULT 0,
+    failed_count INTEGER DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    completed_at DATETIME,
+    FOREIGN KEY (admin_id) REFERENCES users (user_id)
+);
+"""
+
+
+def create_baseline_db(path: str):
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+        # Старый код записывал last_activity строкой локального времени
+        conn.execute(
+            "INSERT INTO users (user_id, first_name, last_activity) VALUES (1, 'Анна', '2024-05-01 12:00:00.123456')"
+        )
+        conn.execute("INSERT INTO users (user_id, first_name) VALUES (2, 'Борис')")
+        conn.executemany(
+            "INSERT INTO section_stats (user_id, section_name, access_time) VALUES (?, ?, ?)",
+            [
+                (1, "laundry", "2024-05-01 09:00:00"),
+                (1, "laundry", "2024-05-01 10:00:00"),
+                (2, "laundry", "2024-05-01 23:59:59"),
+                (2, "gym", "2024-05-02 00:00:01"),
+            ]
+        )
+        conn.execute("INSERT INTO feedback (user_id, feedback_type, message) VALUES (1, 'complaint', 'Шумно')")
+        conn.execute("INSERT INTO broadcasts (admin_id, message, sent_count) VALUES (1, 'Привет', 2)")
+
+
+async def open_only(database):
+    """Только миграции при открытии базы"""
+
+
+def columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_baseline_database_is_migrated_to_latest(db_path, with_database, far_timezone):
+    create_baseline_db(db_path)
+    with_database(open_only)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == MIGRATIONS[-1][0] == 8
+
+        # 3: локальное время (UTC+10) переведено в секунды epoch
+        rows = dict(conn.execute("SELECT user_id, last_activity FROM users"))
+        assert rows[1] == 1714528800
+        assert isinstance(rows[2], int)
+
+        # 4: дневные сводки восстановлены из сырых событий
+        assert sorted(conn.execute("SELECT day, section_name, access_count FROM section_stats_daily")) == [
+            ("2024-05-01", "laundry", 3),
+            ("2024-05-02", "gym", 1),
+        ]
+        assert sorted(conn.execute("SELECT day, active_users FROM daily_active_users")) == [
+            ("2024-05-01", 2),
+            ("2024-05-02", 1),
+        ]
+
+        # 1, 6, 7, 8: новые колонки и таблицы, старые данные на месте
+        assert {"status", "payload", "progress_chat_id", "progress_message_id"} <= columns(conn, "broadcasts")
+        assert conn.execute("SELECT status, sent_count FROM broadcasts").fetchone() == ("completed", 2)
+        assert {"responded_by", "responded_at"} <= columns(conn, "feedback")
+        assert "content_hash" in columns(conn, "videos")
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {"broadcast_recipients", "feedback_notifications", "fsm_states"} <= tables
+        # 2, 5: индексы
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_users_last_activity", "idx_feedback_type_unread"} <= indexes
+        assert conn.execute("SELECT message FROM feedback").fetchone() == ("Шумно",)
+
+
+def test_migrations_run_once(db_path, with_database):
+    create_baseline_db(db_path)
+    with_database(open_only)
+    with_database(open_only)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 8
+        # Повторный запуск не удваивает восстановленные сводки
+        assert conn.execute("SELECT SUM(access_count) FROM section_stats_daily").fetchone()[0] == 4
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetMe, SendMessage
+
+from utils.outbound import PRIORITY_BULK, OutboundScheduler, send_priority
+
+
+class FakeApi:
+    """make_request без сети: запоминает порядок отправок"""
+
+    def __init__(self, retry_after=None):
+        self.sent = []
+        # chat_id -> сколько раз ответить 429 и пауза
+        self.retry_after = retry_after or {}
+
+    async def __call__(self, bot, method):
+        failures, seconds = self.retry_after.get(getattr(method, "chat_id", None), (0, 0))
+        if failures:
+            self.retry_after[method.chat_id] = (failures - 1, seconds)
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=seconds)
+        self.sent.append((getattr(method, "chat_id", None), time.monotonic()))
+        return True
+
+
+async def send(scheduler, api, chat_id, priority=None):
+    if priority is not None:
+        send_priority.set(priority)
+    return await scheduler(api, None, SendMessage(chat_id=chat_id, text="текст"))
+
+
+def test_interactive_goes_before_queued_bulk():
+    async def scenario():
+        scheduler = OutboundScheduler(rate=50, chat_rate=100, chat_burst=100)
+        api = FakeApi()
+        # Общий лимит исчерпан: все запросы ждут в очереди
+        scheduler._bucket.pause(0.2)
+        bulk = [asyncio.create_task(send(scheduler, api, 100 + n, PRIORITY_BULK)) for n in range(5)]
+        await asyncio.sleep(0.05)
+        interactive = asyncio.create_task(send(scheduler, api, 1))
+        await asyncio.sleep(0.05)
+        assert scheduler.stats()["bulk_waiting"] == 5
+        assert scheduler.stats()["interactive_waiting"] == 1
+
+        await asyncio.gather(interactive, *bulk)
+        assert [chat_id for chat_id, _ in api.sent] == [1, 100, 101, 102, 103, 104]
+        assert scheduler.queue_depth == 0
+        await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_pauses_and_repeats():
+    async def scenario():
+        scheduler = OutboundScheduler(rate=50, chat_rate=100, chat_burst=100)
+        api = FakeApi(retry_after={1: (1, 1)})
+        started = time.monotonic()
+        first = asyncio.create_task(send(scheduler, api, 1))
+        await asyncio.sleep(0.1)
+        # Flood-wait приостанавливает все отправки бота, а не только в этот чат
+        second = asyncio.create_task(send(scheduler, api, 2))
+
+        assert await asyncio.gather(first, second) == [True, True]
+        assert scheduler.stats()["retry_after"] == 1
+        assert {chat_id for chat_id, _ in api.sent} == {1, 2}
+        assert all(sent_at - started >= 0.9 for _, sent_at in api.sent)
+        await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_gives_up_after_max_attempts():
+    async def scenario():
+        scheduler = OutboundScheduler(rate=50, chat_rate=100, chat_burst=100)
+        api = FakeApi(retry_after={1: (100, 0)})
+        with pytest.raises(TelegramRetryAfter):
+            await send(scheduler, api, 1)
+        assert api.sent == []
+        await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_methods_without_chat_bypass_limits():
+    async def scenario():
+        scheduler = OutboundScheduler(rate=50)
+        api = FakeApi()
+        scheduler._bucket.pause(10)
+        assert await asyncio.wait_for(scheduler(api, None, GetMe()), timeout=1) is True
+        await scheduler.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,91 @@
+import asyncio
+import sqlite3
+
+import aiosqlite
+import pytest
+
+from database.pool import ConnectionPool
+
+
+def run(path, scenario, readers=3):
+    async def main():
+        pool = ConnectionPool(str(path), readers=readers)
+        await pool.open()
+        try:
+            async with pool.writer() as db:
+                await db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+            await scenario(pool)
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
+
+
+async def count_items(pool: ConnectionPool) -> int:
+    async with pool.reader() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM items")
+        return (await cursor.fetchone())[0]
+
+
+def test_connections_use_wal(tmp_path):
+    async def scenario(pool):
+        async with pool.reader() as db:
+            cursor = await db.execute("PRAGMA journal_mode")
+            assert (await cursor.fetchone())[0] == "wal"
+
+    run(tmp_path / "bot.db", scenario)
+
+
+def test_reads_are_not_blocked_by_open_write(tmp_path):
+    async def scenario(pool):
+        async with pool.writer() as db:
+            await db.execute("INSERT INTO items (name) VALUES ('a')")
+            # Читатели видят последнее зафиксированное состояние и не ждут запись
+            counts = await asyncio.wait_for(
+                asyncio.gather(*(count_items(pool) for _ in range(10))), timeout=2
+            )
+            assert counts == [0] * 10
+        assert await count_items(pool) == 1
+
+    run(tmp_path / "bot.db", scenario)
+
+
+def test_writer_takes_lock_immediately(tmp_path):
+    async def scenario(pool):
+        async with aiosqlite.connect(str(tmp_path / "bot.db")) as other:
+            await other.execute("PRAGMA busy_timeout = 0")
+            async with pool.writer() as db:
+                assert db.isolation_level == "IMMEDIATE"
+                # Транзакция записи начинается с BEGIN IMMEDIATE и сразу держит блокировку
+                await db.execute("INSERT INTO items (name) VALUES ('a')")
+                with pytest.raises(sqlite3.OperationalError, match="locked"):
+                    await other.execute("BEGIN IMMEDIATE")
+            await other.execute("BEGIN IMMEDIATE")
+            await other.rollback()
+
+    run(tmp_path / "bot.db", scenario)
+
+
+def test_failed_write_is_rolled_back(tmp_path):
+    async def scenario(pool):
+        with pytest.raises(RuntimeError):
+            async with pool.writer() as db:
+                await db.execute("INSERT INTO items (name) VALUES ('a')")
+                raise RuntimeError("ошибка посреди транзакции")
+        assert await count_items(pool) == 0
+
+        async with pool.writer() as db:
+            await db.execute("INSERT INTO items (name) VALUES ('b')")
+        assert await count_items(pool) == 1
+
+    run(tmp_path / "bot.db", scenario)
+
+
+def test_more_readers_than_connections_wait_their_turn(tmp_path):
+    async def scenario(pool):
+        counts = await asyncio.wait_for(
+            asyncio.gather(*(count_items(pool) for _ in range(20))), timeout=5
+        )
+        assert counts == [0] * 20
+
+    run(tmp_path / "bot.db", scenario, readers=2)
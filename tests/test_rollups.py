@@ -0,0 +1,83 @@
+import time
+
+from database.rollups import day_key, day_start, days_ago, record_activity
+
+DAY = 24 * 60 * 60
+
+
+async def fetch_all(database, query, params=()):
+    async with database.pool.reader() as db:
+        cursor = await db.execute(query, params)
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+def test_day_helpers_use_utc(far_timezone):
+    assert day_key(0) == "1970-01-01"
+    assert day_start("1970-01-02") == DAY
+    assert day_key(day_start(days_ago(0))) == days_ago(0)
+
+
+def test_active_user_counted_once_per_day(with_database):
+    async def scenario(database):
+        today = days_ago(0)
+        await database.add_user(1, first_name="Анна")
+        await database.add_user(2, first_name="Борис")
+        # Повторный /start в тот же день не засчитывается
+        await database.add_user(2, first_name="Борис")
+        for _ in range(3):
+            await database.update_user_activity(1)
+            # Активность без строки в users не учитывается ни при одной записи буфера
+            await database.update_user_activity(3)
+            await database.write_buffer.flush()
+        await database.update_user_activity(2)
+        await database.write_buffer.flush()
+
+        assert await fetch_all(database, "SELECT day, active_users FROM daily_active_users") == [(today, 2)]
+
+        # Вчерашняя активность не мешает засчитать пользователя сегодня
+        async with database.pool.writer() as db:
+            await db.execute("UPDATE users SET last_activity = ? WHERE user_id = 1", (int(time.time()) - 2 * DAY,))
+            await record_activity(db, [(1, int(time.time()))])
+        assert await fetch_all(database, "SELECT active_users FROM daily_active_users") == [(3,)]
+
+    with_database(scenario)
+
+
+def test_section_rollups_match_raw_events(with_database):
+    async def scenario(database):
+        accesses = [(1, "laundry")] * 5 + [(2, "gym")] * 3 + [(3, "contacts")]
+        for user_id, section in accesses:
+            await database.log_section_access(user_id, section)
+
+        assert await database.get_popular_sections(limit=2) == [("laundry", 5), ("gym", 3)]
+        assert await fetch_all(
+            database,
+            "SELECT section_name, access_count FROM section_stats_daily ORDER BY access_count DESC"
+        ) == [("laundry", 5), ("gym", 3), ("contacts", 1)]
+        raw = await fetch_all(database, "SELECT COUNT(*) FROM section_stats")
+        assert raw == [(len(accesses),)]
+
+    with_database(scenario)
+
+
+def test_retention_keeps_rollups(with_database):
+    async def scenario(database):
+        old = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - 40 * DAY))
+        async with database.pool.writer() as db:
+            await db.executemany(
+                "INSERT INTO section_stats (user_id, section_name, access_time) VALUES (?, ?, ?)",
+                [(1, "laundry", old)] * 4
+            )
+            await db.execute(
+                "INSERT INTO section_stats_daily (day, section_name, access_count) VALUES (?, 'laundry', 4)",
+                (old[:10],)
+            )
+        await database.log_section_access(1, "laundry")
+
+        assert await database.prune_section_stats(30) == 4
+        assert await fetch_all(database, "SELECT COUNT(*) FROM section_stats") == [(1,)]
+        assert await fetch_all(database, "SELECT SUM(access_count) FROM section_stats_daily") == [(5,)]
+        # Популярные разделы за 30 дней считают только свежие дни
+        assert await database.get_popular_sections(days=30) == [("laundry", 1)]
+
+    with_database(scenario)
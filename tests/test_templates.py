@@ -0,0 +1,23 @@
+import pytest
+
+from config import content
+from config.templates import TemplateRegistry
+
+
+def test_welcome_message_escapes_name():
+    registry = TemplateRegistry()
+    text = registry.render("WELCOME_MESSAGE", first_name="<Тест & Co>")
+    assert "Привет, &lt;Тест &amp; Co&gt;!" in text
+    assert text == content.WELCOME_MESSAGE.format(first_name="&lt;Тест &amp; Co&gt;")
+
+
+def test_override_is_validated_and_reset():
+    registry = TemplateRegistry()
+    registry.set_override("WELCOME_MESSAGE", "Здравствуйте, {first_name}")
+    assert registry.render("WELCOME_MESSAGE", first_name="Анна") == "Здравствуйте, Анна"
+
+    with pytest.raises(ValueError):
+        registry.set_override("WELCOME_MESSAGE", "Здравствуйте, {last_name}")
+
+    registry.set_override("WELCOME_MESSAGE", None)
+    assert registry.render("WELCOME_MESSAGE", first_name="Анна") == content.WELCOME_MESSAGE.format(first_name="Анна")
@@ -0,0 +1,20 @@
+from utils.video_albums import CAPTION_LIMIT, _caption
+
+
+def test_caption_escapes_title_and_description():
+    caption = _caption({"title": "a<b & c", "description": "x > y"})
+    assert caption == "📹 <b>a&lt;b &amp; c</b>\n\nx &gt; y"
+
+
+def test_caption_truncates_text_before_markup():
+    caption = _caption({"title": "Стирка & сушка", "description": "<" * 2000})
+    assert caption.startswith("📹 <b>Стирка &amp; сушка</b>\n\n")
+    assert caption.endswith("&lt;")
+    visible = "📹 Стирка & сушка\n\n" + "<" * caption.count("&lt;")
+    assert len(visible) == CAPTION_LIMIT
+
+
+def test_caption_long_title_keeps_closing_tag():
+    caption = _caption({"title": "&" * 2000, "description": "не поместится"})
+    assert caption.endswith("&amp;</b>")
+    assert caption.count("&amp;") == CAPTION_LIMIT - len("📹 ")
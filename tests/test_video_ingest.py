@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils import video_ingest
+from utils.video_ingest import format_result, ingest_videos, is_ingest_running, start_ingest
+
+
+class FakeVideoDb:
+    """Таблица videos в памяти"""
+
+    def __init__(self):
+        self.file_ids = {}
+
+    async def get_video_by_hash(self, content_hash):
+        return None
+
+    async def count_videos(self, category):
+        return 0
+
+    async def add_video(self, category, title, description, file_id, path, content_hash):
+        video_id = len(self.file_ids) + 1
+        self.file_ids[video_id] = file_id
+        return video_id
+
+    async def set_video_file_id(self, video_id, category, file_id):
+        self.file_ids[video_id] = file_id
+        return True
+
+
+class FakeBot:
+    """Telegram сохраняет файлы с "document" в имени как документ"""
+
+    def __init__(self):
+        self.statuses = []
+
+    async def edit_message_text(self, text, chat_id, message_id, reply_markup=None):
+        self.statuses.append(text)
+
+    async def send_video(self, chat_id, video, **kwargs):
+        if "document" in video.path:
+            return SimpleNamespace(video=None, document=SimpleNamespace(file_id="doc"))
+        return SimpleNamespace(video=SimpleNamespace(file_id=f"video:{video.filename}"))
+
+
+def test_ingest_stores_only_videos_and_skips_unreadable_files(tmp_path, monkeypatch):
+    category_dir = tmp_path / "tour"
+    category_dir.mkdir()
+    for name in ("a_unreadable.mp4", "b_document.mp4", "c_video.mp4"):
+        (category_dir / name).write_bytes(name.encode())
+
+    fake_db = FakeVideoDb()
+    monkeypatch.setattr(video_ingest, "db", fake_db)
+
+    real_hash = video_ingest.file_hash
+
+    def file_hash(path):
+        if "unreadable" in path:
+            raise PermissionError(13, "Permission denied", path)
+        return real_hash(path)
+
+    monkeypatch.setattr(video_ingest, "file_hash", file_hash)
+
+    result = asyncio.run(ingest_videos(FakeBot(), str(tmp_path), chat_id=1))
+
+    assert result.uploaded == ["tour/c_video.mp4"]
+    assert result.failed == ["tour/a_unreadable.mp4", "tour/b_document.mp4"]
+    # file_id документа не сохраняется: запись загрузится повторно при следующем запуске
+    assert sorted(fake_db.file_ids.values(), key=str) == [None, "video:c_video.mp4"]
+
+
+def test_ingest_command_runs_in_background(tmp_path, monkeypatch):
+    category_dir = tmp_path / "rules"
+    category_dir.mkdir()
+    (category_dir / "guide.mp4").write_bytes(b"video")
+    monkeypatch.setattr(video_ingest, "db", FakeVideoDb())
+
+    async def scenario():
+        bot = FakeBot()
+        assert start_ingest(bot, str(tmp_path), chat_id=1, message_id=7)
+        # Обработчик команды не ждет загрузку, повторный запуск отклоняется
+        assert is_ingest_running()
+        assert not start_ingest(bot, str(tmp_path), chat_id=1, message_id=8)
+
+        await video_ingest._task
+        assert not is_ingest_running()
+        assert "Обработано файлов: 1/1" in bot.statuses[0]
+        assert bot.statuses[-1] == format_result(video_ingest.IngestResult(uploaded=["rules/guide.mp4"]))
+
+    asyncio.run(scenario())
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+
+def test_section_access_is_stored_in_utc(with_database, far_timezone):
+    async def scenario(database):
+        await database.log_section_access(1, "laundry")
+        await database.write_buffer.flush()
+        async with database.pool.reader() as db:
+            cursor = await db.execute("SELECT access_time, DATE(access_time) FROM section_stats")
+            access_time, access_day = await cursor.fetchone()
+            cursor = await db.execute("SELECT day, access_count FROM section_stats_daily")
+            rollup = await cursor.fetchall()
+
+        stored = datetime.fromisoformat(access_time)
+        assert abs(stored - datetime.utcnow()) < timedelta(minutes=1)
+        # Сводка считает день по тем же часам, что и DATE() в SQLite
+        assert [tuple(row) for row in rollup] == [(access_day, 1)]
+
+    with_database(scenario)
+
+
+def test_retention_uses_utc_cutoff(with_database, far_timezone):
+    async def scenario(database):
+        old = (datetime.utcnow() - timedelta(days=3)).strftime("%Y-%m-%d %H:%M:%S")
+        async with database.pool.writer() as db:
+            await db.execute(
+                "INSERT INTO section_stats (user_id, section_name, access_time) VALUES (1, 'gym', ?)",
+                (old,)
+            )
+            # Событие по умолчанию получает CURRENT_TIMESTAMP (UTC)
+            await db.execute("INSERT INTO section_stats (user_id, section_name) VALUES (1, 'gym')")
+
+        assert await database.prune_section_stats(1) == 1
+
+    with_database(scenario)
@@ -0,0 +1,434 @@
+"""
+Фоновая массовая рассылка с ограничением скорости и повторными попытками
+
+Каждая рассылка хранится в таблице broadcasts как задание, а состояние доставки
+каждому получателю — в broadcast_recipients. Поэтому после перезапуска бота
+рассылка продолжается с того же места, без повторной отправки уже доставленного.
+
+При нескольких процессах бота рассылки выполняет только один из них; остальные
+передают ему команды запуска и управления событием "broadcast".
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError,
+    TelegramRetryAfter, TelegramServerError
+)
+from loguru import logger
+
+from config.settings import get_settings
+from database.database import db
+from keyboards.inline_keyboards import get_admin_panel_keyboard, get_broadcast_control_keyboard
+from utils.metrics import Family, gauge_family, registry
+from utils.outbound import PRIORITY_BULK, send_priority
+
+# Статусы доставки одному получателю
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+STATUS_BLOCKED = "blocked"
+
+MAX_ATTEMPTS = 5
+# Сколько получателей читать из базы за раз
+RECIPIENTS_BATCH = 500
+# Сколько результатов доставки копить перед записью в базу
+RESULTS_BATCH = 50
+
+# Рассылки, выполняющиеся в этом процессе
+_jobs: Dict[int, "Broadcast"] = {}
+# Рассылки выполняет другой процесс бота
+_delegated = False
+
+BROADCAST_DELIVERIES = registry.counter(
+    "bot_broadcast_deliveries_total", "Результаты доставки рассылок по статусам", ("status",)
+)
+
+
+async def send_broadcast_message(bot: Bot, chat_id: int, broadcast_data: Dict):
+    """Отправка содержимого рассылки одному пользователю"""
+    if "photo" in broadcast_data:
+        await bot.send_photo(
+            chat_id=chat_id,
+            photo=broadcast_data["photo"],
+            caption=broadcast_data.get("caption", "")
+        )
+    elif "video" in broadcast_data:
+        await bot.send_video(
+            chat_id=chat_id,
+            video=broadcast_data["video"],
+            caption=broadcast_data.get("caption", "")
+        )
+    else:
+        await bot.send_message(
+            chat_id=chat_id,
+            text=broadcast_data["text"]
+        )
+
+
+class Broadcast:
+    """Одна рассылка: пул отправителей, сохранение прогресса и отчет администратору"""
+
+    def __init__(self, bot: Bot, job: Dict):
+        settings = get_settings()
+        self.bot = bot
+        self.id = job["id"]
+        self.admin_id = job["admin_id"]
+        self.broadcast_data = job["payload"]
+        self.chat_id = job["chat_id"]
+        self.message_id = job["message_id"]
+        self.concurrency = settings.broadcast_concurrency
+        self.progress_interval = settings.broadcast_progress_interval
+
+        self.counts: Dict[str, int] = {}
+        self.started_at = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+        self._results: List[Tuple[int, str]] = []
+        self._cancelled = False
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._resumed.is_set()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def processed(self) -> int:
+        return self.total - self.counts.get(STATUS_PENDING, 0)
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def cancel(self):
+        self._cancelled = True
+        self._resumed.set()
+
+    async def deliver(self, user_id: int) -> str:
+        """Доставка одному пользователю с повторами при сетевых ошибках.
+        
+        Лимиты скорости и flood-wait соблюдает планировщик исходящих сообщений.
+        """
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                await send_broadcast_message(self.bot, user_id, self.broadcast_data)
+                return STATUS_SENT
+            except TelegramRetryAfter as e:
+                # Планировщик уже исчерпал свои повторы
+                logger.warning(f"Flood-wait при рассылке пользователю {user_id}: {e.retry_after} с")
+            except TelegramForbiddenError:
+                return STATUS_BLOCKED
+            except TelegramBadRequest as e:
+                if "chat not found" in str(e).lower():
+                    return STATUS_BLOCKED
+                logger.warning(f"Не удалось отправить сообщение пользователю {user_id}: {e}")
+                return STATUS_FAILED
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.warning(f"Временная ошибка при отправке пользователю {user_id}: {e}")
+                await asyncio.sleep(2 ** attempt)
+            except Exception as e:
+                logger.warning(f"Не удалось отправить сообщение пользователю {user_id}: {e}")
+                return STATUS_FAILED
+        return STATUS_FAILED
+    
+    async def _flush_results(self):
+        results, self._results = self._results, []
+        if not await db.save_broadcast_results(self.id, results):
+            self._results[:0] = results
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            await self._resumed.wait()
+            if self._cancelled:
+                return
+            try:
+                user_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            status = await self.deliver(user_id)
+            self._results.append((user_id, status))
+            self.counts[STATUS_PENDING] = self.counts.get(STATUS_PENDING, 0) - 1
+            self.counts[status] = self.counts.get(status, 0) + 1
+            BROADCAST_DELIVERIES.inc(status)
+
+            if len(self._results) >= RESULTS_BATCH:
+                await self._flush_results()
+
+    async def edit_status(self, text: str, reply_markup=None):
+        try:
+            await self.bot.edit_message_text(
+                text,
+                chat_id=self.chat_id,
+                message_id=self.message_id,
+                reply_markup=reply_markup
+            )
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                logger.warning(f"Не удалось обновить статус рассылки: {e}")
+        except Exception as e:
+            logger.warning(f"Не удалось обновить статус рассылки: {e}")
+
+    def _progress_text(self) -> str:
+        elapsed = int(time.monotonic() - self.started_at)
+        title = "⏸ <b>Рассылка на паузе</b>" if self.paused else "📨 <b>Рассылка идет...</b>"
+        return f"""
+{title}
+
+• Обработано: {self.processed}/{self.total}
+• Отправлено: {self.counts.get(STATUS_SENT, 0)}
+• Ошибок: {self.counts.get(STATUS_FAILED, 0)}
+• Заблокировали бота: {self.counts.get(STATUS_BLOCKED, 0)}
+
+Прошло: {elapsed // 60} мин {elapsed % 60} с
+"""
+
+    async def report_progress(self):
+        await self.edit_status(
+            self._progress_text(),
+            reply_markup=get_broadcast_control_keyboard(self.id, self.paused)
+        )
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            await self.report_progress()
+
+    async def run(self):
+        """Выполнение рассылки до конца, отмены или остановки бота"""
+        # Отправки этой задачи (и созданных в ней) уступают интерактивным ответам
+        send_priority.set(PRIORITY_BULK)
+        self.counts = await db.get_broadcast_counts(self.id)
+        await self.report_progress()
+
+        reporter = asyncio.create_task(self._report_loop())
+        try:
+            while not self._cancelled:
+                await self._resumed.wait()
+                user_ids = await db.get_pending_recipients(self.id, RECIPIENTS_BATCH)
+                if not user_ids:
+                    break
+
+                queue: asyncio.Queue = asyncio.Queue()
+                for user_id in user_ids:
+                    queue.put_nowait(user_id)
+
+                workers = [
+                    asyncio.create_task(self._worker(queue))
+                    for _ in range(min(self.concurrency, len(user_ids)))
+                ]
+                await asyncio.gather(*workers)
+
+                await self._flush_results()
+                if self._results:
+                    # Без сохраненных результатов следующая порция содержала бы дубликаты
+                    raise RuntimeError("не удалось сохранить результаты доставки")
+        finally:
+            reporter.cancel()
+            # При остановке бота сохраняем прогресс, рассылка продолжится после запуска
+            await self._flush_results()
+
+        status = "cancelled" if self._cancelled else "completed"
+        await db.set_broadcast_status(self.id, status)
+
+        sent = self.counts.get(STATUS_SENT, 0)
+        failed = self.counts.get(STATUS_FAILED, 0)
+        blocked = self.counts.get(STATUS_BLOCKED, 0)
+        title = "⏹ <b>Рассылка остановлена</b>" if self._cancelled else "✅ <b>Рассылка завершена!</b>"
+        result_text = f"""
+{title}
+
+📊 <b>Статистика:</b>
+• Отправлено: {sent}
+• Ошибок: {failed}
+• Заблокировали бота: {blocked}
+• Общий охват: {sent}/{self.total}
+
+Время завершения: {datetime.now().strftime("%H:%M:%S")}
+"""
+        await self.edit_status(result_text, reply_markup=get_admin_panel_keyboard())
+
+        logger.info(
+            f"Рассылка {self.id} {status}: {sent} отправлено, {failed} ошибок, "
+            f"{blocked} заблокировали бота"
+        )
+
+
+async def _run_safely(broadcast: Broadcast):
+    try:
+        await broadcast.run()
+    except asyncio.CancelledError:
+        logger.info(f"Рассылка {broadcast.id} прервана остановкой бота, прогресс сохранен")
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при выполнении рассылки {broadcast.id}: {e}")
+        await broadcast.edit_status(
+            "❌ Рассылка прервана из-за ошибки. Она продолжится после перезапуска бота.",
+            reply_markup=get_admin_panel_keyboard()
+        )
+    finally:
+        _jobs.pop(broadcast.id, None)
+
+
+def _launch(bot: Bot, job: Dict) -> Broadcast:
+    broadcast = Broadcast(bot, job)
+    _jobs[broadcast.id] = broadcast
+    broadcast.task = asyncio.create_task(_run_safely(broadcast))
+    return broadcast
+
+
+async def start_broadcast(bot: Bot, admin_id: int, broadcast_data: Dict,
+                          chat_id: int, message_id: int) -> int:
+    """Создание и запуск рассылки в фоне; прогресс выводится в сообщение chat_id/message_id"""
+    broadcast_id = await db.create_broadcast_job(admin_id, broadcast_data, chat_id, message_id)
+    if not broadcast_id:
+        return 0
+
+    if _delegated:
+        db.publish("broadcast", broadcast_id, "start")
+        return broadcast_id
+
+    job = await db.get_broadcast_job(broadcast_id)
+    _launch(bot, job)
+    return broadcast_id
+
+
+async def _delegate(broadcast_id: int, action: str, statuses: Tuple[str, ...]) -> bool:
+    """Передача команды процессу, который выполняет рассылки"""
+    job = await db.get_broadcast_job(broadcast_id)
+    if not job or job["status"] not in statuses:
+        return False
+    db.publish("broadcast", broadcast_id, action)
+    return True
+
+
+async def resume_broadcasts(bot: Bot):
+    """Возобновление рассылок, прерванных перезапуском бота"""
+    for job in await db.get_unfinished_broadcasts():
+        if job["id"] not in _jobs:
+            _launch(bot, job)
+            logger.info(f"Рассылка {job['id']} возобновлена после перезапуска")
+
+
+async def pause_broadcast(broadcast_id: int) -> bool:
+    """Постановка рассылки на паузу"""
+    if _delegated:
+        return await _delegate(broadcast_id, "pause", ("running",))
+
+    broadcast = _jobs.get(broadcast_id)
+    if not broadcast:
+        return False
+
+    broadcast.pause()
+    await db.set_broadcast_status(broadcast_id, "paused")
+    await broadcast.report_progress()
+    return True
+
+
+async def resume_broadcast(bot: Bot, broadcast_id: int) -> bool:
+    """Продолжение приостановленной рассылки"""
+    if _delegated:
+        return await _delegate(broadcast_id, "resume", ("paused", "running"))
+
+    job = await db.get_broadcast_job(broadcast_id)
+    if not job or job["status"] not in ("paused", "running"):
+        return False
+
+    await db.set_broadcast_status(broadcast_id, "running")
+    broadcast = _jobs.get(broadcast_id)
+    if broadcast:
+        broadcast.resume()
+        await broadcast.report_progress()
+    else:
+        # Рассылка была на паузе во время перезапуска бота
+        _launch(bot, job)
+    return True
+
+
+async def cancel_broadcast(bot: Bot, broadcast_id: int) -> bool:
+    """Остановка рассылки; недоставленным получателям она не уйдет"""
+    if _delegated:
+        return await _delegate(broadcast_id, "cancel", ("paused", "running"))
+
+    broadcast = _jobs.get(broadcast_id)
+    if broadcast:
+        broadcast.cancel()
+        return True
+
+    job = await db.get_broadcast_job(broadcast_id)
+    if not job or job["status"] not in ("paused", "running"):
+        return False
+
+    await db.set_broadcast_status(broadcast_id, "cancelled")
+    try:
+        await bot.edit_message_text(
+            "⏹ <b>Рассылка остановлена</b>",
+            chat_id=job["chat_id"],
+            message_id=job["message_id"],
+            reply_markup=get_admin_panel_keyboard()
+        )
+    except Exception as e:
+        logger.warning(f"Не удалось обновить статус рассылки: {e}")
+    return True
+
+
+async def stop_broadcasts():
+    """Остановка выполнения рассылок при выключении бота (прогресс сохраняется)"""
+    tasks = [broadcast.task for broadcast in _jobs.values() if broadcast.task]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _collect_metrics() -> List[Family]:
+    return [
+        gauge_family("bot_broadcast_recipients", "Получатели выполняющихся рассылок по статусам", [
+            ({"broadcast": str(broadcast.id), "status": status}, count)
+            for broadcast in _jobs.values()
+            for status, count in broadcast.counts.items()
+        ]),
+        gauge_family("bot_broadcast_paused", "Рассылка на паузе (1) или идет (0)", [
+            ({"broadcast": str(broadcast.id)}, int(broadcast.paused))
+            for broadcast in _jobs.values()
+        ])
+    ]
+
+
+registry.add_collector(_collect_metrics)
+
+
+def delegate_broadcasts():
+    """Рассылки этого процесса будет выполнять другой процесс бота"""
+    global _delegated
+    _delegated = True
+
+
+async def _run_command(bot: Bot, broadcast_id: int, action: str):
+    try:
+        if action == "start":
+            job = await db.get_broadcast_job(broadcast_id)
+            if job and broadcast_id not in _jobs:
+                _launch(bot, job)
+        elif action == "pause":
+            await pause_broadcast(broadcast_id)
+        elif action == "resume":
+            await resume_broadcast(bot, broadcast_id)
+        elif action == "cancel":
+            await cancel_broadcast(bot, broadcast_id)
+    except Exception as e:
+        logger.error(f"Ошибка при выполнении команды {action} для рассылки {broadcast_id}: {e}")
+
+
+def handle_broadcast_command(bot: Bot, broadcast_id: int, action: str):
+    """Команда из другого процесса бота (подписчик события "broadcast")"""
+    asyncio.create_task(_run_command(bot, broadcast_id, action))
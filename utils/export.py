@@ -0,0 +1,98 @@
+"""
+Выгрузка данных бота в CSV или JSON
+
+Таблицы читаются из базы порциями и сразу дописываются во временные файлы
+(при EXPORT_GZIP — со сжатием gzip), поэтому память не зависит от размера таблиц.
+Каждая таблица выгружается в отдельный файл.
+"""
+import asyncio
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import IO, List
+
+from loguru import logger
+
+from database.database import EXPORT_TABLES, db
+
+EXPORT_FORMATS = ("csv", "json")
+# Строк в одной порции чтения из базы
+EXPORT_CHUNK_SIZE = 1000
+
+# Одновременно выполняется только одна выгрузка
+_export_lock = asyncio.Lock()
+
+
+def is_export_running() -> bool:
+    return _export_lock.locked()
+
+
+def _open(path: str, compress: bool) -> IO[str]:
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def _write_json_rows(file: IO[str], columns: List[str], rows: List[tuple], first: bool):
+    for index, row in enumerate(rows):
+        if not (first and index == 0):
+            file.write(",\n")
+        file.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str))
+
+
+async def _export_table(table: str, path: str, export_format: str, compress: bool) -> int:
+    """Выгрузка одной таблицы в файл; возвращает количество строк"""
+    count = 0
+    file = await asyncio.to_thread(_open, path, compress)
+    try:
+        writer = csv.writer(file) if export_format == "csv" else None
+        if writer is None:
+            await asyncio.to_thread(file.write, "[\n")
+
+        async for columns, rows in db.iter_table_rows(table, EXPORT_CHUNK_SIZE):
+            # Запись и сжатие порции выполняются вне цикла событий
+            if writer is not None:
+                if count == 0:
+                    await asyncio.to_thread(writer.writerow, columns)
+                await asyncio.to_thread(writer.writerows, rows)
+            else:
+                await asyncio.to_thread(_write_json_rows, file, columns, rows, count == 0)
+            count += len(rows)
+
+        if writer is None:
+            await asyncio.to_thread(file.write, "\n]\n")
+    finally:
+        await asyncio.to_thread(file.close)
+    return count
+
+
+async def export_tables(directory: str, export_format: str = "csv",
+                        compress: bool = True) -> List[str]:
+    """Выгрузка таблиц EXPORT_TABLES в directory; возвращает пути к файлам"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {export_format}")
+
+    suffix = f".{export_format}" + (".gz" if compress else "")
+    stamp = datetime.now().strftime("%Y%m%d_%H%M")
+    paths = []
+
+    async with _export_lock:
+        for table in EXPORT_TABLES:
+            path = os.path.join(directory, f"{table}_{stamp}{suffix}")
+            count = await _export_table(table, path, export_format, compress)
+            paths.append(path)
+            logger.info(f"Таблица {table} выгружена: {count} строк")
+
+    return paths
+
+
+def make_export_dir() -> str:
+    return tempfile.mkdtemp(prefix="bot_export_")
+
+
+def remove_export_dir(directory: str):
+    shutil.rmtree(directory, ignore_errors=True)
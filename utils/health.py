@@ -0,0 +1,167 @@
+"""
+Проверки состояния бота для /health (liveness) и /ready (readiness)
+
+Проверяются доступность базы (чтение и блокировка на запись с ограничением
+по времени), работа long polling, задержка цикла событий и очередь исходящих
+сообщений. Результат кэшируется на HEALTH_CACHE_TTL секунд, поэтому частые
+запросы проверок не нагружают бота.
+
+/health не проходит, только если бот завис: база не отвечает дольше
+DB_FAILING_LIMIT, polling не получал ответ дольше POLLING_STALE_AFTER или цикл
+событий задерживается больше LIVENESS_MAX_LOOP_LAG. /ready не проходит при
+любой неуспешной проверке (например, перегрузке).
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import GetUpdates, TelegramMethod
+
+from database.database import db
+from utils.metrics import loop_lag
+from utils.outbound import get_scheduler
+
+# Время жизни результата проверок, секунды
+HEALTH_CACHE_TTL = 5.0
+# Ограничение времени проверки базы, секунды
+DB_PROBE_TIMEOUT = 3.0
+# Сколько база может не отвечать, прежде чем бот считается зависшим, секунды
+DB_FAILING_LIMIT = 60.0
+# Сколько может не быть успешного getUpdates в режиме polling, секунды
+POLLING_STALE_AFTER = 120.0
+# Задержка цикла событий, при которой бот перегружен / завис, секунды
+READINESS_MAX_LOOP_LAG = 0.5
+LIVENESS_MAX_LOOP_LAG = 5.0
+# Интерактивных ответов в очереди планировщика, при котором бот перегружен
+MAX_INTERACTIVE_WAITING = 100
+
+# Проверка возвращает (годен для /ready, годен для /health, подробности)
+CheckResult = Tuple[bool, bool, Dict[str, Any]]
+
+_started = time.monotonic()
+_polling = False
+_last_poll: Optional[float] = None
+_last_update: Optional[float] = None
+_db_failing_since: Optional[float] = None
+_db_probe: Optional[asyncio.Task] = None
+_extra_checks: Dict[str, Callable[[], Awaitable[CheckResult]]] = {}
+_cached: Optional[Tuple[float, Dict[str, Any]]] = None
+_lock = asyncio.Lock()
+
+
+class PollingWatch(BaseRequestMiddleware):
+    """Отмечает время каждого успешного getUpdates"""
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot,
+                       method: TelegramMethod) -> Any:
+        result = await make_request(bot, method)
+        if isinstance(method, GetUpdates):
+            global _last_poll
+            _last_poll = time.monotonic()
+        return result
+
+
+def watch_polling(bot: Bot):
+    """Бот получает обновления через long polling: проверять, что он не остановился"""
+    global _polling
+    _polling = True
+    bot.session.middleware(PollingWatch())
+
+
+def mark_update():
+    """Получено обновление"""
+    global _last_update
+    _last_update = time.monotonic()
+
+
+def add_check(name: str, check: Callable[[], Awaitable[CheckResult]]):
+    """Дополнительная проверка (например, процессов-обработчиков)"""
+    _extra_checks[name] = check
+
+
+def _age(moment: Optional[float], now: float) -> Optional[float]:
+    return None if moment is None else round(now - moment, 1)
+
+
+async def _probe_database() -> Optional[str]:
+    """Ошибка проверки базы или None; ожидание не дольше DB_PROBE_TIMEOUT"""
+    global _db_probe
+    # Зависшая проверка не отменяется (отмена ждала бы busy_timeout),
+    # а новая не запускается, пока она не завершится
+    if _db_probe is None or _db_probe.done():
+        _db_probe = asyncio.create_task(db.ping())
+    done, _ = await asyncio.wait({_db_probe}, timeout=DB_PROBE_TIMEOUT)
+    if not done:
+        return f"нет ответа за {DB_PROBE_TIMEOUT} с"
+    error = _db_probe.exception()
+    return str(error) if error else None
+
+
+async def _check_database() -> CheckResult:
+    global _db_failing_since
+    started = time.monotonic()
+    error = await _probe_database()
+
+    now = time.monotonic()
+    details: Dict[str, Any] = {"latency_ms": round((now - started) * 1000, 1)}
+    if error is None:
+        _db_failing_since = None
+        return True, True, details
+
+    if _db_failing_since is None:
+        _db_failing_since = now
+    details["error"] = error
+    details["failing_for"] = round(now - _db_failing_since, 1)
+    return False, now - _db_failing_since < DB_FAILING_LIMIT, details
+
+
+def _check_updates(now: float) -> CheckResult:
+    details: Dict[str, Any] = {"last_update_age": _age(_last_update, now)}
+    if not _polling:
+        return True, True, details
+    # До первого ответа отсчет идет от запуска процесса
+    poll_age = now - (_last_poll or _started)
+    details["last_poll_age"] = round(poll_age, 1)
+    ok = poll_age < POLLING_STALE_AFTER
+    return ok, ok, details
+
+
+def _check_event_loop() -> CheckResult:
+    lag = loop_lag()
+    return lag < READINESS_MAX_LOOP_LAG, lag < LIVENESS_MAX_LOOP_LAG, {"lag": round(lag, 4)}
+
+
+def _check_outbound() -> CheckResult:
+    stats = get_scheduler().stats()
+    details = {
+        "interactive_waiting": stats["interactive_waiting"],
+        "bulk_waiting": stats["bulk_waiting"]
+    }
+    return stats["interactive_waiting"] < MAX_INTERACTIVE_WAITING, True, details
+
+
+async def _run_checks() -> Dict[str, Any]:
+    checks: Dict[str, CheckResult] = {"database": await _check_database()}
+    now = time.monotonic()
+    checks["updates"] = _check_updates(now)
+    checks["event_loop"] = _check_event_loop()
+    checks["outbound"] = _check_outbound()
+    for name, check in _extra_checks.items():
+        checks[name] = await check()
+
+    return {
+        "live": all(live for _, live, _ in checks.values()),
+        "ready": all(ready for ready, _, _ in checks.values()),
+        "checks": {name: {"ok": ready, **details} for name, (ready, _, details) in checks.items()}
+    }
+
+
+async def get_health() -> Dict[str, Any]:
+    """Результат проверок (не старше HEALTH_CACHE_TTL секунд)"""
+    global _cached
+    async with _lock:
+        if _cached is None or time.monotonic() - _cached[0] >= HEALTH_CACHE_TTL:
+            _cached = (time.monotonic(), await _run_checks())
+        return _cached[1]
@@ -0,0 +1,44 @@
+"""
+Периодическое обслуживание базы данных: очистка старых событий статистики
+"""
+import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from config.settings import get_settings
+from database.database import db
+
+# Период запуска обслуживания, секунды
+MAINTENANCE_INTERVAL = 6 * 60 * 60
+
+_task: Optional[asyncio.Task] = None
+
+
+async def run_maintenance():
+    """Однократное обслуживание базы"""
+    await db.prune_section_stats(get_settings().stats_retention_days)
+
+
+async def _run():
+    while True:
+        try:
+            await run_maintenance()
+        except Exception as e:
+            logger.error(f"Ошибка при обслуживании базы данных: {e}")
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
+
+
+def start_maintenance():
+    """Запуск фонового обслуживания (первый проход — сразу после запуска)"""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_run())
+
+
+async def stop_maintenance():
+    global _task
+    if _task:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
@@ -0,0 +1,248 @@
+"""
+Метрики бота в текстовом формате Prometheus (/metrics)
+
+Своя легкая реализация: счетчики, гистограммы и значения, которые вычисляются
+в момент запроса. Запись метрики — пара операций со словарем в цикле событий,
+без блокировок и фоновых потоков, поэтому метрики включены всегда.
+Модули объявляют свои метрики в общем реестре registry.
+"""
+import asyncio
+import functools
+import inspect
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+# Образец: (имя, метки, значение); семейство: (имя, тип, описание, образцы)
+Sample = Tuple[str, Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Запросы к SQLite обычно укладываются в миллисекунды
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Период измерения задержки цикла событий, секунды
+LOOP_LAG_INTERVAL = 0.5
+
+
+def gauge_family(name: str, documentation: str,
+                 values: Iterable[Tuple[Dict[str, str], float]]) -> Family:
+    """Семейство значений, вычисленных в момент запроса"""
+    return name, "gauge", documentation, [(name, labels, value) for labels, value in values]
+
+
+class Counter:
+    """Монотонно растущий счетчик"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> Family:
+        return self.name, "counter", self.documentation, [
+            (self.name, dict(zip(self.labelnames, labels)), value)
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Текущее значение"""
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def collect(self) -> Family:
+        name, _, documentation, samples = super().collect()
+        return name, "gauge", documentation, samples
+
+
+class Histogram:
+    """Распределение значений по корзинам (для времени выполнения)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Метки -> [количество в каждой корзине и в +Inf, сумма]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def collect(self) -> Family:
+        samples: List[Sample] = []
+        for labels, state in self._values.items():
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**base, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", base, state[-1]))
+            samples.append((f"{self.name}_count", base, cumulative))
+        return self.name, "histogram", self.documentation, samples
+
+
+class Registry:
+    """Все метрики процесса и снимки метрик процессов-обработчиков"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        # Метка worker -> последние метрики процесса-обработчика
+        self._external: Dict[str, List[Family]] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        """Функция, которая возвращает значения в момент запроса /metrics"""
+        self._collectors.append(collector)
+
+    def set_external(self, worker: str, families: List[Family]):
+        """Снимок метрик другого процесса; его образцы получают метку worker"""
+        self._external[worker] = families
+
+    def collect(self) -> List[Family]:
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.error(f"Ошибка при сборе метрик: {e}")
+        return families
+
+    def render(self) -> str:
+        """Метрики в текстовом формате Prometheus 0.0.4"""
+        merged: Dict[str, Family] = {}
+        sources = [(None, self.collect())] + list(self._external.items())
+        for worker, families in sources:
+            for name, metric_type, documentation, samples in families:
+                family = merged.setdefault(name, (name, metric_type, documentation, []))
+                if worker is None:
+                    family[3].extend(samples)
+                else:
+                    family[3].extend(
+                        (sample_name, {**labels, "worker": worker}, value)
+                        for sample_name, labels, value in samples
+                    )
+
+        lines = []
+        for name, metric_type, documentation, samples in merged.values():
+            lines.append(f"# HELP {name} {_escape_help(documentation)}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
+
+
+registry = Registry()
+
+
+def instrument_methods(cls: type, histogram: Histogram):
+    """Замер времени всех публичных async-методов класса (метка — имя метода)"""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _timed(method, histogram, name))
+    return cls
+
+
+def _timed(method: Callable, histogram: Histogram, label: str) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started, label)
+    return wrapper
+
+
+# Задержка цикла событий: насколько позже срабатывает таймер
+LOOP_LAG = registry.gauge(
+    "bot_event_loop_lag_seconds", "Последняя измеренная задержка цикла событий"
+)
+LOOP_LAG_HISTOGRAM = registry.histogram(
+    "bot_event_loop_lag_distribution_seconds", "Распределение задержки цикла событий"
+)
+
+_lag_task: Optional[asyncio.Task] = None
+
+
+async def _measure_loop_lag():
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(0.0, loop.time() - started - LOOP_LAG_INTERVAL)
+        LOOP_LAG.set(lag)
+        LOOP_LAG_HISTOGRAM.observe(lag)
+
+
+def loop_lag() -> float:
+    return LOOP_LAG.get()
+
+
+def start_loop_monitor():
+    """Запуск измерения задержки цикла событий"""
+    global _lag_task
+    if _lag_task is None or _lag_task.done():
+        _lag_task = asyncio.create_task(_measure_loop_lag())
+
+
+async def stop_loop_monitor():
+    global _lag_task
+    if _lag_task:
+        _lag_task.cancel()
+        await asyncio.gather(_lag_task, return_exceptions=True)
+        _lag_task = None
@@ -0,0 +1,205 @@
+"""
+Планировщик исходящих сообщений бота
+
+Подключается к сессии бота как middleware запросов, поэтому через него проходят
+все отправки: ответы обработчиков, уведомления администраторам и рассылки.
+Соблюдает общий лимит Telegram и лимит на один чат, повторяет запрос после
+flood-wait (429) и пропускает интерактивные ответы вперед массовых отправок.
+Приоритет задается контекстной переменной send_priority: рассылка выставляет
+PRIORITY_BULK в своей задаче, все остальное отправляется как интерактивное.
+"""
+import asyncio
+import heapq
+import itertools
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from loguru import logger
+
+from config.settings import get_settings
+from utils.metrics import Family, gauge_family, registry
+from utils.rate_limiter import TokenBucket
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+# Приоритет отправок текущей задачи
+send_priority: ContextVar[int] = ContextVar("send_priority", default=PRIORITY_INTERACTIVE)
+
+# Методы, на которые распространяются лимиты отправки сообщений
+RATE_LIMITED_PREFIXES = ("send", "copyMessage", "forwardMessage", "editMessage")
+RATE_LIMITED_EXCLUDED = ("sendChatAction",)
+
+# Повторов одного запроса после flood-wait
+MAX_ATTEMPTS = 5
+# Лимит Telegram для групп: 20 сообщений в минуту
+GROUP_CHAT_RATE = 20 / 60
+# Сколько чатов хранить до удаления лимитов неактивных
+MAX_TRACKED_CHATS = 10000
+
+OUTBOUND_SENT = registry.counter(
+    "bot_outbound_sent_total", "Отправленные запросы с лимитами по методам Bot API", ("method",)
+)
+OUTBOUND_RETRY_AFTER = registry.counter(
+    "bot_outbound_retry_after_total", "Ответы 429 (flood-wait) по методам Bot API", ("method",)
+)
+
+
+def is_rate_limited(method: TelegramMethod) -> bool:
+    api_method = method.__api_method__
+    return (
+        api_method.startswith(RATE_LIMITED_PREFIXES)
+        and api_method not in RATE_LIMITED_EXCLUDED
+        and getattr(method, "chat_id", None) is not None
+    )
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Общая очередь исходящих запросов с приоритетами и ограничением скорости"""
+
+    def __init__(self, rate: float, chat_rate: float = 1.0, chat_burst: int = 5):
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self._bucket = TokenBucket(rate)
+        self._chats: Dict[Union[int, str], TokenBucket] = {}
+        # Ожидающие общего лимита: (приоритет, порядковый номер, future)
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._waiting = {PRIORITY_INTERACTIVE: 0, PRIORITY_BULK: 0}
+        self._queued = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.retry_after_count = 0
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_TRACKED_CHATS:
+                self._forget_idle_chats()
+            if isinstance(chat_id, int) and chat_id < 0:
+                bucket = TokenBucket(GROUP_CHAT_RATE, self.chat_burst)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _forget_idle_chats(self):
+        """Лимиты чатов с полным запасом токенов ничего не ограничивают"""
+        for chat_id in [chat_id for chat_id, bucket in self._chats.items() if bucket.full]:
+            del self._chats[chat_id]
+
+    async def _dispatch(self):
+        """Выдача общего лимита ожидающим в порядке приоритета"""
+        while True:
+            while not self._queue:
+                self._queued.clear()
+                await self._queued.wait()
+
+            await self._bucket.acquire()
+            while self._queue:
+                _, _, future = heapq.heappop(self._queue)
+                if not future.done():
+                    future.set_result(None)
+                    break
+
+    async def _acquire(self, chat_id: Union[int, str], priority: int):
+        await self._chat_bucket(chat_id).acquire()
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._counter), future))
+        self._queued.set()
+        self._waiting[priority] += 1
+        try:
+            await future
+        finally:
+            self._waiting[priority] -= 1
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot,
+                       method: TelegramMethod) -> Any:
+        if not is_rate_limited(method):
+            return await make_request(bot, method)
+
+        chat_id = method.chat_id
+        priority = send_priority.get()
+        for attempt in range(MAX_ATTEMPTS):
+            await self._acquire(chat_id, priority)
+            try:
+                result = await make_request(bot, method)
+                self.sent += 1
+                OUTBOUND_SENT.inc(method.__api_method__)
+                return result
+            except TelegramRetryAfter as e:
+                self.retry_after_count += 1
+                OUTBOUND_RETRY_AFTER.inc(method.__api_method__)
+                logger.warning(
+                    f"Flood-wait при {method.__api_method__} в чат {chat_id}: пауза {e.retry_after} с"
+                )
+                # Ограничение от Telegram действует на все отправки бота
+                self._bucket.pause(e.retry_after)
+                self._chat_bucket(chat_id).pause(e.retry_after)
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+
+    def stats(self) -> Dict[str, int]:
+        """Глубина очереди и счетчики отправок"""
+        return {
+            "interactive_waiting": self._waiting[PRIORITY_INTERACTIVE],
+            "bulk_waiting": self._waiting[PRIORITY_BULK],
+            "tracked_chats": len(self._chats),
+            "sent": self.sent,
+            "retry_after": self.retry_after_count
+        }
+
+    def collect_metrics(self) -> List[Family]:
+        return [
+            gauge_family("bot_outbound_waiting", "Запросы, ожидающие общего лимита", [
+                ({"priority": "interactive"}, self._waiting[PRIORITY_INTERACTIVE]),
+                ({"priority": "bulk"}, self._waiting[PRIORITY_BULK])
+            ]),
+            gauge_family("bot_outbound_tracked_chats", "Чаты с отдельным лимитом отправки", [
+                ({}, len(self._chats))
+            ])
+        ]
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._waiting.values())
+
+    async def close(self):
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+
+
+_scheduler: Optional[OutboundScheduler] = None
+
+
+def get_scheduler() -> OutboundScheduler:
+    """Общий планировщик исходящих сообщений (создается по настройкам при первом вызове)"""
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        # Общий лимит Telegram делится между процессами-обработчиками
+        _scheduler = OutboundScheduler(
+            settings.outbound_rate / settings.bot_workers,
+            chat_rate=settings.outbound_chat_rate,
+            chat_burst=settings.outbound_chat_burst
+        )
+    return _scheduler
+
+
+def setup_outbound(bot: Bot) -> OutboundScheduler:
+    """Подключение планировщика к сессии бота"""
+    scheduler = get_scheduler()
+    bot.session.middleware(scheduler)
+    registry.add_collector(scheduler.collect_metrics)
+    return scheduler
@@ -0,0 +1,55 @@
+"""
+Ограничение частоты запросов к Telegram Bot API
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Алгоритм «ведро токенов»: rate токенов в секунду, не больше capacity за раз"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        """Ожидание свободного токена"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    @property
+    def full(self) -> bool:
+        """Запас токенов полон: ведро давно не использовалось"""
+        now = time.monotonic()
+        if now < self._paused_until or self._lock.locked():
+            return False
+        self._refill(now)
+        return self._tokens >= self.capacity
+
+    def pause(self, seconds: float):
+        """Приостановка выдачи токенов (например, после flood-wait от Telegram)"""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0
+        self._updated_at = max(self._updated_at, self._paused_until)
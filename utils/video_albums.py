@@ -0,0 +1,67 @@
+"""
+Альбомы видео-гайдов
+
+Видео категории отправляются альбомами (send_media_group) по ALBUM_SIZE штук.
+Подготовленные InputMediaVideo хранятся в памяти по категориям и сбрасываются
+при изменении видео в базе (событие "videos").
+"""
+import html
+from typing import Dict, List, Optional
+
+from aiogram.types import InputMediaVideo, Message
+
+from database.database import db
+
+# Максимум видео в одном альбоме Telegram
+ALBUM_SIZE = 10
+# Максимальная длина подписи к медиа
+CAPTION_LIMIT = 1024
+
+_albums: Dict[str, List[InputMediaVideo]] = {}
+
+
+def _caption(video: Dict) -> str:
+    """Подпись с HTML-разметкой; лимит Telegram считается по видимому тексту"""
+    prefix = "📹 "
+    title = video["title"][:CAPTION_LIMIT - len(prefix)]
+    caption = f"{prefix}<b>{html.escape(title)}</b>"
+    budget = CAPTION_LIMIT - len(prefix) - len(title) - 2
+    if video["description"] and budget > 0:
+        caption += f"\n\n{html.escape(video['description'][:budget])}"
+    return caption
+
+
+async def get_category_media(category: str) -> List[InputMediaVideo]:
+    """Все видео категории, подготовленные для отправки"""
+    media = _albums.get(category)
+    if media is None:
+        videos = await db.get_videos_by_category(category)
+        media = [
+            InputMediaVideo(media=video["file_id"], caption=_caption(video))
+            for video in videos
+            if video["file_id"]
+        ]
+        _albums[category] = media
+    return media
+
+
+def page_count(media: List[InputMediaVideo]) -> int:
+    return (len(media) + ALBUM_SIZE - 1) // ALBUM_SIZE
+
+
+async def send_album_page(message: Message, media: List[InputMediaVideo], page: int):
+    """Отправка одной страницы видео в чат message"""
+    album = media[page * ALBUM_SIZE:(page + 1) * ALBUM_SIZE]
+    if len(album) == 1:
+        # Альбом должен содержать от 2 до 10 элементов
+        await message.answer_video(video=album[0].media, caption=album[0].caption)
+    elif album:
+        await message.answer_media_group(media=album)
+
+
+def invalidate_video_albums(category: Optional[str] = None):
+    """Сброс подготовленных альбомов категории (или всех)"""
+    if category is None:
+        _albums.clear()
+    else:
+        _albums.pop(category, None)
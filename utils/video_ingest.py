@@ -0,0 +1,243 @@
+"""
+Загрузка видео-гайдов из локальной папки
+
+Файлы лежат в MEDIA_DIR/<категория>/<файл>.mp4 (категории — ключи VIDEO_CATEGORIES).
+Каждый новый файл один раз отправляется в Telegram (файл читается с диска
+потоком), а полученный file_id сохраняется в videos; дальше видео отправляется
+только по file_id. Файлы с уже известным хэшем содержимого пропускаются.
+
+Запись в videos создается до загрузки, поэтому прерванный запуск продолжается
+со следующего: записи без file_id загружаются повторно.
+
+Команда /ingest_videos запускает загрузку в фоне (start_ingest), прогресс
+и итог выводятся в сообщение администратора, как у рассылок.
+"""
+import asyncio
+import hashlib
+import html
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile
+from loguru import logger
+
+from config.content import (
+    MAX_VIDEO_SIZE_MB, MAX_VIDEOS_PER_CATEGORY, VIDEO_CATEGORIES, VIDEO_EXTENSIONS
+)
+from database.database import db
+from keyboards.inline_keyboards import get_video_management_keyboard
+from utils.outbound import PRIORITY_BULK, send_priority
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Загрузка большого файла может идти несколько минут
+UPLOAD_TIMEOUT = 600
+# Как часто обновлять сообщение с прогрессом, секунды
+PROGRESS_INTERVAL = 10
+
+_ingest_lock = asyncio.Lock()
+_task: Optional[asyncio.Task] = None
+
+
+@dataclass
+class IngestResult:
+    uploaded: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+
+
+def is_ingest_running() -> bool:
+    return _ingest_lock.locked() or (_task is not None and not _task.done())
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 содержимого файла (читается порциями)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def title_from_file_name(file_name: str) -> str:
+    return os.path.splitext(file_name)[0].replace("_", " ").strip()
+
+
+def scan_media_dir(media_dir: str) -> List[Tuple[str, str]]:
+    """Список (категория, путь к файлу) в порядке имен файлов"""
+    files = []
+    for category in VIDEO_CATEGORIES:
+        category_dir = os.path.join(media_dir, category)
+        if not os.path.isdir(category_dir):
+            continue
+        for file_name in sorted(os.listdir(category_dir)):
+            if file_name.lower().endswith(VIDEO_EXTENSIONS):
+                files.append((category, os.path.join(category_dir, file_name)))
+    return files
+
+
+async def _upload(bot: Bot, chat_id: int, path: str, caption: str) -> str:
+    message = await bot.send_video(
+        chat_id=chat_id,
+        video=FSInputFile(path),
+        caption=caption,
+        supports_streaming=True,
+        request_timeout=UPLOAD_TIMEOUT
+    )
+    # Альбомы отправляются через InputMediaVideo, поэтому сохраняется только видео
+    if not message.video:
+        raise ValueError("Telegram сохранил файл как документ, а не как видео")
+    return message.video.file_id
+
+
+async def _ingest_file(bot: Bot, chat_id: int, category: str, path: str,
+                       result: IngestResult):
+    name = os.path.relpath(path, os.path.dirname(os.path.dirname(path)))
+
+    try:
+        if os.path.getsize(path) > MAX_VIDEO_SIZE_MB * 1024 * 1024:
+            logger.warning(f"Видео {name} больше {MAX_VIDEO_SIZE_MB} МБ, пропущено")
+            result.failed.append(name)
+            return
+        content_hash = await asyncio.to_thread(file_hash, path)
+    except OSError as e:
+        # Файл удален или недоступен во время загрузки: остальные файлы обрабатываются дальше
+        logger.error(f"Не удалось прочитать видео {name}: {e}")
+        result.failed.append(name)
+        return
+
+    video = await db.get_video_by_hash(content_hash)
+    if video and video["file_id"]:
+        result.skipped.append(name)
+        return
+
+    if video:
+        # Запись осталась от прерванной загрузки
+        video_id, category = video["id"], video["category"]
+        title = video["title"]
+    else:
+        if await db.count_videos(category) >= MAX_VIDEOS_PER_CATEGORY:
+            logger.warning(f"В категории {category} уже {MAX_VIDEOS_PER_CATEGORY} видео, {name} пропущено")
+            result.failed.append(name)
+            return
+        title = title_from_file_name(os.path.basename(path))
+        video_id = await db.add_video(category, title, "", None, path, content_hash)
+        if not video_id:
+            result.failed.append(name)
+            return
+
+    try:
+        file_id = await _upload(bot, chat_id, path, f"📥 {category}: {html.escape(title)}")
+    except Exception as e:
+        logger.error(f"Не удалось загрузить видео {name}: {e}")
+        result.failed.append(name)
+        return
+
+    if await db.set_video_file_id(video_id, category, file_id):
+        result.uploaded.append(name)
+        logger.info(f"Видео {name} загружено в Telegram")
+    else:
+        result.failed.append(name)
+
+
+async def ingest_videos(bot: Bot, media_dir: str, chat_id: int,
+                        on_progress: Optional[Callable[[int, int, IngestResult], Awaitable]] = None
+                        ) -> IngestResult:
+    """Загрузка новых файлов из media_dir; chat_id — чат, в который отправляются файлы
+
+    on_progress(обработано, всего, result) вызывается после каждого файла.
+    """
+    result = IngestResult()
+    async with _ingest_lock:
+        files = scan_media_dir(media_dir)
+        for done, (category, path) in enumerate(files, 1):
+            await _ingest_file(bot, chat_id, category, path, result)
+            if on_progress:
+                await on_progress(done, len(files), result)
+    logger.info(
+        f"Загрузка видео из {media_dir}: загружено {len(result.uploaded)}, "
+        f"пропущено {len(result.skipped)}, ошибок {len(result.failed)}"
+    )
+    return result
+
+
+def format_result(result: IngestResult, limit: Optional[int] = 20) -> str:
+    text = f"""
+📥 <b>Загрузка видео завершена</b>
+
+• Загружено: {len(result.uploaded)}
+• Уже были загружены: {len(result.skipped)}
+• Ошибок: {len(result.failed)}
+"""
+    if result.failed:
+        text += "\n<b>Не загружены:</b>\n" + "\n".join(f"• {html.escape(name)}" for name in result.failed[:limit])
+    return text
+
+
+async def _edit_status(bot: Bot, chat_id: int, message_id: int, text: str, reply_markup=None):
+    try:
+        await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, reply_markup=reply_markup)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            logger.warning(f"Не удалось обновить статус загрузки видео: {e}")
+    except Exception as e:
+        logger.warning(f"Не удалось обновить статус загрузки видео: {e}")
+
+
+async def _run(bot: Bot, media_dir: str, chat_id: int, message_id: int):
+    # Загрузка уступает интерактивным ответам, как и рассылки
+    send_priority.set(PRIORITY_BULK)
+    reported_at = time.monotonic()
+
+    async def report(done: int, total: int, result: IngestResult):
+        nonlocal reported_at
+        if done < total and time.monotonic() - reported_at < PROGRESS_INTERVAL:
+            return
+        reported_at = time.monotonic()
+        await _edit_status(bot, chat_id, message_id, f"""
+📥 <b>Загрузка видео идет...</b>
+
+• Обработано файлов: {done}/{total}
+• Загружено: {len(result.uploaded)}
+• Ошибок: {len(result.failed)}
+""")
+
+    try:
+        result = await ingest_videos(bot, media_dir, chat_id, on_progress=report)
+    except asyncio.CancelledError:
+        logger.info("Загрузка видео прервана остановкой бота, продолжится при следующем запуске")
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при загрузке видео из {media_dir}: {e}")
+        await _edit_status(
+            bot, chat_id, message_id,
+            "❌ Загрузка видео прервана из-за ошибки. Повторный запуск продолжит ее.",
+            reply_markup=get_video_management_keyboard()
+        )
+        return
+    await _edit_status(bot, chat_id, message_id, format_result(result),
+                       reply_markup=get_video_management_keyboard())
+
+
+def start_ingest(bot: Bot, media_dir: str, chat_id: int, message_id: int) -> bool:
+    """Запуск загрузки в фоне; прогресс выводится в сообщение chat_id/message_id.
+
+    Файлы отправляются в тот же чат. Возвращает False, если загрузка уже идет.
+    """
+    global _task
+    if is_ingest_running():
+        return False
+    _task = asyncio.create_task(_run(bot, media_dir, chat_id, message_id))
+    return True
+
+
+async def stop_ingest():
+    """Остановка загрузки при выключении бота (загруженные файлы сохранены)"""
+    global _task
+    if _task:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None